@@ -0,0 +1,26 @@
+"""Add reg_date index to person
+
+Revision ID: 0b8d2f4a6c91
+Revises: f19c5d7e3a62
+Create Date: 2024-06-27 09:55:13.480276
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0b8d2f4a6c91'
+down_revision: Union[str, None] = 'f19c5d7e3a62'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_person_reg_date', 'person', ['reg_date'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_person_reg_date', table_name='person')
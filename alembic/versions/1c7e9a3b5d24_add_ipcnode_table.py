@@ -0,0 +1,76 @@
+"""Add ipcnode table with precomputed IPC hierarchy counts
+
+Revision ID: 1c7e9a3b5d24
+Revises: 0b8d2f4a6c91
+Create Date: 2024-06-28 13:22:40.118593
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1c7e9a3b5d24'
+down_revision: Union[str, None] = '0b8d2f4a6c91'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'ipcnode',
+        sa.Column('code', sa.String(), nullable=False),
+        sa.Column('parent', sa.String(), nullable=True),
+        sa.Column('level', sa.Integer(), nullable=False),
+        sa.Column('patent_count', sa.Integer(), nullable=False),
+        sa.Column('children_count', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('code')
+    )
+    op.create_index(op.f('ix_ipcnode_parent'), 'ipcnode', ['parent'], unique=False)
+
+    # Группы МПК появляются в patent.mpk только после повторной загрузки патентов,
+    # до этого дерево строится по разделам, классам и подклассам.
+    op.execute(
+        """
+        INSERT INTO ipcnode (code, parent, level, patent_count, children_count)
+        SELECT code,
+               CASE
+                   WHEN length(code) = 1 THEN NULL
+                   WHEN length(code) = 3 THEN left(code, 1)
+                   WHEN length(code) = 4 THEN left(code, 3)
+                   WHEN code LIKE '%/00' THEN left(code, 4)
+                   ELSE split_part(code, '/', 1) || '/00'
+               END,
+               CASE
+                   WHEN length(code) = 1 THEN 1
+                   WHEN length(code) = 3 THEN 2
+                   WHEN length(code) = 4 THEN 3
+                   WHEN code LIKE '%/00' THEN 4
+                   ELSE 5
+               END,
+               count(*),
+               0
+        FROM (SELECT unnest(mpk) AS code FROM patent) AS codes
+        GROUP BY code
+        """
+    )
+    op.execute(
+        """
+        UPDATE ipcnode
+        SET children_count = children.children_count
+        FROM (
+            SELECT parent, count(*) AS children_count
+            FROM ipcnode
+            WHERE parent IS NOT NULL
+            GROUP BY parent
+        ) AS children
+        WHERE ipcnode.code = children.parent
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_ipcnode_parent'), table_name='ipcnode')
+    op.drop_table('ipcnode')
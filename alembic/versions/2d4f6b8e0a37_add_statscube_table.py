@@ -0,0 +1,61 @@
+"""Add statscube table with pre-aggregated patent counts
+
+Revision ID: 2d4f6b8e0a37
+Revises: 1c7e9a3b5d24
+Create Date: 2024-07-01 10:47:19.530627
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2d4f6b8e0a37'
+down_revision: Union[str, None] = '1c7e9a3b5d24'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'statscube',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('kind', sa.Integer(), nullable=True),
+        sa.Column('actual', sa.Boolean(), nullable=True),
+        sa.Column('country_code', sa.String(length=10), nullable=True),
+        sa.Column('region', sa.String(), nullable=True),
+        sa.Column('reg_year', sa.Integer(), nullable=True),
+        sa.Column('mpk_class', sa.String(), nullable=True),
+        sa.Column('holder_category', sa.String(), nullable=True),
+        sa.Column('patent_count', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+    op.execute(
+        """
+        INSERT INTO statscube (kind, actual, country_code, region, reg_year, mpk_class, holder_category, patent_count)
+        SELECT patent.kind,
+               patent.actual,
+               patent.country_code,
+               patent.region,
+               CAST(EXTRACT(year FROM patent.reg_date) AS INTEGER),
+               nullif(trim(split_part(patent.category, ',', 1)), ''),
+               holders.category,
+               count(*)
+        FROM patent
+        LEFT JOIN (
+            SELECT ownership.patent_kind, ownership.patent_reg_number, min(person.category) AS category
+            FROM ownership
+            JOIN person ON person.tax_number = ownership.person_tax_number
+            GROUP BY ownership.patent_kind, ownership.patent_reg_number
+        ) AS holders
+            ON holders.patent_kind = patent.kind AND holders.patent_reg_number = patent.reg_number
+        GROUP BY 1, 2, 3, 4, 5, 6, 7
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('statscube')
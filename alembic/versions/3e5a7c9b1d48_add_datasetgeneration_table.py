@@ -0,0 +1,38 @@
+"""Add datasetgeneration table with per-entity cache generations
+
+Revision ID: 3e5a7c9b1d48
+Revises: 2d4f6b8e0a37
+Create Date: 2024-07-03 11:18:42.904113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3e5a7c9b1d48'
+down_revision: Union[str, None] = '2d4f6b8e0a37'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ENTITIES = ('patent', 'person', 'ownership', 'filter')
+
+
+def upgrade() -> None:
+    op.create_table(
+        'datasetgeneration',
+        sa.Column('entity', sa.String(), nullable=False),
+        sa.Column('generation', sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint('entity')
+    )
+
+    op.bulk_insert(
+        sa.table('datasetgeneration', sa.column('entity', sa.String), sa.column('generation', sa.BigInteger)),
+        [{'entity': entity, 'generation': 1} for entity in ENTITIES]
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('datasetgeneration')
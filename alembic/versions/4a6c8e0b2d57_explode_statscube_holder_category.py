@@ -0,0 +1,59 @@
+"""Count statscube patents under every holder category
+
+Revision ID: 4a6c8e0b2d57
+Revises: 3e5a7c9b1d48
+Create Date: 2024-07-08 11:12:45.204318
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4a6c8e0b2d57'
+down_revision: Union[str, None] = '3e5a7c9b1d48'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('statscube', sa.Column('is_primary', sa.Boolean(), server_default=sa.true(), nullable=False))
+
+    op.execute("DELETE FROM statscube")
+    op.execute(
+        """
+        INSERT INTO statscube (
+            kind, actual, country_code, region, reg_year, mpk_class, holder_category, is_primary, patent_count
+        )
+        SELECT patent.kind,
+               patent.actual,
+               patent.country_code,
+               patent.region,
+               CAST(EXTRACT(year FROM patent.reg_date) AS INTEGER),
+               nullif(trim(split_part(patent.category, ',', 1)), ''),
+               holders.category,
+               coalesce(holders.is_primary, true),
+               count(*)
+        FROM patent
+        LEFT JOIN (
+            SELECT categories.*,
+                   row_number() OVER (
+                       PARTITION BY patent_kind, patent_reg_number ORDER BY category NULLS LAST
+                   ) = 1 AS is_primary
+            FROM (
+                SELECT DISTINCT ownership.patent_kind, ownership.patent_reg_number, person.category
+                FROM ownership
+                JOIN person ON person.tax_number = ownership.person_tax_number
+            ) AS categories
+        ) AS holders
+            ON holders.patent_kind = patent.kind AND holders.patent_reg_number = patent.reg_number
+        GROUP BY 1, 2, 3, 4, 5, 6, 7, 8
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DELETE FROM statscube WHERE NOT is_primary")
+    op.drop_column('statscube', 'is_primary')
@@ -0,0 +1,31 @@
+"""Add (filter_id, tax_number) index to filtertaxnumber
+
+Revision ID: 5b1e7c2d9a43
+Revises: 32c97c1aac39
+Create Date: 2024-06-20 12:04:11.318402
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b1e7c2d9a43'
+down_revision: Union[str, None] = '32c97c1aac39'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_filtertaxnumber_filter_id_tax_number',
+        'filtertaxnumber',
+        ['filter_id', 'tax_number'],
+        unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_filtertaxnumber_filter_id_tax_number', table_name='filtertaxnumber')
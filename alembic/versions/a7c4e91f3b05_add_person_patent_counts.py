@@ -0,0 +1,61 @@
+"""Add maintained patent counts to person
+
+Revision ID: a7c4e91f3b05
+Revises: 5b1e7c2d9a43
+Create Date: 2024-06-21 09:41:27.513930
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7c4e91f3b05'
+down_revision: Union[str, None] = '5b1e7c2d9a43'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COUNT_COLUMNS = ('patent_count', 'invention_count', 'utility_model_count', 'industrial_design_count')
+
+
+def upgrade() -> None:
+    for column in COUNT_COLUMNS:
+        op.add_column('person', sa.Column(column, sa.Integer(), server_default='0', nullable=False))
+
+    op.create_index('ix_ownership_person_tax_number', 'ownership', ['person_tax_number'], unique=False)
+
+    op.execute(
+        """
+        UPDATE person
+        SET patent_count = counts.patent_count,
+            invention_count = counts.invention_count,
+            utility_model_count = counts.utility_model_count,
+            industrial_design_count = counts.industrial_design_count
+        FROM (
+            SELECT person_tax_number,
+                   count(*) AS patent_count,
+                   count(*) FILTER (WHERE patent_kind = 1) AS invention_count,
+                   count(*) FILTER (WHERE patent_kind = 2) AS utility_model_count,
+                   count(*) FILTER (WHERE patent_kind = 3) AS industrial_design_count
+            FROM ownership
+            GROUP BY person_tax_number
+        ) AS counts
+        WHERE person.tax_number = counts.person_tax_number
+        """
+    )
+
+    op.create_index(
+        'ix_person_patent_count',
+        'person',
+        [sa.text('patent_count DESC'), 'tax_number'],
+        unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_person_patent_count', table_name='person')
+    op.drop_index('ix_ownership_person_tax_number', table_name='ownership')
+    for column in reversed(COUNT_COLUMNS):
+        op.drop_column('person', column)
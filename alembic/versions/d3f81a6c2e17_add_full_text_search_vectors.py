@@ -0,0 +1,52 @@
+"""Add full-text search vectors to patent and person
+
+Revision ID: d3f81a6c2e17
+Revises: a7c4e91f3b05
+Create Date: 2024-06-24 10:12:45.204118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3f81a6c2e17'
+down_revision: Union[str, None] = 'a7c4e91f3b05'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('patent', sa.Column(
+        'search_vector',
+        postgresql.TSVECTOR(),
+        sa.Computed(
+            "setweight(to_tsvector('russian', coalesce(name, '')), 'A') || "
+            "setweight(to_tsvector('russian', coalesce(owner_raw, '')), 'B') || "
+            "setweight(to_tsvector('russian', coalesce(author_raw, '')), 'C')",
+            persisted=True
+        ),
+        nullable=True
+    ))
+    op.add_column('person', sa.Column(
+        'search_vector',
+        postgresql.TSVECTOR(),
+        sa.Computed(
+            "setweight(to_tsvector('russian', coalesce(full_name, '')), 'A') || "
+            "setweight(to_tsvector('russian', coalesce(short_name, '')), 'B')",
+            persisted=True
+        ),
+        nullable=True
+    ))
+    op.create_index('ix_patent_search_vector', 'patent', ['search_vector'], unique=False, postgresql_using='gin')
+    op.create_index('ix_person_search_vector', 'person', ['search_vector'], unique=False, postgresql_using='gin')
+
+
+def downgrade() -> None:
+    op.drop_index('ix_person_search_vector', table_name='person', postgresql_using='gin')
+    op.drop_index('ix_patent_search_vector', table_name='patent', postgresql_using='gin')
+    op.drop_column('person', 'search_vector')
+    op.drop_column('patent', 'search_vector')
@@ -0,0 +1,52 @@
+"""Add trigram name and tax number prefix indexes to person
+
+Revision ID: e6a2b4c9d810
+Revises: d3f81a6c2e17
+Create Date: 2024-06-25 14:31:08.662051
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e6a2b4c9d810'
+down_revision: Union[str, None] = 'd3f81a6c2e17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.add_column('person', sa.Column(
+        'name_normalized',
+        sa.String(),
+        sa.Computed(
+            "translate(lower(coalesce(short_name, '') || ' ' || coalesce(full_name, '')), 'ё«»\"', 'е')",
+            persisted=True
+        ),
+        nullable=True
+    ))
+    op.create_index(
+        'ix_person_name_normalized_trgm',
+        'person',
+        ['name_normalized'],
+        unique=False,
+        postgresql_using='gin',
+        postgresql_ops={'name_normalized': 'gin_trgm_ops'}
+    )
+    op.create_index(
+        'ix_person_tax_number_pattern',
+        'person',
+        ['tax_number'],
+        unique=False,
+        postgresql_ops={'tax_number': 'text_pattern_ops'}
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_person_tax_number_pattern', table_name='person')
+    op.drop_index('ix_person_name_normalized_trgm', table_name='person', postgresql_using='gin')
+    op.drop_column('person', 'name_normalized')
@@ -0,0 +1,58 @@
+"""Add mpk codes and filter indexes to patent
+
+Revision ID: f19c5d7e3a62
+Revises: e6a2b4c9d810
+Create Date: 2024-06-26 11:08:52.917334
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f19c5d7e3a62'
+down_revision: Union[str, None] = 'e6a2b4c9d810'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('patent', sa.Column('mpk', postgresql.ARRAY(sa.String()), nullable=True))
+
+    # Исходные индексы МПК не сохранялись, поэтому mpk восстанавливается из subcategory
+    # (подклассы через запятую): раздел, класс и подкласс каждого индекса.
+    op.execute(
+        """
+        UPDATE patent
+        SET mpk = ARRAY(
+            SELECT DISTINCT prefix
+            FROM unnest(string_to_array(subcategory, ',')) AS code,
+                 LATERAL (VALUES (left(trim(code), 1)), (left(trim(code), 3)), (left(trim(code), 4))) AS p(prefix)
+            WHERE trim(code) ~ '^[A-H][0-9]{2}'
+            ORDER BY prefix
+        )
+        WHERE subcategory IS NOT NULL AND subcategory <> ''
+        """
+    )
+
+    op.create_index('ix_patent_mpk', 'patent', ['mpk'], unique=False, postgresql_using='gin')
+    op.create_index('ix_patent_reg_date_brin', 'patent', ['reg_date'], unique=False, postgresql_using='brin')
+    op.create_index('ix_patent_appl_date_brin', 'patent', ['appl_date'], unique=False, postgresql_using='brin')
+    op.create_index('ix_patent_region', 'patent', ['region'], unique=False)
+    op.create_index('ix_patent_city', 'patent', ['city'], unique=False)
+    op.create_index('ix_patent_country_code', 'patent', ['country_code'], unique=False)
+    op.create_index('ix_patent_author_count', 'patent', ['author_count'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_patent_author_count', table_name='patent')
+    op.drop_index('ix_patent_country_code', table_name='patent')
+    op.drop_index('ix_patent_city', table_name='patent')
+    op.drop_index('ix_patent_region', table_name='patent')
+    op.drop_index('ix_patent_appl_date_brin', table_name='patent', postgresql_using='brin')
+    op.drop_index('ix_patent_reg_date_brin', table_name='patent', postgresql_using='brin')
+    op.drop_index('ix_patent_mpk', table_name='patent', postgresql_using='gin')
+    op.drop_column('patent', 'mpk')
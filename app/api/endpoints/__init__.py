@@ -1,3 +1,9 @@
 from .patent import router as patent_router
 from .person import router as person_router
 from .filter import router as filter_router
+from .export import router as export_router
+from .search import router as search_router
+from .ipc import router as ipc_router
+from .stats import router as stats_router
+from .cache import router as cache_router
+from .health import router as health_router
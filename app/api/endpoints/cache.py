@@ -0,0 +1,28 @@
+from fastapi import APIRouter
+from starlette import status
+
+from app.core.cache import cache_metrics, memory_store
+from app.core.config import settings
+from app.schemas.cache import CacheMetrics
+
+router = APIRouter()
+
+
+@router.get("/cache/metrics", response_model=CacheMetrics, status_code=status.HTTP_200_OK)
+async def get_cache_metrics() -> CacheMetrics:
+    """
+    Получить счетчики кеша ответов текущего воркера.
+
+    Returns:
+        CacheMetrics: попадания, промахи, вытеснения, объединенные промахи и ответы 304 по эндпоинтам;
+            для кеша в памяти - занятый объем и число записей.
+    """
+    return {
+        "backend": settings.cache_backend,
+        "max_bytes": memory_store.max_bytes,
+        "used_bytes": memory_store.used_bytes,
+        "entries": len(memory_store),
+        "endpoints": [
+            {"endpoint": endpoint, **counters} for endpoint, counters in cache_metrics.snapshot().items()
+        ],
+    }
@@ -0,0 +1,160 @@
+import re
+from typing import Optional
+
+import aiofiles
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import Response, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette import status
+
+from app.core.db import get_async_session
+from app.crud.export_jobs import export_jobs
+from app.crud.patents_export import EXPORT_MEDIA_TYPES
+from app.schemas.export import ExportJobCreate, ExportJobDB, ExportJobStatus
+
+router = APIRouter()
+
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def parse_range(range_header: str, size: int) -> Optional[tuple]:
+    """
+    Разбирает заголовок Range с одним диапазоном байтов.
+
+    Returns:
+        Optional[tuple]: Пара (start, end) включительно или None, если заголовок не распознан
+            (в этом случае отдается весь файл).
+
+    Raises:
+        HTTPException(416): Если диапазон выходит за пределы файла.
+    """
+    match = RANGE_RE.match(range_header.strip())
+    if not match or match.groups() == ("", ""):
+        return None
+    start, end = match.groups()
+    if start:
+        start, end = int(start), min(int(end), size - 1) if end else size - 1
+    else:
+        start, end = max(size - int(end), 0), size - 1
+    if start > end or start >= size:
+        raise HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            detail="Запрошенный диапазон недоступен.",
+            headers={"Content-Range": f"bytes */{size}"}
+        )
+    return start, end
+
+
+async def iter_file(path, start: int, length: int):
+    async with aiofiles.open(path, "rb") as file:
+        await file.seek(start)
+        while length > 0:
+            chunk = await file.read(min(DOWNLOAD_CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+@router.post("/exports", response_model=ExportJobDB, status_code=status.HTTP_202_ACCEPTED)
+async def create_export(params: ExportJobCreate, session: AsyncSession = Depends(get_async_session)):
+    """
+    Ставит выгрузку патентов в очередь и возвращает задачу.
+
+    Если файл с такими же параметрами для текущей версии данных уже сформирован,
+    задача сразу возвращается в статусе done.
+
+    Args:
+        params (ExportJobCreate): Формат (xlsx, csv, parquet) и фильтры выгрузки.
+        session (AsyncSession): Сессия для взаимодействия с базой данных.
+
+    Raises:
+        HTTPException(400): Если значение actual некорректно.
+        HTTPException(500): Если произошла ошибка при создании задачи.
+
+    Returns:
+        ExportJobDB: Состояние задачи.
+    """
+    try:
+        return await export_jobs.create_job(session, params)
+
+    except HTTPException:
+        raise
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/exports/{job_id}", response_model=ExportJobDB)
+async def get_export(job_id: str):
+    """
+    Возвращает состояние и прогресс задачи выгрузки.
+
+    Args:
+        job_id (str): Идентификатор задачи.
+
+    Raises:
+        HTTPException(404): Если задача не найдена.
+
+    Returns:
+        ExportJobDB: Состояние задачи.
+    """
+    job = export_jobs.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Задача выгрузки не найдена.")
+    return job
+
+
+@router.get("/exports/{job_id}/download")
+async def download_export(job_id: str, range_header: Optional[str] = Header(None, alias="Range")):
+    """
+    Отдает сформированный файл выгрузки; поддерживается докачка через заголовок Range.
+
+    Args:
+        job_id (str): Идентификатор задачи.
+        range_header (Optional[str]): Заголовок Range с одним диапазоном байтов.
+
+    Raises:
+        HTTPException(404): Если задача или файл не найдены.
+        HTTPException(409): Если файл еще не сформирован.
+        HTTPException(416): Если запрошенный диапазон недоступен.
+
+    Returns:
+        StreamingResponse: Файл целиком (200) или запрошенный диапазон (206).
+    """
+    job = export_jobs.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Задача выгрузки не найдена.")
+    if job.status != ExportJobStatus.DONE:
+        raise HTTPException(status_code=409, detail=f"Выгрузка не готова: {job.status.value}.")
+
+    path = export_jobs.get_artifact_path(job)
+    try:
+        size = path.stat().st_size
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Файл выгрузки удален из кеша, создайте задачу заново.")
+
+    headers = {
+        "Accept-Ranges": "bytes",
+        "Content-Disposition": f"attachment; filename=patents_export.{job.params.format.value}",
+        "ETag": f'"{job.id}"',
+    }
+    media_type = EXPORT_MEDIA_TYPES[job.params.format]
+    if size == 0:
+        return Response(b"", media_type=media_type, headers=headers)
+
+    byte_range = parse_range(range_header, size) if range_header else None
+    if byte_range is None:
+        headers["Content-Length"] = str(size)
+        return StreamingResponse(iter_file(path, 0, size), media_type=media_type, headers=headers)
+
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(end - start + 1)
+    return StreamingResponse(
+        iter_file(path, start, end - start + 1),
+        status_code=status.HTTP_206_PARTIAL_CONTENT,
+        media_type=media_type,
+        headers=headers
+    )
@@ -8,7 +8,10 @@ from fastapi.responses import Response
 
 from app.core.db import get_async_session
 from app.crud.filter import filter_crud
-from app.schemas.filter import FilterDB, FilterCreate
+from app.crud.patent import patent_crud
+from app.crud.person import person_crud
+from app.parsers.filter import FilterParser
+from app.schemas.filter import FilterCombine, FilterDB, FilterCreate, FilterFromQuery
 
 router = APIRouter()
 
@@ -16,26 +19,102 @@ router = APIRouter()
 @router.post("/filters", response_model=FilterDB, status_code=status.HTTP_201_CREATED)
 async def create_filter(name: str, file: UploadFile, session: AsyncSession = Depends(get_async_session)):
     """
-    Создает новый фильтр на основе загруженного Excel-файла.
+    Создает новый фильтр на основе загруженного файла со списком ИНН.
 
     Args:
         name (str): Имя нового фильтра.
-        file (UploadFile): Загружаемый Excel-файл с данными для фильтра.
+        file (UploadFile): Загружаемый файл xlsx, csv или txt; ИНН берутся из первой колонки.
         session (AsyncSession): Сессия для взаимодействия с базой данных.
 
     Raises:
-        HTTPException(400): Если формат загруженного файла не поддерживается.
+        HTTPException(400): Если формат загруженного файла не поддерживается или в нем нет корректных ИНН.
         HTTPException(500): Если произошла ошибка при создании фильтра.
 
     Returns:
         FilterDB: Созданный фильтр.
     """
-    if file.content_type != 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet':
+    if not FilterParser.is_supported(file.filename, file.content_type):
         raise HTTPException(status_code=400, detail="Данный формат файла не поддерживается.")
     try:
         filter_in = FilterCreate(name=name, filename=file.filename)
-        file_bytes = await file.read()
-        return await filter_crud.create_filter(session, filter_in, file_bytes)
+        return await filter_crud.create_filter(session, filter_in, file.file, file.content_type)
+
+    except HTTPException:
+        raise
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/filters/combine", response_model=FilterDB, status_code=status.HTTP_201_CREATED)
+async def combine_filters(filter_combine: FilterCombine, session: AsyncSession = Depends(get_async_session)):
+    """
+    Создает новый фильтр из операций над множествами ИНН существующих фильтров.
+
+    Например, "ВУЗы минус фильтр 7":
+    {"name": "...", "expression": {"operation": "difference", "operands": [4, 7]}}.
+    Операнды могут быть вложенными выражениями.
+
+    Args:
+        filter_combine (FilterCombine): Имя нового фильтра и выражение (union, intersection, difference);
+            не более 50 операндов на всех уровнях и 5 уровней вложенности.
+        session (AsyncSession): Сессия для взаимодействия с базой данных.
+
+    Raises:
+        HTTPException(404): Если какой-либо из фильтров выражения не найден.
+        HTTPException(500): Если произошла ошибка при создании фильтра.
+
+    Returns:
+        FilterDB: Созданный фильтр.
+    """
+    try:
+        return await filter_crud.combine_filters(session, filter_combine)
+
+    except HTTPException:
+        raise
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/filters/from-query", response_model=FilterDB, status_code=status.HTTP_201_CREATED)
+async def create_filter_from_query(
+        filter_query: FilterFromQuery,
+        session: AsyncSession = Depends(get_async_session)
+):
+    """
+    Создает новый фильтр из персон, удовлетворяющих критериям /persons и/или /patents.
+
+    ИНН вставляются одной командой INSERT ... SELECT без выгрузки данных из БД.
+    Если заданы оба набора критериев, в фильтр попадают персоны, удовлетворяющие критериям persons
+    и владеющие хотя бы одним патентом, удовлетворяющим критериям patents.
+
+    Args:
+        filter_query (FilterFromQuery): Имя нового фильтра и критерии отбора.
+        session (AsyncSession): Сессия для взаимодействия с базой данных.
+
+    Raises:
+        HTTPException(500): Если произошла ошибка при создании фильтра.
+
+    Returns:
+        FilterDB: Созданный фильтр.
+    """
+    try:
+        person_conditions = []
+        if filter_query.persons is not None:
+            person_conditions = person_crud.get_filter_conditions(**filter_query.persons.dict())
+
+        patent_conditions = None
+        if filter_query.patents is not None:
+            patent_conditions = patent_crud.get_filter_conditions(**filter_query.patents.dict())
+
+        filter_in = FilterCreate(name=filter_query.name, filename=filter_query.describe())
+        return await filter_crud.create_filter_from_select(
+            session, filter_in, person_crud.get_tax_numbers_query(person_conditions, patent_conditions)
+        )
+
+    except HTTPException:
+        raise
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
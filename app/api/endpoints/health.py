@@ -0,0 +1,27 @@
+from fastapi import APIRouter, HTTPException
+from starlette import status
+
+from app.core.warmup import cache_warmer
+
+router = APIRouter()
+
+
+@router.get("/health/live", status_code=status.HTTP_200_OK)
+async def live() -> dict:
+    """
+    Проверка, что воркер запущен и принимает запросы.
+    """
+    return {"status": "ok"}
+
+
+@router.get("/health/ready", status_code=status.HTTP_200_OK)
+async def ready() -> dict:
+    """
+    Проверка готовности воркера принимать трафик: ответ 200 только после прогрева кеша.
+
+    Raises:
+        HTTPException(503): Если прогрев кеша еще не завершен.
+    """
+    if not cache_warmer.ready:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Прогрев кеша не завершен.")
+    return {"status": "ok"}
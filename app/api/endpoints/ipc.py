@@ -0,0 +1,38 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette import status
+
+from app.core.cache import CachedRoute, cached
+from app.core.db import get_async_session
+from app.crud.ipc import ipc_crud
+from app.schemas.ipc import IpcTree
+
+router = APIRouter(route_class=CachedRoute)
+
+
+@router.get("/ipc/tree", response_model=IpcTree, status_code=status.HTTP_200_OK)
+@cached()
+async def get_ipc_tree(
+        parent: Optional[str] = None,
+        filter_id: Optional[int] = None,
+        session: AsyncSession = Depends(get_async_session),
+) -> IpcTree:
+    """
+    Получить узлы иерархии МПК с количеством патентов.
+
+    Args:
+        parent (Optional[str]): код родительского узла (G, G06, G06F, G06F16/00); если не указан,
+            возвращаются разделы.
+        filter_id (Optional[int]): опциональный идентификатор загруженного фильтра по списку ИНН.
+        session (AsyncSession): асинхронная сессия базы данных.
+
+    Returns:
+        IpcTree: дочерние узлы с количеством патентов и дочерних узлов.
+    """
+    try:
+        return await ipc_crud.get_tree(session, parent, filter_id)
+
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
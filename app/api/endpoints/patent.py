@@ -1,24 +1,27 @@
 import logging
 from http import HTTPStatus
-from typing import Optional
+from typing import List, Optional
 
-from aiocache import cached, Cache
-from fastapi import APIRouter, Depends, HTTPException, UploadFile
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Response, UploadFile
 from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from starlette import status
 
 from app.api.validators import check_patent_exists
-from app.core.config import settings
+from app.core.cache import CachedRoute, EntityCache, cached
 from app.core.db import get_async_session
+from app.crud.dataset import patent_cache_key
 from app.crud.patent import patent_crud
 from app.crud.patents_export import get_export_patent_file
 from app.models import Patent
 from app.patent_parser.parser import create_upload_file
+from app.schemas.filter import PatentsQuery
 from app.schemas.patent import (
+    ExportFormat,
     PatentAdditionalFields,
     PatentCreate,
     PatentDB,
+    PatentKey,
     PatentUpdate,
     PatentsList,
     PatentsStats,
@@ -27,7 +30,11 @@ from app.schemas.patent import (
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.DEBUG)
 
-router = APIRouter()
+router = APIRouter(route_class=CachedRoute)
+
+BATCH_LIMIT = 100
+
+patent_cache = EntityCache("patent", PatentAdditionalFields, patent_cache_key)
 
 
 @router.get(
@@ -35,20 +42,11 @@ router = APIRouter()
     response_model=PatentsList,
     status_code=status.HTTP_200_OK
 )
-@cached(
-    ttl=settings.cache_ttl,
-    cache=Cache.MEMORY,
-    key_builder=lambda *args, **kwargs: (
-            f"patents:{kwargs.get('page')}:{kwargs.get('pagesize')}:"
-            f"{kwargs.get('filter_id')}:{kwargs.get('kind')}:{kwargs.get('actual')}"
-    )
-)
+@cached()
 async def list_patents(
         page: int = 1,
         pagesize: int = 10,
-        filter_id: Optional[int] = None,
-        kind: Optional[int] = None,
-        actual: Optional[bool] = None,
+        filters: PatentsQuery = Depends(),
         session: AsyncSession = Depends(get_async_session),
 ):
     """
@@ -58,18 +56,15 @@ async def list_patents(
         session (AsyncSession): асинхронная сессия базы данных.
         page (int): номер страницы для пагинации.
         pagesize (int): количество элементов на странице.
+        filters (PatentsQuery): критерии отбора: вид, актуальность, фильтр по ИНН, диапазоны дат регистрации
+            и подачи заявки, регион, город, код страны, раздел/класс/подкласс МПК и диапазон числа авторов.
 
     Returns:
         List[PatentAdditionalFields]: список патентов с дополнительными полями.
     """
-    logger.debug(
-        f"Fetching patents with page={page}, pagesize={pagesize}, filter_id={filter_id}, kind={kind}, actual={actual}")
+    logger.debug(f"Fetching patents with page={page}, pagesize={pagesize}, {filters}")
     try:
-        if filter_id:
-            patents_with_filter = await patent_crud.get_patents_list_with_filter(session, page, pagesize, filter_id)
-            return patents_with_filter
-
-        patents = await patent_crud.get_patents_list(session, page, pagesize, kind, actual)
+        patents = await patent_crud.get_patents_list(session, page, pagesize, **filters.dict())
 
         return patents
 
@@ -82,11 +77,7 @@ async def list_patents(
     response_model=PatentsStats,
     status_code=status.HTTP_200_OK
 )
-@cached(
-    ttl=settings.cache_ttl,
-    cache=Cache.MEMORY,
-    key_builder=lambda *args, **kwargs: f"patents_stats:{kwargs.get('filter_id')}"
-)
+@cached()
 async def get_patents_stats(
         filter_id: Optional[int] = None,
         session: AsyncSession = Depends(get_async_session)
@@ -158,16 +149,56 @@ async def get_patent(
         patent_reg_number (int): регистрационный номер патента.
         session (AsyncSession): асинхронная сессия базы данных.
 
+    Карточка отдается из кеша patent_cache; отсутствие патента тоже кешируется на короткое время.
+
     Returns:
         PatentAdditionalFields: патент с дополнительными полями.
+
+    Raises:
+        HTTPException(404): Если патент не найден.
     """
+    patent_id = (patent_kind, patent_reg_number)
     try:
-        patent = await patent_crud.get_patent(session, patent_kind, patent_reg_number)
-        return patent
+        bodies = await patent_cache.get_many([patent_id], lambda ids: patent_crud.get_patents(session, ids))
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
+    if bodies[patent_id] is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Патент не найден.")
+    return Response(content=bodies[patent_id], media_type=EntityCache.MEDIA_TYPE)
+
+
+@router.post(
+    '/patents/batch',
+    response_model=List[PatentAdditionalFields],
+    status_code=status.HTTP_200_OK
+)
+async def get_patents_batch(
+        keys: List[PatentKey] = Body(..., max_length=BATCH_LIMIT),
+        session: AsyncSession = Depends(get_async_session)
+) -> List[PatentAdditionalFields]:
+    """
+    Получить несколько патентов по идентификаторам одним запросом.
+
+    Карточки берутся из кеша patent_cache, промахи загружаются из базы одним запросом.
+
+    Args:
+        keys (List[PatentKey]): виды и регистрационные номера патентов, не больше BATCH_LIMIT.
+        session (AsyncSession): асинхронная сессия базы данных.
+
+    Returns:
+        List[PatentAdditionalFields]: найденные патенты в порядке запроса.
+    """
+    patent_ids = [(key.kind, key.reg_number) for key in keys]
+    try:
+        bodies = await patent_cache.get_many(patent_ids, lambda ids: patent_crud.get_patents(session, ids))
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
+    return patent_cache.response(
+        [bodies[patent_id] for patent_id in dict.fromkeys(patent_ids) if bodies[patent_id]]
+    )
+
 
 @router.patch(
     '/patents/{patent_kind}/{patent_reg_number}',
@@ -246,14 +277,17 @@ async def export_patents(
         filter_id: Optional[int] = None,
         actual: Optional[str] = None,
         kind: Optional[int] = None,
-        session: AsyncSession = Depends(get_async_session)
+        export_format: ExportFormat = Query(ExportFormat.XLSX, alias="format"),
 ):
     """
-   Экспортирует данные о патентах в формате XLSX.
+   Экспортирует данные о патентах в формате XLSX, CSV или Parquet.
+
+   Файл формируется и отдается потоково: строки читаются из БД серверным курсором,
+   ограничения на количество строк нет.
 
    Параметры:
    - filter_id (Optional[int]): Идентификатор фильтра. Если указан, будут экспортированы только патенты,
-     связанные с этим фильтром. Если не указан, будут экспортированы первые 10000 патентов.
+     связанные с этим фильтром. Если не указан, будут экспортированы все патенты.
 
      Id фильтров начинаются с 4 и выше
 
@@ -264,16 +298,20 @@ async def export_patents(
    - kind (Optional[int]): Фильтр по виду патента. Если указан, будут экспортированы только патенты
      указанного вида (1 - изобретение, 2 - полезная модель, 3 - промышленный образец).
 
-   - session (AsyncSession): Сессия для взаимодействия с базой данных.
+   - format (ExportFormat): Формат файла: xlsx (по умолчанию), csv или parquet. CSV формируется
+     самим PostgreSQL (COPY TO STDOUT), Parquet записывается группами строк.
 
    Возвращает:
-   - StreamingResponse: Поток данных с XLSX-файлом, содержащим информацию о патентах.
+   - StreamingResponse: Поток данных с файлом, содержащим информацию о патентах.
 
    Исключения:
    - HTTPException(500): Если произошла ошибка при обработке запроса.
 """
     try:
-        return await get_export_patent_file(session, filter_id, actual, kind)
+        return await get_export_patent_file(filter_id, actual, kind, export_format)
+
+    except HTTPException:
+        raise
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
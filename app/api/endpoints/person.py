@@ -1,29 +1,35 @@
-from aiocache import cached, Cache
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Response
 from http import HTTPStatus
 from sqlalchemy.ext.asyncio import AsyncSession
 from starlette import status
-from typing import Optional
+from typing import List, Optional
 
 import logging
 
-from app.api.validators import check_person_exists
-from app.core.config import settings
+from app.api.validators import check_person_exists, validate_suggest_query
+from app.core.cache import CachedRoute, EntityCache, cached
 from app.core.db import get_async_session
+from app.crud.dataset import person_cache_key
 from app.crud.person import person_crud
 from app.models import Person
+from app.schemas.filter import PersonsQuery
 from app.schemas.person import (
     PersonsList,
     PersonsStats,
     PersonAdditionalFields,
     PersonCreate,
     PersonDB,
+    PersonSuggestion,
     PersonUpdate,
 )
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.DEBUG)
 
-router = APIRouter()
+router = APIRouter(route_class=CachedRoute)
+
+BATCH_LIMIT = 100
+
+person_cache = EntityCache("person", PersonAdditionalFields, person_cache_key)
 
 
 @router.get(
@@ -31,20 +37,12 @@ router = APIRouter()
     response_model=PersonsList,
     status_code=HTTPStatus.OK
 )
-@cached(
-    ttl=settings.cache_ttl,
-    cache=Cache.MEMORY,
-    key_builder=lambda *args, **kwargs: (
-            f"persons:{kwargs.get('page')}:{kwargs.get('pagesize')}:"
-            f"{kwargs.get('kind')}:{kwargs.get('active')}:{kwargs.get('category')}")
-)
+@cached(depends_on=("person", "filter"), param_depends_on={"region": ("patent", "ownership")})
 async def list_persons(
         session: AsyncSession = Depends(get_async_session),
         page: int = 1,
         pagesize: int = 10,
-        kind: Optional[int] = None,
-        active: Optional[bool] = None,
-        category: Optional[int] = None
+        filters: PersonsQuery = Depends()
 ) -> PersonsList:
 
     """
@@ -54,14 +52,15 @@ async def list_persons(
         session (AsyncSession): асинхронная сессия базы данных.
         page (int): номер страницы для пагинации. По умолчанию 1.
         pagesize (int): количество элементов на странице. По умолчанию 10.
+        filters (PersonsQuery): критерии отбора: вид, активность, категория, диапазон числа патентов,
+            регион патентов, фильтр по списку ИНН и диапазон даты регистрации.
 
     Returns:
         List[PersonAdditionalFields]: список персон с дополнительными полями.
     """
-    logger.debug(
-        f"Fetching persons with page={page}, pagesize={pagesize}, kind={kind}, active={active}, category={category}")
+    logger.debug(f"Fetching persons with page={page}, pagesize={pagesize}, {filters}")
     try:
-        persons = await person_crud.get_persons_list(session, page, pagesize, kind, active, category)
+        persons = await person_crud.get_persons_list(session, page, pagesize, **filters.dict())
         return persons
 
     except Exception as e:
@@ -73,12 +72,7 @@ async def list_persons(
     response_model=PersonsStats,
     status_code=HTTPStatus.OK
 )
-@cached(
-    ttl=settings.cache_ttl,
-    cache=Cache.MEMORY,
-    key_builder=lambda *args, **kwargs: (
-            f"persons_stats:{kwargs.get('filter_id')}:")
-)
+@cached()
 async def get_persons_stats(
         filter_id: Optional[int] = None,
         session: AsyncSession = Depends(get_async_session)
@@ -105,6 +99,39 @@ async def get_persons_stats(
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
 
+@router.get(
+    "/persons/suggest",
+    response_model=List[PersonSuggestion],
+    status_code=HTTPStatus.OK
+)
+@cached(depends_on=("person",), normalize={"q": person_crud.normalize_name})
+async def suggest_persons(
+        q: str = Depends(validate_suggest_query),
+        limit: int = Query(10, ge=1, le=50),
+        session: AsyncSession = Depends(get_async_session)
+) -> List[PersonSuggestion]:
+    """
+    Подсказки для автодополнения персон по началу ИНН или фрагменту наименования.
+
+    Ответы по одинаковым (после нормализации) запросам кешируются, поэтому популярные
+    префиксы отдаются без обращения к базе. Длина q проверяется после нормализации.
+
+    Args:
+        q (str): Начало ИНН (только цифры) или фрагмент наименования, от 2 до 100 символов;
+            поиск по наименованию начинается с 3 символов.
+        limit (int): Количество подсказок.
+        session (AsyncSession): асинхронная сессия базы данных.
+
+    Returns:
+        List[PersonSuggestion]: персоны, упорядоченные по числу патентов.
+    """
+    try:
+        return await person_crud.suggest(session, q, limit)
+
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+
+
 @router.post(
     "/persons",
     response_model=PersonDB,
@@ -132,6 +159,37 @@ async def create_person(
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
 
+@router.post(
+    "/persons/batch",
+    response_model=List[PersonAdditionalFields],
+    status_code=HTTPStatus.OK
+)
+async def get_persons_batch(
+        tax_numbers: List[str] = Body(..., max_length=BATCH_LIMIT),
+        session: AsyncSession = Depends(get_async_session)
+) -> List[PersonAdditionalFields]:
+    """
+    Получить несколько персон по идентификаторам одним запросом.
+
+    Карточки берутся из кеша person_cache, промахи загружаются из базы одним запросом.
+
+    Args:
+        tax_numbers (List[str]): идентификационные номера персон, не больше BATCH_LIMIT.
+        session (AsyncSession): асинхронная сессия базы данных.
+
+    Returns:
+        List[PersonAdditionalFields]: найденные персоны в порядке запроса.
+    """
+    try:
+        bodies = await person_cache.get_many(tax_numbers, lambda ids: person_crud.get_persons(session, ids))
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+
+    return person_cache.response(
+        [bodies[tax_number] for tax_number in dict.fromkeys(tax_numbers) if bodies[tax_number]]
+    )
+
+
 @router.get(
     "/persons/{person_tax_number}",
     response_model=PersonAdditionalFields,
@@ -148,16 +206,25 @@ async def get_person(
         person_tax_number (str): идентификационный номер персоны.
         session (AsyncSession): асинхронная сессия базы данных.
 
+    Карточка отдается из кеша person_cache; отсутствие персоны тоже кешируется на короткое время.
+
     Returns:
         PersonAdditionalFields: персона с дополнительными полями.
+
+    Raises:
+        HTTPException(404): Если персона не найдена.
     """
     try:
-        person = await person_crud.get_person(session, person_tax_number)
-        return person
-
+        bodies = await person_cache.get_many(
+            [person_tax_number], lambda tax_numbers: person_crud.get_persons(session, tax_numbers)
+        )
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
+    if bodies[person_tax_number] is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Персона не найдена.")
+    return Response(content=bodies[person_tax_number], media_type=EntityCache.MEDIA_TYPE)
+
 
 @router.patch(
     '/persons/{person_tax_number}',
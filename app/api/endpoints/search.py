@@ -0,0 +1,41 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette import status
+
+from app.core.db import get_async_session
+from app.crud.search import search_crud
+from app.schemas.search import SearchResults
+
+router = APIRouter()
+
+
+@router.get("/search", response_model=SearchResults, status_code=status.HTTP_200_OK)
+async def search(
+        q: str = Query(..., min_length=2, max_length=200),
+        limit: int = Query(20, ge=1, le=100),
+        kind: Optional[int] = None,
+        actual: Optional[bool] = None,
+        filter_id: Optional[int] = None,
+        session: AsyncSession = Depends(get_async_session),
+) -> SearchResults:
+    """
+    Полнотекстовый поиск по названиям, правообладателям и авторам патентов и по наименованиям персон.
+
+    Args:
+        q (str): Поисковый запрос; поддерживаются кавычки для фраз, "or" и "-" для исключения слов.
+        limit (int): Количество результатов в каждом списке.
+        kind (Optional[int]): Вид патента.
+        actual (Optional[bool]): Актуальность патента.
+        filter_id (Optional[int]): Идентификатор фильтра по списку ИНН.
+        session (AsyncSession): асинхронная сессия базы данных.
+
+    Returns:
+        SearchResults: найденные патенты и персоны по убыванию релевантности с подсветкой совпадений.
+    """
+    try:
+        return await search_crud.search(session, q, limit, kind, actual, filter_id)
+
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
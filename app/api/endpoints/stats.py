@@ -0,0 +1,42 @@
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette import status
+
+from app.core.cache import CachedRoute, cached
+from app.core.db import get_async_session
+from app.crud.stats import stats_cube_crud
+from app.schemas.stats import CubeDimension, StatsCube, StatsCubeQuery
+
+router = APIRouter(route_class=CachedRoute)
+
+
+@router.get("/stats/cube", response_model=StatsCube, status_code=status.HTTP_200_OK)
+@cached()
+async def get_stats_cube(
+        group_by: List[CubeDimension] = Query([]),
+        filters: StatsCubeQuery = Depends(),
+        session: AsyncSession = Depends(get_async_session),
+) -> StatsCube:
+    """
+    Получить количество патентов в разрезе произвольных измерений из предагрегированного куба.
+
+    Например, ?group_by=region&group_by=reg_year&kind=1&actual=true.
+
+    Args:
+        group_by (List[CubeDimension]): измерения группировки: kind, actual, country_code, region,
+            reg_year, mpk_class, holder_category. Без измерений возвращается одна ячейка с общим количеством.
+            Патент с правообладателями разных категорий учитывается в каждой из них, поэтому при
+            группировке по holder_category сумма ячеек (total) может превышать число патентов.
+        filters (StatsCubeQuery): условия по измерениям, для года - диапазон.
+        session (AsyncSession): асинхронная сессия базы данных.
+
+    Returns:
+        StatsCube: ячейки среза по убыванию количества патентов.
+    """
+    try:
+        return await stats_cube_crud.get_cube(session, group_by, filters)
+
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
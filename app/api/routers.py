@@ -1,8 +1,14 @@
 from fastapi import APIRouter
-from app.api.endpoints import patent_router, person_router, filter_router
+from app.api.endpoints import patent_router, person_router, filter_router, export_router, search_router, ipc_router, stats_router, cache_router, health_router
 
 main_router = APIRouter()
 
 main_router.include_router(patent_router, tags=['Patents'])
 main_router.include_router(person_router, tags=['Persons'])
-main_router.include_router(filter_router, tags=['Filters'])
\ No newline at end of file
+main_router.include_router(filter_router, tags=['Filters'])
+main_router.include_router(export_router, tags=['Exports'])
+main_router.include_router(search_router, tags=['Search'])
+main_router.include_router(ipc_router, tags=['IPC'])
+main_router.include_router(stats_router, tags=['Stats'])
+main_router.include_router(cache_router, tags=['Cache'])
+main_router.include_router(health_router, tags=['Health'])
\ No newline at end of file
@@ -1,9 +1,14 @@
 from http import HTTPStatus
 
-from fastapi import HTTPException
+from fastapi import HTTPException, Query
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.crud.person import person_crud
+
+SUGGEST_QUERY_MIN_LENGTH = 2
+SUGGEST_QUERY_MAX_LENGTH = 100
+
 
 async def check_patent_exists(
         model,
@@ -58,3 +63,31 @@ async def check_person_exists(
         )
     return get_object.scalars().first()
 
+
+
+def validate_suggest_query(
+        q: str = Query(..., description="Начало ИНН или фрагмент наименования")) -> str:
+    """
+    Нормализует строку подсказок и проверяет ее длину.
+
+    Длина проверяется после нормализации, то есть у значения, из которого строится ключ кеша
+    подсказок: запросы с одним ключом либо оба проходят проверку, либо оба получают 422.
+
+    Args:
+        q (str): Строка запроса.
+
+    Raises:
+        HTTPException: Исключение с кодом 422, если после нормализации длина строки меньше
+            SUGGEST_QUERY_MIN_LENGTH или больше SUGGEST_QUERY_MAX_LENGTH символов.
+
+    Returns:
+        str: Нормализованная строка.
+    """
+    normalized = person_crud.normalize_name(q)
+    if not SUGGEST_QUERY_MIN_LENGTH <= len(normalized) <= SUGGEST_QUERY_MAX_LENGTH:
+        raise HTTPException(
+            status_code=HTTPStatus.UNPROCESSABLE_ENTITY,
+            detail=f"Длина q должна быть от {SUGGEST_QUERY_MIN_LENGTH} до {SUGGEST_QUERY_MAX_LENGTH} символов "
+                   f"без учета пробелов по краям."
+        )
+    return normalized
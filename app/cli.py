@@ -10,6 +10,10 @@ import tqdm
 import typer
 from typing_extensions import Annotated
 
+from app.crud.dataset import INVALIDATE_ALL, bump_generations_statement, invalidate_entities_statement
+from app.crud.ipc import ipc_crud
+from app.crud.person import person_crud
+from app.crud.stats import stats_cube_crud
 from app.models import Ownership, Patent, Person
 from app.parsers import OwnershipParser, PatentParser, PersonParser
 
@@ -86,6 +90,10 @@ def _process_file(
             print(f"Error while trying to insert portion #{i} of data to table: {e}")
             error += 1 * commit_every
 
+        session.execute(bump_generations_statement(model_cls.__tablename__))
+        session.execute(invalidate_entities_statement(INVALIDATE_ALL))
+        session.commit()
+
     print("Completed")
     print(f"Inserted {success} records, failed to insert {error} records")
 
@@ -102,6 +110,8 @@ def cli_load_patents(
     ]
 ):
     _process_file(input_file, Patent, PatentParser)
+    _refresh_ipc_tree()
+    _refresh_stats_cube()
 
 
 @app.command("load-persons")
@@ -116,11 +126,66 @@ def cli_load_persons(
     ]
 ):
     _process_file(input_file, Person, PersonParser)
+    _refresh_stats_cube()
+
+
+def _refresh_patent_counts():
+    print("Refreshing persons patent counts")
+
+    with Session(engine) as session:
+        for stmt in person_crud.get_patent_counts_updates():
+            session.execute(stmt, execution_options={"synchronize_session": False})
+        session.execute(bump_generations_statement("person"))
+        session.execute(invalidate_entities_statement(INVALIDATE_ALL))
+        session.commit()
+
+    print("Completed")
+
+
+def _refresh_ipc_tree():
+    print("Refreshing IPC tree")
+
+    with Session(engine) as session:
+        for stmt in ipc_crud.get_refresh_statements():
+            session.execute(stmt, execution_options={"synchronize_session": False})
+        session.execute(bump_generations_statement("patent"))
+        session.commit()
+
+    print("Completed")
+
+
+def _refresh_stats_cube():
+    print("Refreshing stats cube")
+
+    with Session(engine) as session:
+        for stmt in stats_cube_crud.get_refresh_statements():
+            session.execute(stmt, execution_options={"synchronize_session": False})
+        session.execute(bump_generations_statement("patent"))
+        session.commit()
+
+    print("Completed")
 
 
 @app.command("load-ownership")
 def cli_load_ownership(input_file: str):
     _process_file(input_file, Ownership, OwnershipParser, commit_every=1)
+    _refresh_patent_counts()
+    _refresh_stats_cube()
+
+
+@app.command("refresh-patent-counts")
+def cli_refresh_patent_counts():
+    _refresh_patent_counts()
+
+
+@app.command("refresh-ipc-tree")
+def cli_refresh_ipc_tree():
+    _refresh_ipc_tree()
+
+
+@app.command("refresh-stats-cube")
+def cli_refresh_stats_cube():
+    _refresh_stats_cube()
 
 
 if __name__ == "__main__":
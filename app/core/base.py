@@ -1,3 +1,3 @@
 """Импорты класса Base и всех моделей для Alembic."""
 from app.core.db import Base # noqa#
-from app.models import patent, person, ownership, filter # noqa
+from app.models import patent, person, ownership, filter, ipc, stats, generation # noqa
@@ -0,0 +1,807 @@
+import asyncio
+import gzip
+import hashlib
+import logging
+import sqlite3
+import struct
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict, defaultdict
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, List, Optional, Sequence
+from urllib.parse import urlencode, urlparse
+
+from aiocache import Cache
+from aiocache.base import BaseCache
+from aiocache.serializers import BaseSerializer
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+from pydantic import TypeAdapter
+
+from app.core.config import settings
+from app.crud.dataset import DATASET_ENTITIES, INVALIDATE_ALL, generation_tracker
+
+logger = logging.getLogger(__name__)
+
+CACHE_BACKENDS = ("memory", "sqlite", "redis")
+
+
+class BytesSerializer(BaseSerializer):
+    """
+    Передает в кеш и обратно готовые байты без преобразований.
+    """
+    DEFAULT_ENCODING = None
+
+    def dumps(self, value: bytes) -> bytes:
+        return value
+
+    def loads(self, value: Optional[bytes]) -> Optional[bytes]:
+        return value
+
+
+class ResponseEncoder:
+    """
+    Кодирует тело JSON-ответа для кеша и строит из записи Response.
+
+    При включенном settings.cache_compress тела не короче cache_compress_min_bytes хранятся
+    сжатыми gzip. Запись начинается с заголовка HEADER: признак кодирования и время (unix),
+    до которого запись свежая. Сжатое тело отдается как есть клиентам с gzip в Accept-Encoding
+    и распаковывается для остальных; к ETag сжатого ответа добавляется GZIP_ETAG_SUFFIX,
+    так как строгий ETag должен различать кодирование тела.
+    """
+    MEDIA_TYPE = "application/json"
+    IDENTITY = b"j"
+    GZIP = b"z"
+    HEADER = struct.Struct(">cd")
+    GZIP_ETAG_SUFFIX = "-gzip"
+
+    def encode(self, body: bytes, fresh_for: float) -> bytes:
+        fresh_until = time.time() + fresh_for
+        if settings.cache_compress and len(body) >= settings.cache_compress_min_bytes:
+            body = gzip.compress(body, compresslevel=settings.cache_compress_level, mtime=0)
+            return self.HEADER.pack(self.GZIP, fresh_until) + body
+        return self.HEADER.pack(self.IDENTITY, fresh_until) + body
+
+    def is_fresh(self, encoded: bytes) -> bool:
+        return self.HEADER.unpack_from(encoded)[1] > time.time()
+
+    def response(self, encoded: bytes, request: Request, etag: Optional[str] = None) -> Response:
+        headers = {"Vary": "Accept-Encoding"}
+        encoding, _ = self.HEADER.unpack_from(encoded)
+        body = encoded[self.HEADER.size:]
+        if encoding == self.GZIP:
+            if "gzip" in request.headers.get("accept-encoding", ""):
+                headers["Content-Encoding"] = "gzip"
+                if etag is not None:
+                    etag = f'{etag[:-1]}{self.GZIP_ETAG_SUFFIX}"'
+            else:
+                body = gzip.decompress(body)
+        if etag is not None:
+            headers.update({"ETag": etag, "Cache-Control": "no-cache"})
+        return Response(content=body, media_type=self.MEDIA_TYPE, headers=headers)
+
+    def not_modified(self, request: Request, etag: str) -> Optional[Response]:
+        """
+        Возвращает ответ 304, если один из тегов If-None-Match совпадает с etag
+        (без учета W/ и GZIP_ETAG_SUFFIX), иначе None.
+        """
+        for tag in request.headers.get("if-none-match", "").split(","):
+            tag = tag.strip()
+            if tag.removeprefix("W/").replace(self.GZIP_ETAG_SUFFIX, "") == etag:
+                return Response(
+                    status_code=304, headers={"ETag": tag, "Vary": "Accept-Encoding", "Cache-Control": "no-cache"}
+                )
+        return None
+
+
+response_encoder = ResponseEncoder()
+
+
+class CacheMetrics:
+    """
+    Счетчики попаданий, промахов и вытеснений кеша ответов по эндпоинтам в пределах воркера.
+    coalesced - промахи, дождавшиеся результата уже выполнявшегося идентичного запроса;
+    stale - попадания в устаревшие записи, отданные с обновлением в фоне;
+    not_modified - условные запросы, на которые ответ 304 отдан без обращения к кешу.
+    """
+    EVENTS = ("hits", "misses", "evictions", "coalesced", "stale", "not_modified")
+
+    def __init__(self):
+        self._counters = defaultdict(Counter)
+
+    def record(self, endpoint: str, event: str, count: int = 1):
+        self._counters[endpoint][event] += count
+
+    def snapshot(self) -> dict:
+        return {
+            endpoint: {event: counters[event] for event in self.EVENTS}
+            for endpoint, counters in sorted(self._counters.items())
+        }
+
+
+cache_metrics = CacheMetrics()
+
+
+class LRUByteStore:
+    """
+    Хранилище записей в памяти воркера с ограничением суммарного объема.
+
+    Размер записи - длина ключа и сериализованного значения плюс ENTRY_OVERHEAD на служебные
+    структуры. При превышении max_bytes вытесняются записи, которые дольше всего не читались (LRU);
+    запись больше max_bytes не сохраняется.
+
+    Args:
+        max_bytes (int): Предельный объем записей, байты.
+    """
+    ENTRY_OVERHEAD = 200
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.used_bytes = 0
+        self._entries: OrderedDict = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key) -> bool:
+        return self.get(key, touch=False) is not None
+
+    def _size(self, key: str, value) -> int:
+        value_size = len(value) if isinstance(value, (bytes, str)) else sys.getsizeof(value)
+        return len(key) + value_size + self.ENTRY_OVERHEAD
+
+    def get(self, key: str, touch: bool = True):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires, _, _ = entry
+        if expires is not None and expires <= time.monotonic():
+            self.delete(key)
+            return None
+        if touch:
+            self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value, ttl=None, endpoint: str = "") -> bool:
+        self.delete(key)
+        size = self._size(key, value)
+        if size > self.max_bytes:
+            return False
+
+        expires = time.monotonic() + ttl if ttl else None
+        self._entries[key] = (value, expires, size, endpoint)
+        self.used_bytes += size
+        while self.used_bytes > self.max_bytes:
+            _, (_, _, evicted_size, evicted_endpoint) = self._entries.popitem(last=False)
+            self.used_bytes -= evicted_size
+            cache_metrics.record(evicted_endpoint, "evictions")
+        return True
+
+    def expire(self, key: str, ttl) -> bool:
+        entry = self._entries.get(key)
+        if entry is None:
+            return False
+        value, _, size, endpoint = entry
+        self._entries[key] = (value, time.monotonic() + ttl if ttl else None, size, endpoint)
+        return True
+
+    def delete(self, key: str) -> int:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return 0
+        self.used_bytes -= entry[2]
+        return 1
+
+    def clear(self, prefix: Optional[str] = None):
+        keys = [key for key in self._entries if prefix is None or key.startswith(prefix)]
+        for key in keys:
+            self.delete(key)
+
+
+memory_store = LRUByteStore(settings.cache_memory_max_bytes)
+
+
+class BoundedMemoryCache(BaseCache):
+    """
+    Кеш в памяти воркера с общим для всех эндпоинтов бюджетом settings.cache_memory_max_bytes.
+
+    Значения хранятся закодированными байтами, поэтому их размер известен точно; вытеснения учитываются
+    в cache_metrics по эндпоинту, к которому относится вытесненная запись.
+    """
+    NAME = "memory"
+
+    def __init__(self, store: Optional[LRUByteStore] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.store = store or memory_store
+        self.endpoint = (self.namespace or "").rstrip(":")
+
+    async def _get(self, key, encoding="utf-8", _conn=None):
+        return self.store.get(key)
+
+    async def _gets(self, key, encoding="utf-8", _conn=None):
+        return self.store.get(key)
+
+    async def _multi_get(self, keys, encoding="utf-8", _conn=None):
+        return [self.store.get(key) for key in keys]
+
+    async def _set(self, key, value, ttl=None, _cas_token=None, _conn=None):
+        if _cas_token is not None and _cas_token != self.store.get(key, touch=False):
+            return 0
+        return self.store.set(key, value, ttl, self.endpoint)
+
+    async def _multi_set(self, pairs, ttl=None, _conn=None):
+        for key, value in pairs:
+            self.store.set(key, value, ttl, self.endpoint)
+        return True
+
+    async def _add(self, key, value, ttl=None, _conn=None):
+        if key in self.store:
+            raise ValueError("Key {} already exists, use .set to update the value".format(key))
+        return self.store.set(key, value, ttl, self.endpoint)
+
+    async def _exists(self, key, _conn=None):
+        return key in self.store
+
+    async def _increment(self, key, delta, _conn=None):
+        try:
+            value = int(self.store.get(key) or 0) + delta
+        except ValueError:
+            raise TypeError("Value is not an integer") from None
+        self.store.set(key, value, endpoint=self.endpoint)
+        return value
+
+    async def _expire(self, key, ttl, _conn=None):
+        return self.store.expire(key, ttl)
+
+    async def _delete(self, key, _conn=None):
+        return self.store.delete(key)
+
+    async def _clear(self, namespace=None, _conn=None):
+        self.store.clear(namespace)
+        return True
+
+    async def _raw(self, command, *args, encoding="utf-8", _conn=None, **kwargs):
+        return getattr(self.store, command)(*args, **kwargs)
+
+    async def _redlock_release(self, key, value):
+        if self.store.get(key, touch=False) == value:
+            return self.store.delete(key)
+        return 0
+
+
+class SQLiteCache(BaseCache):
+    """
+    Кеш в файле SQLite на локальном диске, общий для всех воркеров узла.
+
+    База открывается в режиме WAL, поэтому чтения воркеров не блокируют друг друга.
+    Запросы выполняются в пуле потоков; просроченные записи не отдаются и периодически удаляются.
+
+    Args:
+        path (str): Путь к файлу базы.
+    """
+    NAME = "sqlite"
+    CLEANUP_EVERY = 1000
+
+    _connections: dict = {}
+    _connections_lock = threading.Lock()
+
+    def __init__(self, path: Optional[str] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path or settings.cache_sqlite_path
+        self._sets = 0
+
+    def _connection(self):
+        with self._connections_lock:
+            if self.path not in self._connections:
+                Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+                connection = sqlite3.connect(self.path, timeout=5, check_same_thread=False, isolation_level=None)
+                connection.execute("PRAGMA journal_mode=WAL")
+                connection.execute("PRAGMA synchronous=NORMAL")
+                connection.execute(
+                    "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value BLOB, expires REAL)"
+                )
+                self._connections[self.path] = (connection, threading.Lock())
+            return self._connections[self.path]
+
+    async def _execute(self, sql: str, parameters=(), many: bool = False):
+        def execute():
+            connection, lock = self._connection()
+            with lock:
+                if many:
+                    return connection.executemany(sql, parameters).rowcount
+                cursor = connection.execute(sql, parameters)
+                return cursor.fetchall() if cursor.description else cursor.rowcount
+
+        return await asyncio.to_thread(execute)
+
+    @staticmethod
+    def _expires(ttl) -> Optional[float]:
+        return time.time() + ttl if ttl else None
+
+    async def _get(self, key, encoding="utf-8", _conn=None):
+        rows = await self._execute(
+            "SELECT value FROM cache WHERE key = ? AND (expires IS NULL OR expires > ?)", (key, time.time())
+        )
+        if not rows:
+            return None
+        value = rows[0][0]
+        return value.decode(encoding) if encoding and isinstance(value, bytes) else value
+
+    async def _gets(self, key, encoding="utf-8", _conn=None):
+        return await self._get(key, encoding=encoding, _conn=_conn)
+
+    async def _multi_get(self, keys, encoding="utf-8", _conn=None):
+        return [await self._get(key, encoding=encoding) for key in keys]
+
+    async def _set(self, key, value, ttl=None, _cas_token=None, _conn=None):
+        if _cas_token is not None and _cas_token != await self._get(key, encoding=None):
+            return 0
+        await self._execute(
+            "INSERT OR REPLACE INTO cache (key, value, expires) VALUES (?, ?, ?)", (key, value, self._expires(ttl))
+        )
+        self._sets += 1
+        if self._sets % self.CLEANUP_EVERY == 0:
+            await self._execute("DELETE FROM cache WHERE expires <= ?", (time.time(),))
+        return True
+
+    async def _multi_set(self, pairs, ttl=None, _conn=None):
+        expires = self._expires(ttl)
+        await self._execute(
+            "INSERT OR REPLACE INTO cache (key, value, expires) VALUES (?, ?, ?)",
+            [(key, value, expires) for key, value in pairs],
+            many=True
+        )
+        return True
+
+    async def _add(self, key, value, ttl=None, _conn=None):
+        added = await self._execute(
+            "INSERT INTO cache (key, value, expires) VALUES (?, ?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET value = excluded.value, expires = excluded.expires "
+            "WHERE cache.expires IS NOT NULL AND cache.expires <= ?",
+            (key, value, self._expires(ttl), time.time())
+        )
+        if not added:
+            raise ValueError("Key {} already exists, use .set to update the value".format(key))
+        return True
+
+    async def _exists(self, key, _conn=None):
+        return await self._get(key, encoding=None) is not None
+
+    async def _increment(self, key, delta, _conn=None):
+        value = await self._get(key)
+        try:
+            value = int(value or 0) + delta
+        except ValueError:
+            raise TypeError("Value is not an integer") from None
+        await self._execute("INSERT OR REPLACE INTO cache (key, value, expires) VALUES (?, ?, NULL)", (key, value))
+        return value
+
+    async def _expire(self, key, ttl, _conn=None):
+        return bool(await self._execute("UPDATE cache SET expires = ? WHERE key = ?", (self._expires(ttl), key)))
+
+    async def _delete(self, key, _conn=None):
+        return await self._execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    async def _clear(self, namespace=None, _conn=None):
+        if namespace:
+            await self._execute("DELETE FROM cache WHERE substr(key, 1, ?) = ?", (len(namespace), namespace))
+        else:
+            await self._execute("DELETE FROM cache")
+        return True
+
+    async def _raw(self, command, *args, encoding="utf-8", _conn=None, **kwargs):
+        return await self._execute(command, args)
+
+    async def _redlock_release(self, key, value):
+        return await self._execute("DELETE FROM cache WHERE key = ? AND value = ?", (key, value))
+
+
+def get_cache_options() -> dict:
+    """
+    Класс и параметры кеша по настройке cache_backend:
+
+    - memory - в памяти процесса с ограничением объема cache_memory_max_bytes (у каждого воркера свой кеш);
+    - sqlite - файл cache_sqlite_path на локальном диске, общий для воркеров узла;
+    - redis - сервер по cache_redis_url (Redis или совместимый) через пакет redis из requirements.txt.
+    """
+    if settings.cache_backend == "memory":
+        return {"cache": BoundedMemoryCache}
+    if settings.cache_backend == "sqlite":
+        return {"cache": SQLiteCache}
+    if settings.cache_backend == "redis":
+        if Cache.REDIS is None:
+            raise RuntimeError("cache_backend 'redis' requires the redis package (pip install redis)")
+        url = urlparse(settings.cache_redis_url)
+        return {
+            "cache": Cache.REDIS,
+            "endpoint": url.hostname or "localhost",
+            "port": url.port or 6379,
+            "db": int(url.path.lstrip("/") or 0),
+            "password": url.password,
+        }
+    raise ValueError(f"Unknown cache_backend {settings.cache_backend!r}, expected one of {CACHE_BACKENDS}")
+
+
+class ResponseCache:
+    """
+    Кеш ответов одного эндпоинта, который обслуживается маршрутом CachedRoute до разрешения зависимостей.
+
+    Ключ - поколения сущностей depends_on (и param_depends_on переданных параметров), путь маршрута
+    и нормализованные параметры запроса: параметры упорядочены по имени (порядок повторяющихся
+    сохраняется), к значениям применены функции normalize. Пустые значения сохраняются в ключе:
+    для части параметров валидация отвечает на них 422, и такой запрос не должен совпадать
+    с запросом без параметра. В кеше хранится готовое тело ответа 200.
+
+    Промахи по одному ключу выполняются один раз (single-flight): одновременные запросы воркера
+    ждут результата первого. Для общих кешей (sqlite, redis) вычисление дополнительно защищено
+    блокировкой в самом кеше, и воркеры, не получившие ее, ждут появления записи
+    до settings.cache_lock_timeout, после чего вычисляют ответ сами.
+
+    Запись свежая в течение soft_ttl и хранится ttl. Устаревшая, но не удаленная запись
+    отдается сразу, а ответ пересчитывается в фоне (stale-while-revalidate); ждать вычисления
+    приходится только после истечения ttl.
+
+    Ответы 200 несут строгий ETag - хеш ключа, то есть версии данных depends_on и параметров запроса.
+    Запрос с совпадающим If-None-Match получает 304 до чтения кеша и вычисления тела.
+    Пока поколения не загружены или потеряно соединение LISTEN (generation_tracker.is_loaded),
+    ключ не отражает версию данных, поэтому кеш и ETag не используются и ответ вычисляется обработчиком.
+
+    Args:
+        endpoint (str): Имя эндпоинта для пространства имен ключей и cache_metrics.
+        ttl (int): Время хранения записи (жесткий TTL), секунды.
+        soft_ttl (int): Время, в течение которого запись свежая (мягкий TTL), секунды.
+        depends_on (Iterable[str]): Сущности, от данных которых зависит ответ.
+        normalize (Dict[str, Callable]): Функции нормализации значений параметров запроса по имени.
+        param_depends_on (Dict[str, Iterable[str]]): Дополнительные сущности, от которых ответ зависит,
+            когда в запросе передан параметр с этим именем.
+    """
+
+    LOCK_POLL_INTERVAL = 0.05
+
+    def __init__(
+            self,
+            endpoint: str,
+            ttl: int,
+            soft_ttl: int,
+            depends_on: Iterable[str] = DATASET_ENTITIES,
+            normalize: Optional[Dict[str, Callable[[str], str]]] = None,
+            param_depends_on: Optional[Dict[str, Iterable[str]]] = None,
+    ):
+        self.endpoint = endpoint
+        self.ttl = ttl
+        self.soft_ttl = min(soft_ttl, ttl)
+        self.depends_on = tuple(depends_on)
+        self.normalize = normalize or {}
+        self.param_depends_on = {name: tuple(entities) for name, entities in (param_depends_on or {}).items()}
+        options = get_cache_options()
+        self.cache = Cache(options.pop("cache"), serializer=BytesSerializer(), namespace=f"{endpoint}:", **options)
+        self.shared = settings.cache_backend != "memory"
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._revalidations: set = set()
+
+    def key(self, request: Request) -> str:
+        params = sorted(
+            ((name, self.normalize.get(name, str)(value))
+             for name, value in request.query_params.multi_items()),
+            key=lambda item: item[0]
+        )
+        generations = generation_tracker.key(self.get_depends_on(request))
+        return f"{generations}:{request.scope['route'].path}?{urlencode(params)}"
+
+    def get_depends_on(self, request: Request) -> tuple:
+        """Сущности, от которых зависит ответ на запрос, с учетом переданных параметров."""
+        entities = list(self.depends_on)
+        for name, extra in self.param_depends_on.items():
+            if name in request.query_params:
+                entities.extend(extra)
+        return tuple(dict.fromkeys(entities))
+
+    def etag(self, key: str) -> str:
+        return f'"{hashlib.sha256(key.encode()).hexdigest()[:32]}"'
+
+    async def get(self, key: str) -> Optional[bytes]:
+        try:
+            encoded = await self.cache.get(key)
+        except Exception:
+            logger.exception(f"Failed to read response cache {key}")
+            encoded = None
+        cache_metrics.record(self.endpoint, "hits" if encoded is not None else "misses")
+        return encoded
+
+    async def set(self, key: str, encoded: bytes):
+        try:
+            await self.cache.set(key, encoded, ttl=self.ttl)
+        except Exception:
+            logger.exception(f"Failed to write response cache {key}")
+
+    async def _lock(self, lock_key: str, token: bytes) -> bool:
+        try:
+            return await self.cache.add(lock_key, token, ttl=settings.cache_lock_timeout)
+        except ValueError:
+            return False
+        except Exception:
+            logger.exception(f"Failed to lock response cache {lock_key}")
+            return True
+
+    async def _unlock(self, lock_key: str, token: bytes):
+        try:
+            await self.cache._redlock_release(self.cache.build_key(lock_key), token)
+        except Exception:
+            logger.exception(f"Failed to unlock response cache {lock_key}")
+
+    async def _compute(self, key: str, request: Request, handler: Callable):
+        """
+        Вызывает обработчик маршрута и кеширует успешный ответ.
+
+        Returns:
+            Закодированное тело для ответа 200, иначе Response обработчика.
+        """
+        lock_key, token = f"{key}:lock", None
+        if self.shared:
+            token = uuid.uuid4().hex.encode()
+            deadline = time.monotonic() + settings.cache_lock_timeout
+            while not await self._lock(lock_key, token):
+                await asyncio.sleep(self.LOCK_POLL_INTERVAL)
+                encoded = await self.cache.get(key)
+                if encoded is not None:
+                    cache_metrics.record(self.endpoint, "coalesced")
+                    return encoded
+                if time.monotonic() >= deadline:
+                    token = None
+                    break
+
+        try:
+            response = await handler(request)
+            if response.status_code != 200 or not isinstance(getattr(response, "body", None), bytes):
+                return response
+            encoded = response_encoder.encode(response.body, self.soft_ttl)
+            await self.set(key, encoded)
+            return encoded
+        finally:
+            if token is not None:
+                await self._unlock(lock_key, token)
+
+    async def _lead(self, key: str, request: Request, handler: Callable):
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await self._compute(key, request, handler)
+            future.set_result(result)
+            return result
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()
+            raise
+        finally:
+            # Запрос-лидер отменен: ожидающие повторяют попытку сами.
+            if not future.done():
+                future.set_result(None)
+            del self._inflight[key]
+
+    async def _revalidate(self, key: str, request: Request, handler: Callable):
+        try:
+            await self._lead(key, request, handler)
+        except Exception:
+            logger.exception(f"Failed to revalidate response cache {key}")
+
+    async def serve(self, request: Request, handler: Callable) -> Response:
+        """
+        Отдает ответ из кеша или вызывает обработчик маршрута и кеширует его успешный ответ.
+        """
+        if not generation_tracker.is_loaded:
+            return await handler(request)
+
+        key = self.key(request)
+        etag = self.etag(key)
+        not_modified = response_encoder.not_modified(request, etag)
+        if not_modified is not None:
+            cache_metrics.record(self.endpoint, "not_modified")
+            return not_modified
+
+        encoded = await self.get(key)
+        if encoded is not None:
+            if not response_encoder.is_fresh(encoded):
+                cache_metrics.record(self.endpoint, "stale")
+                if key not in self._inflight:
+                    task = asyncio.create_task(self._revalidate(key, request, handler))
+                    self._revalidations.add(task)
+                    task.add_done_callback(self._revalidations.discard)
+            return response_encoder.response(encoded, request, etag)
+
+        while key in self._inflight:
+            result = await asyncio.shield(self._inflight[key])
+            if result is not None:
+                cache_metrics.record(self.endpoint, "coalesced")
+                return result if isinstance(result, Response) else response_encoder.response(result, request, etag)
+
+        result = await self._lead(key, request, handler)
+        return result if isinstance(result, Response) else response_encoder.response(result, request, etag)
+
+
+class CachedRoute(APIRoute):
+    """
+    Маршрут, который отдает попадания кеша эндпоинтов, помеченных декоратором cached,
+    до разрешения зависимостей: сессия БД и проверка параметров нужны только при промахе.
+    """
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+        response_cache: Optional[ResponseCache] = getattr(self.endpoint, "response_cache", None)
+        if response_cache is None:
+            return handler
+
+        async def cached_handler(request: Request) -> Response:
+            return await response_cache.serve(request, handler)
+
+        return cached_handler
+
+
+def cached(
+        ttl: Optional[int] = None,
+        soft_ttl: Optional[int] = None,
+        depends_on: Iterable[str] = DATASET_ENTITIES,
+        normalize: Optional[Dict[str, Callable[[str], str]]] = None,
+        param_depends_on: Optional[Dict[str, Iterable[str]]] = None,
+):
+    """
+    Помечает эндпоинт для кеширования ответа маршрутом CachedRoute (route_class роутера).
+
+    Ключ строится по пути и параметрам запроса и начинается с текущих поколений сущностей depends_on,
+    поэтому после записи в них (в любом воркере или загрузчиком CLI) старые записи больше не читаются
+    и доживают до конца ttl. Эндпоинт вызывается как обычно только при промахе.
+
+    Args:
+        ttl (Optional[int]): Время хранения записи, по умолчанию settings.cache_ttl.
+        soft_ttl (Optional[int]): Время, после которого запись отдается с пересчетом в фоне,
+            по умолчанию settings.cache_soft_ttl.
+        depends_on (Iterable[str]): Сущности, от данных которых зависит ответ; по умолчанию все.
+        normalize (Optional[Dict[str, Callable]]): Функции нормализации значений параметров запроса.
+        param_depends_on (Optional[Dict[str, Iterable[str]]]): Сущности, которые добавляются к depends_on,
+            если в запросе передан параметр с этим именем (например, условие по данным патентов).
+    """
+    def decorator(endpoint):
+        endpoint.response_cache = ResponseCache(
+            endpoint.__name__,
+            ttl or settings.cache_ttl,
+            soft_ttl or settings.cache_soft_ttl,
+            depends_on,
+            normalize,
+            param_depends_on
+        )
+        return endpoint
+
+    return decorator
+
+
+class EntityCache:
+    """
+    Read-through кеш карточек сущностей (JSON по модели ответа) с пакетным чтением.
+
+    Отсутствующие в БД сущности кешируются как NEGATIVE на negative_ttl. Записи удаляются по ключам,
+    которые CRUD рассылает через INVALIDATION_CHANNEL при фиксации записи (в пишущем воркере - сразу
+    после фиксации). Пока удаление ключа не завершено, его запись не читается.
+
+    Загрузка промахов помечается поколением инвалидаций кеша на момент ее начала; если до сохранения
+    пришла хотя бы одна инвалидация этой сущности, значения не сохраняются, чтобы не закешировать
+    данные, прочитанные до фиксации. Пока поколения не загружены (generation_tracker.is_loaded)
+    и инвалидации могут теряться, кеш не используется.
+
+    Args:
+        entity (str): Имя сущности, префикс ключей (patent, person).
+        response_model: Модель карточки.
+        key (Callable): Построение ключа карточки по идентификатору (patent_cache_key, person_cache_key).
+        ttl (Optional[int]): Время жизни карточки, по умолчанию settings.cache_entity_ttl.
+        negative_ttl (Optional[int]): Время жизни отметки об отсутствии, по умолчанию settings.cache_negative_ttl.
+    """
+    NEGATIVE = b"\x00"
+    MEDIA_TYPE = "application/json"
+
+    def __init__(
+            self,
+            entity: str,
+            response_model: Any,
+            key: Callable[..., str],
+            ttl: Optional[int] = None,
+            negative_ttl: Optional[int] = None,
+    ):
+        self.entity = entity
+        self.endpoint = f"{entity}_entity"
+        self.key = key
+        self.ttl = ttl or settings.cache_entity_ttl
+        self.negative_ttl = negative_ttl or settings.cache_negative_ttl
+        self._adapter = TypeAdapter(response_model)
+        options = get_cache_options()
+        self.cache = Cache(options.pop("cache"), serializer=BytesSerializer(), namespace=f"{self.endpoint}:", **options)
+        self.generation = 0
+        self._deleting: Counter = Counter()
+        self._tasks: set = set()
+        generation_tracker.on_invalidate(self._on_invalidate)
+
+    def _on_invalidate(self, key: str):
+        if key != INVALIDATE_ALL and not key.startswith(f"{self.entity}:"):
+            return
+        self.generation += 1
+        if key == INVALIDATE_ALL:
+            operation = self.cache.clear(namespace=self.cache.namespace)
+        else:
+            operation = self.cache.delete(key)
+        self._deleting[key] += 1
+        task = asyncio.ensure_future(operation)
+        self._tasks.add(task)
+        task.add_done_callback(lambda _: self._deleted(key))
+        task.add_done_callback(self._tasks.discard)
+
+    def _deleted(self, key: str):
+        self._deleting[key] -= 1
+        if self._deleting[key] <= 0:
+            del self._deleting[key]
+
+    def _is_deleting(self, key: str) -> bool:
+        return INVALIDATE_ALL in self._deleting or key in self._deleting
+
+    def encode(self, value) -> bytes:
+        return self._adapter.dump_json(self._adapter.validate_python(value, from_attributes=True))
+
+    async def get_many(
+            self,
+            ids: Sequence[Hashable],
+            load: Callable[[List[Hashable]], Awaitable[Dict[Hashable, Any]]],
+    ) -> Dict[Hashable, Optional[bytes]]:
+        """
+        Возвращает JSON карточек по идентификаторам; отсутствующие сущности - None.
+
+        Args:
+            ids (Sequence[Hashable]): Идентификаторы сущностей.
+            load (Callable): Загрузка промахов одним запросом: список идентификаторов ->
+                словарь найденных значений по идентификатору.
+        """
+        keys = {
+            entity_id: self.key(*entity_id) if isinstance(entity_id, tuple) else self.key(entity_id)
+            for entity_id in ids
+        }
+        use_cache = generation_tracker.is_loaded
+        values = [None] * len(keys)
+        if use_cache:
+            try:
+                values = await self.cache.multi_get(list(keys.values()))
+            except Exception:
+                logger.exception(f"Failed to read {self.entity} cache")
+
+        bodies, missing = {}, []
+        for entity_id, value in zip(keys, values):
+            if value is None or self._is_deleting(keys[entity_id]):
+                missing.append(entity_id)
+            else:
+                bodies[entity_id] = None if value == self.NEGATIVE else value
+        cache_metrics.record(self.endpoint, "hits", len(bodies))
+        cache_metrics.record(self.endpoint, "misses", len(missing))
+        if not missing:
+            return bodies
+
+        generation = self.generation
+        loaded = await load(missing)
+        found, absent = [], []
+        for entity_id in missing:
+            if entity_id in loaded:
+                bodies[entity_id] = self.encode(loaded[entity_id])
+                found.append((keys[entity_id], bodies[entity_id]))
+            else:
+                bodies[entity_id] = None
+                absent.append((keys[entity_id], self.NEGATIVE))
+
+        if use_cache and generation == self.generation:
+            try:
+                if found:
+                    await self.cache.multi_set(found, ttl=self.ttl)
+                if absent:
+                    await self.cache.multi_set(absent, ttl=self.negative_ttl)
+            except Exception:
+                logger.exception(f"Failed to write {self.entity} cache")
+        return bodies
+
+    def response(self, bodies: Sequence[bytes]) -> Response:
+        """Ответ со списком карточек, собранный из готового JSON без повторной сериализации."""
+        return Response(content=b"[" + b",".join(bodies) + b"]", media_type=self.MEDIA_TYPE)
+
@@ -1,3 +1,5 @@
+from typing import List
+
 from dotenv import load_dotenv
 from pydantic_settings import BaseSettings
 
@@ -7,8 +9,33 @@ load_dotenv()
 class Settings(BaseSettings):
     app_title: str = 'Сервис анализа патентной активности компаний.'
     cache_ttl: int = 81600
+    cache_soft_ttl: int = 3600
+    cache_entity_ttl: int = 3600
+    cache_negative_ttl: int = 60
+    cache_backend: str = 'memory'
+    cache_memory_max_bytes: int = 256 * 1024 ** 2
+    cache_compress: bool = True
+    cache_compress_min_bytes: int = 1024
+    cache_compress_level: int = 6
+    cache_sqlite_path: str = 'cache/responses.sqlite3'
+    cache_redis_url: str = 'redis://localhost:6379/0'
+    cache_generation_reload_interval: float = 30.0
+    cache_lock_timeout: float = 30.0
     database_url: str
     database_cli_url: str
+    export_dir: str = 'exports'
+    export_cache_max_bytes: int = 10 * 1024 ** 3
+    export_cache_max_age: int = 7 * 24 * 3600
+    export_job_stale_after: int = 600
+    analytics_snapshot: bool = False
+    analytics_check_interval: float = 5.0
+    warmup_enabled: bool = True
+    warmup_pages: int = 3
+    warmup_pagesize: int = 10
+    warmup_filter_ids: List[int] = []
+    warmup_recent_filters: int = 3
+    warmup_concurrency: int = 4
+    warmup_timeout: float = 300.0
 
     class Config:
         env_file = '.env'
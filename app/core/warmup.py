@@ -0,0 +1,98 @@
+import asyncio
+import logging
+import time
+from typing import List, Optional, Tuple
+
+import httpx
+from fastapi import FastAPI
+
+from app.core.config import settings
+from app.core.db import AsyncSessionLocal
+from app.crud.dataset import generation_tracker
+from app.crud.filter import filter_crud
+
+logger = logging.getLogger(__name__)
+
+
+class CacheWarmer:
+    """
+    Прогрев кеша ответов при старте воркера.
+
+    Статистика патентов и персон и первые settings.warmup_pages страниц списков запрашиваются
+    без фильтра и с фильтрами warmup_filter_ids и warmup_recent_filters последних созданных.
+    Запросы идут в само приложение через httpx.ASGITransport, поэтому кеш заполняется тем же путем,
+    что и при обычных запросах (CachedRoute, single-flight), с не более чем warmup_concurrency
+    запросами одновременно. Прогрев начинается после загрузки поколений данных, от которых зависят ключи.
+
+    Пока прогрев не закончен (или не прерван по warmup_timeout), ready равен False.
+    """
+
+    def __init__(self):
+        self.ready = False
+        self._task: Optional[asyncio.Task] = None
+
+    async def get_targets(self) -> List[Tuple[str, dict]]:
+        filter_ids = list(settings.warmup_filter_ids)
+        if settings.warmup_recent_filters:
+            async with AsyncSessionLocal() as session:
+                filter_ids += await filter_crud.get_recent_filter_ids(session, settings.warmup_recent_filters)
+
+        targets = [("/patents", {}), ("/persons", {})]
+        for filter_id in [None, *dict.fromkeys(filter_ids)]:
+            params = {"filter_id": filter_id} if filter_id else {}
+            targets += [("/patents/stats", params), ("/persons/stats", params)]
+            for page in range(1, settings.warmup_pages + 1):
+                page_params = {**params, "page": page, "pagesize": settings.warmup_pagesize}
+                targets += [("/patents", page_params), ("/persons", page_params)]
+        return targets
+
+    async def _warm(self, app: FastAPI) -> int:
+        if generation_tracker.loaded is not None:
+            await generation_tracker.loaded.wait()
+
+        targets = await self.get_targets()
+        semaphore = asyncio.Semaphore(settings.warmup_concurrency)
+        transport = httpx.ASGITransport(app=app)
+
+        async with httpx.AsyncClient(transport=transport, base_url="http://warmup") as client:
+            async def fetch(path: str, params: dict):
+                async with semaphore:
+                    response = await client.get(path, params=params)
+                    if response.status_code != 200:
+                        logger.warning(f"Cache warm-up of {path} {params} returned {response.status_code}")
+
+            await asyncio.gather(*(fetch(path, params) for path, params in targets))
+        return len(targets)
+
+    async def run(self, app: FastAPI):
+        started = time.monotonic()
+        try:
+            count = await asyncio.wait_for(self._warm(app), settings.warmup_timeout)
+            logger.info(f"Cache warm-up of {count} requests finished in {time.monotonic() - started:.1f}s")
+        except asyncio.TimeoutError:
+            logger.warning(f"Cache warm-up did not finish in {settings.warmup_timeout}s")
+        except Exception:
+            logger.exception("Cache warm-up failed")
+        finally:
+            self.ready = True
+
+    def start(self, app: FastAPI):
+        """Запускает прогрев в фоне; при выключенном warmup_enabled воркер сразу готов."""
+        if not settings.warmup_enabled:
+            self.ready = True
+            return
+        self.ready = False
+        self._task = asyncio.create_task(self.run(app))
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+
+cache_warmer = CacheWarmer()
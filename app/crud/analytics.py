@@ -0,0 +1,311 @@
+import asyncio
+import io
+import logging
+import time
+from collections import OrderedDict
+from datetime import date
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.db import AsyncSessionLocal
+from app.crud.dataset import PATENT_DATA_ENTITIES, generation_tracker, get_dataset_version
+from app.models.filter import FilterTaxNumber
+
+logger = logging.getLogger(__name__)
+
+PATENTS_QUERY = (
+    "SELECT kind, reg_number, actual, country_code, region, author_count, reg_date "
+    "FROM patent ORDER BY kind, reg_number"
+)
+# Порядок "C" (по байтам UTF-8) совпадает с порядком строк NumPy, на котором основан поиск np.searchsorted.
+PERSONS_QUERY = 'SELECT tax_number, kind, category FROM person ORDER BY tax_number COLLATE "C"'
+OWNERSHIPS_QUERY = "SELECT patent_kind, patent_reg_number, person_tax_number FROM ownership"
+
+EPOCH = np.datetime64("1970-01-01", "D")
+NO_DATE = np.iinfo(np.int32).min
+AUTHOR_COUNT_GROUPS = ("0", "1", "2–5", "5+")
+FILTER_MASKS_LIMIT = 32
+
+
+def patent_keys(kind: np.ndarray, reg_number: np.ndarray) -> np.ndarray:
+    return (kind.astype(np.int64) << 32) | reg_number.astype(np.int64)
+
+
+def _categorical(series: pd.Series):
+    categorical = pd.Categorical(series)
+    return categorical.codes.astype(np.int16), [None] + list(categorical.categories)
+
+
+class AnalyticsSnapshot():
+    """
+    Колоночный снимок патентов, персон и владений в массивах NumPy для расчета статистики в памяти.
+
+    Патенты и персоны хранятся отсортированными по ключу (вид и номер патента, ИНН), владения - парами
+    индексов патента и персоны. Строковые измерения закодированы номерами категорий; код 0 означает
+    пустое значение. Условия превращаются в булевы маски, статистика считается векторными операциями.
+
+    Args:
+        version (str): Версия набора данных, для которой построен снимок.
+        patents (pd.DataFrame): Результат PATENTS_QUERY.
+        persons (pd.DataFrame): Результат PERSONS_QUERY.
+        ownerships (pd.DataFrame): Результат OWNERSHIPS_QUERY.
+    """
+
+    def __init__(self, version: str, patents: pd.DataFrame, persons: pd.DataFrame, ownerships: pd.DataFrame):
+        self.version = version
+
+        self.patent_kind = patents["kind"].to_numpy(np.int8)
+        self.patent_key = patent_keys(self.patent_kind, patents["reg_number"].to_numpy(np.int64))
+        self.patent_actual = patents["actual"].fillna(False).to_numpy(bool)
+        self.patent_is_ru = (patents["country_code"] == "RU").to_numpy(bool)
+        self.patent_country, self.countries = _categorical(patents["country_code"])
+        self.patent_region, self.regions = _categorical(patents["region"])
+        self.patent_region += 1
+        self.patent_country += 1
+        author_count = patents["author_count"].to_numpy(np.float64)
+        # Как в SQL-версии: пустое число авторов попадает в группу "5+".
+        self.patent_author_group = np.select(
+            [author_count == 0, author_count == 1, author_count <= 5], [0, 1, 2], 3
+        ).astype(np.int8)
+        reg_date = pd.to_datetime(patents["reg_date"], errors="coerce").to_numpy("datetime64[D]")
+        self.patent_reg_date = np.where(
+            np.isnat(reg_date), NO_DATE, (reg_date - EPOCH).astype(np.int64)
+        ).astype(np.int32)
+
+        self.person_tax_number = persons["tax_number"].to_numpy(str)
+        self.person_kind = persons["kind"].to_numpy(np.int8)
+        self.person_category, self.categories = _categorical(persons["category"])
+        self.person_category += 1
+
+        own_keys = patent_keys(
+            ownerships["patent_kind"].to_numpy(np.int64), ownerships["patent_reg_number"].to_numpy(np.int64)
+        )
+        own_tax_numbers = ownerships["person_tax_number"].to_numpy(str)
+        own_patent = np.searchsorted(self.patent_key, own_keys)
+        own_person = np.searchsorted(self.person_tax_number, own_tax_numbers)
+        found = (
+            self._found(own_patent, self.patent_key, own_keys)
+            & self._found(own_person, self.person_tax_number, own_tax_numbers)
+        )
+        self.own_patent = own_patent[found].astype(np.int32)
+        self.own_person = own_person[found].astype(np.int32)
+        self.patent_has_holder = np.bincount(self.own_patent, minlength=len(self.patent_key)) > 0
+
+        self._filter_masks: OrderedDict = OrderedDict()
+        self._filter_version: Optional[str] = None
+
+    def set_filter_version(self, filter_version: Optional[str]):
+        """
+        Сбрасывает маски фильтров, если с их чтения фильтры изменились (например, фильтр удален).
+
+        Args:
+            filter_version (Optional[str]): Текущее поколение фильтров.
+        """
+        if filter_version != self._filter_version:
+            self._filter_masks.clear()
+            self._filter_version = filter_version
+
+    @staticmethod
+    def _found(positions: np.ndarray, sorted_values: np.ndarray, values: np.ndarray) -> np.ndarray:
+        in_range = positions < len(sorted_values)
+        found = np.zeros(len(values), dtype=bool)
+        found[in_range] = sorted_values[positions[in_range]] == values[in_range]
+        return found
+
+    def persons_mask_for_tax_numbers(self, tax_numbers) -> np.ndarray:
+        values = np.asarray(tax_numbers, dtype=str)
+        positions = np.searchsorted(self.person_tax_number, values)
+        mask = np.zeros(len(self.person_tax_number), dtype=bool)
+        mask[positions[self._found(positions, self.person_tax_number, values)]] = True
+        return mask
+
+    async def get_filter_mask(self, session: AsyncSession, filter_id: int) -> np.ndarray:
+        """
+        Маска персон фильтра. Список ИНН читается из БД один раз для версии снимка.
+
+        Args:
+            session (AsyncSession): Асинхронная сессия базы данных.
+            filter_id (int): Идентификатор фильтра по списку ИНН.
+        """
+        mask = self._filter_masks.get(filter_id)
+        if mask is None:
+            result = await session.execute(
+                select(FilterTaxNumber.tax_number).where(FilterTaxNumber.filter_id == filter_id)
+            )
+            mask = self.persons_mask_for_tax_numbers(result.scalars().all())
+            self._filter_masks[filter_id] = mask
+            while len(self._filter_masks) > FILTER_MASKS_LIMIT:
+                self._filter_masks.popitem(last=False)
+        self._filter_masks.move_to_end(filter_id)
+        return mask
+
+    def patents_mask(
+            self,
+            persons_mask: Optional[np.ndarray] = None,
+            kind: Optional[int] = None,
+            actual: Optional[bool] = None,
+            country_code: Optional[str] = None,
+            region: Optional[str] = None,
+            reg_date_from: Optional[date] = None,
+            reg_date_to: Optional[date] = None,
+    ) -> np.ndarray:
+        """
+        Маска патентов по условиям; persons_mask оставляет патенты хотя бы одного из отмеченных правообладателей.
+        """
+        mask = np.ones(len(self.patent_key), dtype=bool)
+        if persons_mask is not None:
+            mask[:] = False
+            mask[self.own_patent[persons_mask[self.own_person]]] = True
+        if kind is not None:
+            mask &= self.patent_kind == kind
+        if actual is not None:
+            mask &= self.patent_actual == actual
+        if country_code is not None:
+            mask &= self.patent_country == self._code(self.countries, country_code)
+        if region is not None:
+            mask &= self.patent_region == self._code(self.regions, region)
+        if reg_date_from is not None:
+            mask &= self.patent_reg_date >= (np.datetime64(reg_date_from, "D") - EPOCH).astype(np.int64)
+        if reg_date_to is not None:
+            mask &= (self.patent_reg_date <= (np.datetime64(reg_date_to, "D") - EPOCH).astype(np.int64)) \
+                    & (self.patent_reg_date != NO_DATE)
+        return mask
+
+    @staticmethod
+    def _code(labels: list, value: str) -> int:
+        return labels.index(value) if value in labels else -1
+
+    @staticmethod
+    def _counts(values: np.ndarray, labels) -> dict:
+        counts = np.bincount(values, minlength=len(labels))
+        return {labels[index]: int(count) for index, count in enumerate(counts) if count}
+
+    async def get_patents_stats(self, session: AsyncSession, filter_id: Optional[int] = None) -> dict:
+        """
+        Статистика по патентам в формате PatentsStats.
+
+        Args:
+            session (AsyncSession): Асинхронная сессия базы данных (только для чтения списка ИНН фильтра).
+            filter_id (Optional[int]): опциональный идентификатор загруженного фильтра по списку ИНН.
+        """
+        persons_mask = await self.get_filter_mask(session, filter_id) if filter_id is not None else None
+        mask = self.patents_mask(persons_mask)
+        with_holders = mask & self.patent_has_holder
+
+        stats = {
+            "total_patents": int(mask.sum()),
+            "total_ru_patents": int((mask & self.patent_is_ru).sum()),
+            "total_with_holders": int(with_holders.sum()),
+            "total_ru_with_holders": int((with_holders & self.patent_is_ru).sum()),
+        }
+        stats["with_holders_percent"] = int(round(
+            100 * stats["total_with_holders"] / stats["total_patents"])) if stats["total_patents"] else 0
+        stats["ru_with_holders_percent"] = int(round(
+            100 * stats["total_ru_with_holders"] / stats["total_ru_patents"])) if stats["total_ru_patents"] else 0
+        stats["by_author_count"] = self._counts(self.patent_author_group[mask], AUTHOR_COUNT_GROUPS)
+        stats["by_patent_kind"] = {
+            int(kind): int(count)
+            for kind, count in enumerate(np.bincount(self.patent_kind[mask], minlength=4)) if count
+        }
+        return stats
+
+    async def get_persons_stats(self, session: AsyncSession, filter_id: Optional[int] = None) -> dict:
+        """
+        Статистика по персонам в формате PersonsStats.
+
+        Args:
+            session (AsyncSession): Асинхронная сессия базы данных (только для чтения списка ИНН фильтра).
+            filter_id (Optional[int]): опциональный идентификатор загруженного фильтра по списку ИНН.
+        """
+        if filter_id is not None:
+            mask = await self.get_filter_mask(session, filter_id)
+        else:
+            mask = np.ones(len(self.person_tax_number), dtype=bool)
+
+        kinds = self.person_kind[mask]
+        return {
+            "total_persons": int(mask.sum()),
+            "by_kind": {
+                int(kind): int(count) for kind, count in enumerate(np.bincount(kinds, minlength=4)) if count
+            },
+            "by_category": self._counts(self.person_category[mask], self.categories),
+        }
+
+
+class AnalyticsEngine():
+    """
+    Держит актуальный AnalyticsSnapshot, если он включен настройкой analytics_snapshot.
+
+    Версия данных - поколения PATENT_DATA_ENTITIES из generation_tracker, как в ключах кеша ответов,
+    поэтому после записи снимок прежней версии не используется. Фильтры в версию не входят:
+    изменение фильтров не пересобирает снимок, а только сбрасывает его маски фильтров.
+    Пока поколения не загружены, версия читается из БД не чаще раза в analytics_check_interval секунд.
+    При смене версии снимок перестраивается в фоне, а до его готовности get_snapshot возвращает None и статистика
+    считается запросами к БД.
+    """
+
+    def __init__(self, enabled: bool, check_interval: float):
+        self.enabled = enabled
+        self.check_interval = check_interval
+        self._snapshot: Optional[AnalyticsSnapshot] = None
+        self._version: Optional[str] = None
+        self._filter_version: Optional[str] = None
+        self._checked_at = 0.0
+        self._loading: Optional[asyncio.Task] = None
+
+    async def get_snapshot(self, session: AsyncSession) -> Optional[AnalyticsSnapshot]:
+        """
+        Возвращает снимок для текущей версии данных или None, если он выключен или еще строится.
+
+        Args:
+            session (AsyncSession): Асинхронная сессия базы данных.
+        """
+        if not self.enabled:
+            return None
+
+        now = time.monotonic()
+        if generation_tracker.is_loaded:
+            self._version = generation_tracker.key(PATENT_DATA_ENTITIES)
+            self._filter_version = generation_tracker.key(("filter",))
+        elif self._version is None or now - self._checked_at >= self.check_interval:
+            self._checked_at = now
+            self._version = await get_dataset_version(session, PATENT_DATA_ENTITIES)
+            self._filter_version = await get_dataset_version(session, ("filter",))
+
+        if self._snapshot is not None and self._snapshot.version == self._version:
+            self._snapshot.set_filter_version(self._filter_version)
+            return self._snapshot
+
+        if self._loading is None or self._loading.done():
+            self._loading = asyncio.create_task(self._load(self._version))
+        return None
+
+    @staticmethod
+    async def _read_frame(session: AsyncSession, query: str, dtype: dict) -> pd.DataFrame:
+        connection = await session.connection()
+        raw_connection = await connection.get_raw_connection()
+        buffer = io.BytesIO()
+        await raw_connection.driver_connection.copy_from_query(query, output=buffer, format="csv", header=True)
+        buffer.seek(0)
+        return await run_in_threadpool(pd.read_csv, buffer, dtype=dtype, true_values=["t"], false_values=["f"])
+
+    async def _load(self, version: str):
+        started = time.monotonic()
+        try:
+            async with AsyncSessionLocal() as session:
+                patents = await self._read_frame(session, PATENTS_QUERY, {"country_code": str, "region": str})
+                persons = await self._read_frame(session, PERSONS_QUERY, {"tax_number": str, "category": str})
+                ownerships = await self._read_frame(session, OWNERSHIPS_QUERY, {"person_tax_number": str})
+            self._snapshot = await run_in_threadpool(AnalyticsSnapshot, version, patents, persons, ownerships)
+            logger.info(f"Analytics snapshot {version} loaded in {time.monotonic() - started:.1f}s")
+        except Exception:
+            logger.exception("Failed to load analytics snapshot")
+
+
+analytics_engine = AnalyticsEngine(settings.analytics_snapshot, settings.analytics_check_interval)
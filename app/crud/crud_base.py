@@ -1,11 +1,17 @@
+from typing import List
+
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from fastapi.encoders import jsonable_encoder
 
+from app.crud.dataset import bump_generations, invalidate_entities
+
 
 class CRUDBase:
     """
     Базовый класс для CRUD (Create, Read, Update, Delete) операций с объектами базы данных.
+    Операции записи увеличивают поколение таблицы модели для инвалидации кеша ответов
+    и рассылают инвалидацию карточек из get_cache_keys.
     :param model: SQLAlchemy модель, с которой будет выполняться CRUD.
     """
 
@@ -20,27 +26,38 @@ class CRUDBase:
         db_obj = await session.execute(select(self.model).where(self.model.id == obj_id))
         return db_obj.scalars().first()
 
+    async def get_cache_keys(self, session: AsyncSession, db_obj) -> List[str]:
+        """Ключи кеша карточек, которые устаревают при записи объекта."""
+        return []
+
     async def create_object(self, obj_in, session: AsyncSession):
         obj_in_data = obj_in.dict()
         db_obj = self.model(**obj_in_data)
         session.add(db_obj)
+        await bump_generations(session, self.model.__tablename__)
+        await invalidate_entities(session, *await self.get_cache_keys(session, db_obj))
         await session.commit()
         await session.refresh(db_obj)
         return db_obj
 
     async def update_object(self, db_obj, obj_in, session: AsyncSession):
+        cache_keys = await self.get_cache_keys(session, db_obj)
         obj_data = jsonable_encoder(db_obj)
         update_data = obj_in.dict(exclude_unset=True)
         for field in obj_data:
             if field in update_data:
                 setattr(db_obj, field, update_data[field])
         session.add(db_obj)
+        await bump_generations(session, self.model.__tablename__)
+        await invalidate_entities(session, *cache_keys, *await self.get_cache_keys(session, db_obj))
         await session.commit()
         await session.refresh(db_obj)
         return db_obj
 
     async def delete_object(self, db_obj, session: AsyncSession):
+        await invalidate_entities(session, *await self.get_cache_keys(session, db_obj))
         await session.delete(db_obj)
+        await bump_generations(session, self.model.__tablename__)
         await session.commit()
         return db_obj
 
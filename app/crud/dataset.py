@@ -0,0 +1,236 @@
+import asyncio
+import logging
+from typing import Callable, Dict, Iterable, List, Optional
+
+import asyncpg
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.elements import TextClause
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+DATASET_ENTITIES = ("patent", "person", "ownership", "filter")
+# Сущности патентных данных без пользовательских фильтров.
+PATENT_DATA_ENTITIES = ("patent", "person", "ownership")
+GENERATION_CHANNEL = "dataset_generation"
+INVALIDATION_CHANNEL = "entity_invalidation"
+INVALIDATE_ALL = "*"
+PENDING_GENERATIONS = "pending_generations"
+PENDING_INVALIDATIONS = "pending_invalidations"
+
+BUMP_GENERATIONS_SQL = f"""
+    WITH bumped AS (
+        INSERT INTO datasetgeneration (entity, generation)
+        SELECT unnest(CAST(:entities AS text[])), 1
+        ON CONFLICT (entity) DO UPDATE SET generation = datasetgeneration.generation + 1
+        RETURNING entity, generation
+    )
+    SELECT entity, generation, pg_notify('{GENERATION_CHANNEL}', entity || ':' || generation) FROM bumped
+"""
+
+
+def bump_generations_statement(*entities: str) -> TextClause:
+    """
+    Команда увеличения поколений сущностей с рассылкой NOTIFY.
+
+    Уведомления доставляются слушателям только после фиксации транзакции, поэтому
+    воркеры не увидят новое поколение раньше, чем новые данные.
+    Подходит и для синхронной сессии загрузчиков CLI.
+    """
+    return text(BUMP_GENERATIONS_SQL).bindparams(entities=list(entities))
+
+
+async def bump_generations(session: AsyncSession, *entities: str):
+    """
+    Увеличивает поколения сущностей в текущей транзакции сессии, не фиксируя ее.
+
+    Новые поколения запоминаются в session.info и применяются к generation_tracker этого воркера
+    сразу после фиксации, не дожидаясь собственного NOTIFY.
+
+    Args:
+        session (AsyncSession): Асинхронная сессия базы данных.
+        entities (str): Имена сущностей из DATASET_ENTITIES.
+    """
+    result = await session.execute(bump_generations_statement(*entities))
+    pending = session.info.setdefault(PENDING_GENERATIONS, {})
+    for entity, generation, _ in result.all():
+        pending[entity] = max(generation, pending.get(entity, 0))
+
+
+def patent_cache_key(kind: int, reg_number: int) -> str:
+    return f"patent:{kind}:{reg_number}"
+
+
+def person_cache_key(tax_number: str) -> str:
+    return f"person:{tax_number}"
+
+
+def invalidate_entities_statement(*keys: str) -> TextClause:
+    """
+    Команда рассылки ключей карточек сущностей (patent_cache_key, person_cache_key или INVALIDATE_ALL),
+    которые нужно удалить из кешей воркеров. Уведомления доставляются после фиксации транзакции.
+    """
+    return text(
+        f"SELECT pg_notify('{INVALIDATION_CHANNEL}', key) FROM unnest(CAST(:keys AS text[])) AS key"
+    ).bindparams(keys=list(keys))
+
+
+async def invalidate_entities(session: AsyncSession, *keys: str):
+    """
+    Рассылает инвалидацию карточек сущностей в текущей транзакции сессии, не фиксируя ее.
+
+    Ключи запоминаются в session.info и передаются обработчикам generation_tracker этого воркера
+    сразу после фиксации, не дожидаясь собственного NOTIFY.
+
+    Args:
+        session (AsyncSession): Асинхронная сессия базы данных.
+        keys (str): Ключи карточек.
+    """
+    if keys:
+        await session.execute(invalidate_entities_statement(*keys))
+        session.info.setdefault(PENDING_INVALIDATIONS, []).extend(keys)
+
+
+async def get_dataset_version(session: AsyncSession, entities: Iterable[str] = DATASET_ENTITIES) -> str:
+    """
+    Возвращает версию набора данных, которая меняется при любой записи в указанные сущности.
+
+    Версия составляется из поколений сущностей, поэтому ее вычисление не зависит от объема данных;
+    формат совпадает с GenerationTracker.key.
+
+    Args:
+        session (AsyncSession): Асинхронная сессия базы данных.
+        entities (Iterable[str]): Сущности, по умолчанию DATASET_ENTITIES.
+
+    Returns:
+        str: Версия набора данных.
+    """
+    entities = tuple(entities)
+    result = await session.execute(
+        text("SELECT entity, generation FROM datasetgeneration WHERE entity = ANY(:entities)"),
+        {"entities": list(entities)}
+    )
+    generations = dict(result.all())
+    return ".".join(str(generations.get(entity, 0)) for entity in entities)
+
+
+class GenerationTracker:
+    """
+    Поколения сущностей в памяти воркера для построения ключей кеша.
+
+    Фоновая задача держит отдельное соединение asyncpg с LISTEN на GENERATION_CHANNEL и обновляет
+    поколения по уведомлениям. Раз в reload_interval поколения перечитываются из таблицы на случай
+    пропущенных уведомлений; при обрыве соединение переоткрывается, а до повторной загрузки
+    поколений is_loaded ложно.
+
+    Через то же соединение принимаются ключи INVALIDATION_CHANNEL и передаются обработчикам,
+    зарегистрированным on_invalidate; после (пере)подключения обработчики получают INVALIDATE_ALL,
+    так как уведомления за время обрыва потеряны.
+
+    Args:
+        reload_interval (float): Период перечитывания таблицы, секунды.
+        retry_delay (float): Пауза перед повторным подключением, секунды.
+    """
+
+    def __init__(self, reload_interval: float, retry_delay: float = 5.0):
+        self.reload_interval = reload_interval
+        self.retry_delay = retry_delay
+        self.generations: Dict[str, int] = {}
+        self._invalidation_handlers: List[Callable[[str], None]] = []
+        self._task: Optional[asyncio.Task] = None
+        self.loaded: Optional[asyncio.Event] = None
+
+    @property
+    def is_loaded(self) -> bool:
+        """Поколения загружены из таблицы хотя бы раз; до этого key() не отражает версию данных."""
+        return self.loaded is not None and self.loaded.is_set()
+
+    def key(self, entities: Iterable[str] = DATASET_ENTITIES) -> str:
+        """Часть ключа кеша с текущими поколениями сущностей."""
+        return ".".join(str(self.generations.get(entity, 0)) for entity in entities)
+
+    def _update(self, entity: str, generation: int):
+        if generation > self.generations.get(entity, 0):
+            self.generations[entity] = generation
+
+    def _on_notify(self, connection, pid, channel, payload: str):
+        entity, _, generation = payload.rpartition(":")
+        try:
+            self._update(entity, int(generation))
+        except ValueError:
+            logger.warning(f"Malformed dataset generation notification {payload!r}")
+
+    def on_invalidate(self, handler: Callable[[str], None]):
+        """Регистрирует обработчик ключей инвалидации карточек сущностей."""
+        self._invalidation_handlers.append(handler)
+
+    def _invalidate(self, key: str):
+        for handler in self._invalidation_handlers:
+            handler(key)
+
+    def _on_invalidation(self, connection, pid, channel, payload: str):
+        self._invalidate(payload)
+
+    async def _reload(self, connection):
+        for row in await connection.fetch("SELECT entity, generation FROM datasetgeneration"):
+            self._update(row["entity"], row["generation"])
+        self.loaded.set()
+
+    async def _listen(self):
+        dsn = settings.database_url.replace("+asyncpg", "")
+        while True:
+            try:
+                connection = await asyncpg.connect(dsn)
+                try:
+                    await connection.add_listener(GENERATION_CHANNEL, self._on_notify)
+                    await connection.add_listener(INVALIDATION_CHANNEL, self._on_invalidation)
+                    self._invalidate(INVALIDATE_ALL)
+                    while not connection.is_closed():
+                        await self._reload(connection)
+                        await asyncio.sleep(self.reload_interval)
+                finally:
+                    await connection.close()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Dataset generation listener failed, reconnecting")
+            # Уведомления до переподключения будут потеряны: до перечитывания таблицы поколения неактуальны.
+            self.loaded.clear()
+            await asyncio.sleep(self.retry_delay)
+
+    def start(self):
+        """Запускает прослушивание уведомлений в фоне; событие loaded - после первой загрузки поколений."""
+        if self._task is None or self._task.done():
+            self.loaded = asyncio.Event()
+            self._task = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        """Останавливает прослушивание и закрывает соединение."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+
+generation_tracker = GenerationTracker(reload_interval=settings.cache_generation_reload_interval)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_pending_changes(session: Session):
+    for entity, generation in session.info.pop(PENDING_GENERATIONS, {}).items():
+        generation_tracker._update(entity, generation)
+    for key in dict.fromkeys(session.info.pop(PENDING_INVALIDATIONS, [])):
+        generation_tracker._invalidate(key)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_changes(session: Session):
+    session.info.pop(PENDING_GENERATIONS, None)
+    session.info.pop(PENDING_INVALIDATIONS, None)
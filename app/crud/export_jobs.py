@@ -0,0 +1,225 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+import aiofiles
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.db import AsyncSessionLocal
+from app.crud.dataset import PATENT_DATA_ENTITIES, get_dataset_version
+from app.crud.patents_export import EXPORT_ITERATORS, build_export_query
+from app.models.filter import Filter
+from app.schemas.export import ExportJobCreate, ExportJobDB, ExportJobStatus
+
+PROGRESS_SAVE_INTERVAL = 1.0
+
+
+class ExportJobs():
+    """
+    Асинхронные задачи выгрузки патентов с кешем готовых файлов на диске.
+
+    Идентификатор задачи - sha256 от параметров выгрузки и версии выгружаемых данных, поэтому
+    повторный запрос тех же данных возвращает уже готовый (или еще формируемый) файл.
+    Состояние задачи хранится в jobs/<id>.json, файл выгрузки - в artifacts/<id>.<format>;
+    оба переживают перезапуск и видны всем воркерам, работающим с одним каталогом.
+
+    Args:
+        base_dir (str): Каталог для состояний задач и файлов выгрузок.
+    """
+
+    def __init__(self, base_dir: str):
+        self.jobs_dir = Path(base_dir) / "jobs"
+        self.artifacts_dir = Path(base_dir) / "artifacts"
+        self._tasks = set()
+
+    @staticmethod
+    def get_job_id(params: ExportJobCreate, dataset_version: str) -> str:
+        payload = json.dumps(
+            {"params": params.dict(), "dataset_version": dataset_version},
+            sort_keys=True, default=str
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    @staticmethod
+    async def get_dataset_version(session: AsyncSession, params: ExportJobCreate) -> str:
+        """
+        Версия данных выгрузки: поколения патентных данных и, если задан filter_id, сам фильтр.
+
+        Состав фильтра после создания не меняется, а идентификаторы не переиспользуются, поэтому
+        фильтр описывается датой создания и числом ИНН; изменения других фильтров версию не меняют.
+
+        Args:
+            session (AsyncSession): Асинхронная сессия базы данных.
+            params (ExportJobCreate): Формат и фильтры выгрузки.
+
+        Returns:
+            str: Версия данных выгрузки.
+        """
+        version = await get_dataset_version(session, PATENT_DATA_ENTITIES)
+        if params.filter_id is None:
+            return version
+        row = (await session.execute(
+            select(Filter.created, Filter.tax_numbers_count).where(Filter.id == params.filter_id)
+        )).first()
+        filter_version = f"{row.created}.{row.tax_numbers_count}" if row is not None else "none"
+        return f"{version}:filter.{params.filter_id}.{filter_version}"
+
+    def _job_path(self, job_id: str) -> Path:
+        return self.jobs_dir / f"{job_id}.json"
+
+    def get_artifact_path(self, job: ExportJobDB) -> Path:
+        return self.artifacts_dir / f"{job.id}.{job.params.format.value}"
+
+    def _save(self, job: ExportJobDB):
+        job.updated = datetime.now(timezone.utc)
+        path = self._job_path(job.id)
+        tmp_path = path.with_name(f"{path.name}.{uuid.uuid4().hex}.tmp")
+        tmp_path.write_text(job.json())
+        os.replace(tmp_path, path)
+
+    def get_job(self, job_id: str) -> Optional[ExportJobDB]:
+        """
+        Возвращает состояние задачи выгрузки или None, если задачи нет.
+
+        Args:
+            job_id (str): Идентификатор задачи.
+        """
+        if len(job_id) != 64 or not all(c in "0123456789abcdef" for c in job_id):
+            return None
+        try:
+            return ExportJobDB.parse_raw(self._job_path(job_id).read_text())
+        except FileNotFoundError:
+            return None
+
+    def _is_alive(self, job: ExportJobDB) -> bool:
+        if job.status == ExportJobStatus.DONE:
+            return self.get_artifact_path(job).exists()
+        if job.status in (ExportJobStatus.QUEUED, ExportJobStatus.RUNNING):
+            age = (datetime.now(timezone.utc) - job.updated).total_seconds()
+            return age < settings.export_job_stale_after
+        return False
+
+    async def create_job(self, session: AsyncSession, params: ExportJobCreate) -> ExportJobDB:
+        """
+        Ставит выгрузку в очередь или возвращает существующую задачу с теми же параметрами
+        для текущей версии данных.
+
+        Готовая задача возвращается сразу (файл отдается из кеша); зависшие и завершившиеся
+        ошибкой задачи запускаются заново.
+
+        Args:
+            session (AsyncSession): Асинхронная сессия базы данных.
+            params (ExportJobCreate): Формат и фильтры выгрузки.
+
+        Raises:
+            HTTPException(400): Если значение actual некорректно.
+
+        Returns:
+            ExportJobDB: Состояние задачи.
+        """
+        build_export_query(params.filter_id, params.actual, params.kind)
+        dataset_version = await self.get_dataset_version(session, params)
+        job_id = self.get_job_id(params, dataset_version)
+
+        job = self.get_job(job_id)
+        if job is not None and self._is_alive(job):
+            if job.status == ExportJobStatus.DONE:
+                os.utime(self.get_artifact_path(job))
+            return job
+
+        self.jobs_dir.mkdir(parents=True, exist_ok=True)
+        self.artifacts_dir.mkdir(parents=True, exist_ok=True)
+        now = datetime.now(timezone.utc)
+        job = ExportJobDB(
+            id=job_id, status=ExportJobStatus.QUEUED, params=params,
+            dataset_version=dataset_version, created=now, updated=now
+        )
+        self._save(job)
+
+        task = asyncio.create_task(self._run(job))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    async def _run(self, job: ExportJobDB):
+        params = job.params
+        artifact_path = self.get_artifact_path(job)
+        tmp_path = artifact_path.with_name(f"{artifact_path.name}.{uuid.uuid4().hex}.part")
+        try:
+            stmt = build_export_query(params.filter_id, params.actual, params.kind)
+            async with AsyncSessionLocal() as session:
+                job.rows_total = (await session.execute(
+                    select(func.count()).select_from(stmt.order_by(None).subquery())
+                )).scalar()
+            job.status = ExportJobStatus.RUNNING
+            self._save(job)
+
+            saved_at = time.monotonic()
+
+            def on_rows(count: int):
+                job.rows_written += count
+
+            async with aiofiles.open(tmp_path, "wb") as file:
+                async for chunk in EXPORT_ITERATORS[params.format](stmt, on_rows=on_rows):
+                    await file.write(chunk)
+                    if time.monotonic() - saved_at >= PROGRESS_SAVE_INTERVAL:
+                        job.progress = min(99, job.rows_written * 100 // max(job.rows_total, 1))
+                        self._save(job)
+                        saved_at = time.monotonic()
+
+            os.replace(tmp_path, artifact_path)
+            job.status = ExportJobStatus.DONE
+            job.rows_written = job.rows_total
+            job.progress = 100
+            job.size = artifact_path.stat().st_size
+            self._save(job)
+        except Exception as e:
+            job.status = ExportJobStatus.FAILED
+            job.error = str(e)
+            self._save(job)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+        self.evict()
+
+    def evict(self):
+        """
+        Удаляет файлы выгрузок старше export_cache_max_age, а затем самые давно
+        запрошенные, пока общий объем превышает export_cache_max_bytes.
+        Вместе с файлом удаляется и состояние задачи; брошенные недописанные файлы
+        удаляются по истечении export_job_stale_after.
+        """
+        now = time.time()
+        artifacts = []
+        for path in self.artifacts_dir.iterdir():
+            stat = path.stat()
+            if path.suffix == ".part":
+                if now - stat.st_mtime > settings.export_job_stale_after:
+                    path.unlink(missing_ok=True)
+                continue
+            if now - stat.st_mtime > settings.export_cache_max_age:
+                self._remove(path)
+            else:
+                artifacts.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in artifacts)
+        for _, size, path in sorted(artifacts):
+            if total <= settings.export_cache_max_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    def _remove(self, artifact_path: Path):
+        self._job_path(artifact_path.name.split(".", 1)[0]).unlink(missing_ok=True)
+        artifact_path.unlink(missing_ok=True)
+
+
+export_jobs = ExportJobs(settings.export_dir)
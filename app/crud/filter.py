@@ -1,26 +1,90 @@
-from typing import Sequence
+from typing import IO, Iterable, Optional, Sequence
 
 from fastapi import HTTPException
-#import openpyxl
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy.orm import aliased
+from sqlalchemy import except_, insert, intersect, literal, select, union
+from app.crud.dataset import bump_generations
+from app.models import Ownership, Patent
 from app.models.filter import Filter, FilterTaxNumber
-from app.schemas.filter import FilterCreate
-import pandas as pd
+from app.parsers.filter import FilterParser
+from app.schemas.filter import FilterCombine, FilterCreate, FilterExpression, FilterSetOperation
+
+
+def tax_number_in_filter(tax_number_column, filter_id: int):
+    """
+    Условие EXISTS: ИНН из указанной колонки входит в фильтр.
+
+    Проверка выполняется на стороне БД по индексу (filter_id, tax_number),
+    список ИНН фильтра в приложение не выгружается.
+
+    Args:
+        tax_number_column: Колонка с ИНН внешнего запроса (например, Person.tax_number).
+        filter_id (int): Идентификатор фильтра.
+    """
+    return (
+        select(FilterTaxNumber.tax_number)
+        .where(
+            FilterTaxNumber.filter_id == filter_id,
+            FilterTaxNumber.tax_number == tax_number_column,
+        )
+        .correlate_except(FilterTaxNumber)
+        .exists()
+    )
+
+
+def patent_in_filter(filter_id: int):
+    """
+    Условие EXISTS: хотя бы один правообладатель патента входит в фильтр.
+
+    Args:
+        filter_id (int): Идентификатор фильтра.
+    """
+    holder = aliased(Ownership)
+    return (
+        select(holder.person_tax_number)
+        .where(
+            holder.patent_kind == Patent.kind,
+            holder.patent_reg_number == Patent.reg_number,
+            tax_number_in_filter(holder.person_tax_number, filter_id),
+        )
+        .correlate_except(holder)
+        .exists()
+    )
 
 
 class CRUDFilters:
     def __init__(self):
         self.model = Filter
 
-    async def create_filter(self, session: AsyncSession, filter_data: FilterCreate, file: bytes):
+    SET_OPERATIONS = {
+        FilterSetOperation.UNION: union,
+        FilterSetOperation.INTERSECTION: intersect,
+        FilterSetOperation.DIFFERENCE: except_,
+    }
+
+    async def _copy_tax_numbers(self, session: AsyncSession, filter_id: int, tax_numbers: Iterable[str]):
+        """
+        Массово вставляет ИНН фильтра командой COPY в рамках текущей транзакции сессии.
+        """
+        connection = await session.connection()
+        raw_connection = await connection.get_raw_connection()
+        await raw_connection.driver_connection.copy_records_to_table(
+            FilterTaxNumber.__tablename__,
+            records=((filter_id, tax_number) for tax_number in tax_numbers),
+            columns=["filter_id", "tax_number"],
+        )
+
+    async def create_filter(self, session: AsyncSession, filter_data: FilterCreate, file: IO[bytes],
+                            content_type: Optional[str] = None):
+        parser = FilterParser(file, filter_data.filename, content_type)
+        tax_numbers = await run_in_threadpool(parser.read_tax_numbers)
+        if not tax_numbers:
+            raise HTTPException(status_code=400, detail="В файле не найдено ни одного корректного ИНН.")
+
         try:
             async with session.begin():
-                df = pd.read_excel(file, engine='openpyxl')
-                tax_numbers = df.iloc[:, 0].astype(str).apply(
-                    lambda x: '0' + x if len(x) == 9 else '0' + x if len(x) == 11 else x
-                ).tolist()
-
                 new_filter = Filter(
                     name=filter_data.name,
                     filename=filter_data.filename,
@@ -29,8 +93,8 @@ class CRUDFilters:
                 session.add(new_filter)
                 await session.flush()
 
-                tax_number_records = [FilterTaxNumber(filter_id=new_filter.id, tax_number=tn) for tn in tax_numbers]
-                session.add_all(tax_number_records)
+                await self._copy_tax_numbers(session, new_filter.id, tax_numbers)
+                await bump_generations(session, "filter")
 
                 return {
                     "name": new_filter.name,
@@ -43,11 +107,111 @@ class CRUDFilters:
             await session.rollback()
             raise HTTPException(status_code=500, detail=str(e))
 
+    @staticmethod
+    def _truncate_filename(filename: str) -> str:
+        max_length = Filter.filename.type.length
+        return filename if len(filename) <= max_length else filename[:max_length - 1] + "…"
+
+    async def _insert_filter_from_select(self, session: AsyncSession, filter_data: FilterCreate, tax_numbers_stmt):
+        new_filter = Filter(
+            name=filter_data.name,
+            filename=self._truncate_filename(filter_data.filename),
+            tax_numbers_count=0
+        )
+        session.add(new_filter)
+        await session.flush()
+
+        tax_numbers = tax_numbers_stmt.subquery()
+        result = await session.execute(
+            insert(FilterTaxNumber).from_select(
+                ["filter_id", "tax_number"],
+                select(literal(new_filter.id), tax_numbers.c.tax_number)
+            )
+        )
+        new_filter.tax_numbers_count = result.rowcount
+        await session.flush()
+        await bump_generations(session, "filter")
+
+        return {
+            "name": new_filter.name,
+            "filename": new_filter.filename,
+            "id": new_filter.id,
+            "created": new_filter.created,
+            "tax_numbers_count": new_filter.tax_numbers_count
+        }
+
+    async def create_filter_from_select(self, session: AsyncSession, filter_data: FilterCreate, tax_numbers_stmt):
+        """
+        Создает фильтр из запроса, возвращающего колонку tax_number, одной командой INSERT ... SELECT.
+
+        Данные не покидают сервер БД; количество ИНН фильтра берется из числа вставленных строк.
+        Описание источника, не помещающееся в Filter.filename, обрезается.
+
+        Args:
+            session (AsyncSession): Асинхронная сессия базы данных.
+            filter_data (FilterCreate): Имя и описание источника нового фильтра.
+            tax_numbers_stmt: Запрос с единственной колонкой tax_number без повторов.
+        """
+        try:
+            async with session.begin():
+                return await self._insert_filter_from_select(session, filter_data, tax_numbers_stmt)
+        except Exception as e:
+            await session.rollback()
+            raise HTTPException(status_code=500, detail=str(e))
+
+    def _expression_select(self, expression: FilterExpression):
+        selects = []
+        for operand in expression.operands:
+            if isinstance(operand, int):
+                selects.append(
+                    select(FilterTaxNumber.tax_number).where(FilterTaxNumber.filter_id == operand)
+                )
+            else:
+                nested = self._expression_select(operand).subquery()
+                selects.append(select(nested.c.tax_number))
+
+        return self.SET_OPERATIONS[expression.operation](*selects)
+
+    async def combine_filters(self, session: AsyncSession, filter_combine: FilterCombine):
+        """
+        Создает фильтр как результат операций над множествами ИНН существующих фильтров.
+
+        Выражение компилируется в UNION / INTERSECT / EXCEPT и вычисляется в БД
+        по индексу (filter_id, tax_number). Проверка фильтров и создание нового выполняются
+        в одной транзакции.
+
+        Args:
+            session (AsyncSession): Асинхронная сессия базы данных.
+            filter_combine (FilterCombine): Имя нового фильтра и выражение над id существующих фильтров.
+
+        Raises:
+            HTTPException(404): Если какой-либо из фильтров выражения не найден.
+        """
+        filter_ids = filter_combine.expression.filter_ids()
+        async with session.begin():
+            existing = await session.execute(select(self.model.id).where(self.model.id.in_(filter_ids)))
+            missing = filter_ids - set(existing.scalars().all())
+            if missing:
+                raise HTTPException(
+                    status_code=404,
+                    detail=f"Фильтры {', '.join(str(filter_id) for filter_id in sorted(missing))} не найдены"
+                )
+
+            filter_in = FilterCreate(name=filter_combine.name, filename=str(filter_combine.expression))
+            return await self._insert_filter_from_select(
+                session, filter_in, self._expression_select(filter_combine.expression)
+            )
+
     async def get_filters(self, session: AsyncSession) -> Sequence[Filter]:
         stmt = select(self.model)
         result = await session.execute(stmt)
         return result.scalars().all()
 
+    async def get_recent_filter_ids(self, session: AsyncSession, limit: int) -> Sequence[int]:
+        """Идентификаторы последних созданных фильтров."""
+        result = await session.execute(select(self.model.id).order_by(self.model.created.desc()).limit(limit))
+        return result.scalars().all()
+
     async def get_filter(self, session: AsyncSession, filter_id: int) -> Filter:
         stmt = select(self.model).where(self.model.id == filter_id)
         result = await session.execute(stmt)
@@ -57,6 +221,7 @@ class CRUDFilters:
         db_filter = await self.get_filter(session, filter_id)
         if db_filter:
             db_filter.name = new_name
+            await bump_generations(session, "filter")
             await session.commit()
             await session.refresh(db_filter)
         return db_filter
@@ -65,6 +230,7 @@ class CRUDFilters:
         db_filter = await self.get_filter(session, filter_id)
         if db_filter:
             await session.delete(db_filter)
+            await bump_generations(session, "filter")
             await session.commit()
         return db_filter
 
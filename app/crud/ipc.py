@@ -0,0 +1,137 @@
+from typing import Optional
+
+from sqlalchemy import any_, case, delete, func, insert, null, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from app.crud.crud_base import CRUDBase
+from app.crud.filter import patent_in_filter
+from app.models.ipc import IpcNode
+from app.models.patent import Patent
+
+
+def ipc_level(code):
+    """Уровень узла МПК по виду кода (SQL-выражение, как в parse_mpk_codes)."""
+    length = func.length(code)
+    return case(
+        (length == 1, 1),
+        (length == 3, 2),
+        (length == 4, 3),
+        (code.like("%/00"), 4),
+        else_=5
+    )
+
+
+def ipc_parent(code):
+    """Код родительского узла МПК (SQL-выражение)."""
+    length = func.length(code)
+    return case(
+        (length == 1, null()),
+        (length == 3, func.left(code, 1)),
+        (length == 4, func.left(code, 3)),
+        (code.like("%/00"), func.left(code, 4)),
+        else_=func.split_part(code, "/", 1).concat("/00")
+    )
+
+
+class CRUDIpcNode(CRUDBase):
+    def __init__(self):
+        super().__init__(IpcNode)
+
+    @staticmethod
+    def normalize_code(code: str) -> str:
+        return code.replace(" ", "").upper()
+
+    def get_refresh_statements(self) -> list:
+        """
+        Команды полной пересборки таблицы ipcnode из Patent.mpk: узлы с числом патентов,
+        затем число дочерних узлов.
+        """
+        codes = select(func.unnest(Patent.mpk).label("code")).subquery()
+        children = (
+            select(IpcNode.parent, func.count().label("children_count"))
+            .where(IpcNode.parent.is_not(None))
+            .group_by(IpcNode.parent)
+            .subquery()
+        )
+        return [
+            delete(IpcNode),
+            insert(IpcNode).from_select(
+                ["code", "parent", "level", "patent_count", "children_count"],
+                select(
+                    codes.c.code,
+                    ipc_parent(codes.c.code),
+                    ipc_level(codes.c.code),
+                    func.count(),
+                    0,
+                ).group_by(codes.c.code)
+            ),
+            update(IpcNode)
+            .where(IpcNode.code == children.c.parent)
+            .values(children_count=children.c.children_count),
+        ]
+
+    async def get_tree(self, session: AsyncSession, parent: Optional[str] = None, filter_id: Optional[int] = None) -> dict:
+        """
+        Возвращает дочерние узлы МПК с количеством патентов, упорядоченные по убыванию количества.
+
+        Без фильтра количества берутся из предрассчитанной таблицы ipcnode. С фильтром считаются
+        только патенты правообладателей из фильтра: патенты отбираются полусоединением,
+        а при указанном parent - еще и по GIN-индексу mpk. Число дочерних узлов в этом случае тоже
+        считается по патентам фильтра, чтобы узел не обещал потомков, которых в срезе нет.
+
+        Args:
+            session (AsyncSession): Асинхронная сессия базы данных.
+            parent (Optional[str]): Код родительского узла; если не указан, возвращаются разделы.
+            filter_id (Optional[int]): Идентификатор фильтра по списку ИНН правообладателей.
+
+        Returns:
+            dict: Код родителя и список узлов.
+        """
+        if parent is not None:
+            parent = self.normalize_code(parent)
+        parent_condition = IpcNode.parent == parent if parent is not None else IpcNode.parent.is_(None)
+
+        if filter_id is None:
+            stmt = (
+                select(IpcNode.code, IpcNode.parent, IpcNode.level, IpcNode.patent_count, IpcNode.children_count)
+                .where(parent_condition)
+                .order_by(IpcNode.patent_count.desc(), IpcNode.code)
+            )
+            result = await session.execute(stmt)
+            return {"parent": parent, "items": [dict(row) for row in result.mappings()]}
+
+        patent_conditions = [patent_in_filter(filter_id)]
+        if parent is not None:
+            patent_conditions.append(Patent.mpk.contains([parent]))
+
+        patent_count = func.count().label("patent_count")
+        stmt = (
+            select(IpcNode.code, IpcNode.parent, IpcNode.level, patent_count)
+            .select_from(Patent)
+            .join(IpcNode, IpcNode.code == any_(Patent.mpk))
+            .where(parent_condition, *patent_conditions)
+            .group_by(IpcNode.code)
+            .order_by(patent_count.desc(), IpcNode.code)
+        )
+        result = await session.execute(stmt)
+        items = [dict(row) for row in result.mappings()]
+
+        codes = [item["code"] for item in items]
+        children_count = {}
+        if codes:
+            child = aliased(IpcNode)
+            children_stmt = (
+                select(child.parent, func.count(child.code.distinct()))
+                .select_from(Patent)
+                .join(child, child.code == any_(Patent.mpk))
+                .where(child.parent.in_(codes), Patent.mpk.overlap(codes), patent_in_filter(filter_id))
+                .group_by(child.parent)
+            )
+            children_count = dict((await session.execute(children_stmt)).all())
+        for item in items:
+            item["children_count"] = children_count.get(item["code"], 0)
+        return {"parent": parent, "items": items}
+
+
+ipc_crud = CRUDIpcNode()
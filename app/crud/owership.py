@@ -1,10 +1,46 @@
+from typing import List
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
 from app.crud.crud_base import CRUDBase
+from app.crud.dataset import bump_generations, invalidate_entities, patent_cache_key, person_cache_key
+from app.crud.person import person_crud
 from app.models.ownership import Ownership
 
 
 class CRUDOwnership(CRUDBase):
+    """
+    CRUD для связей патент-правообладатель.
+    Операции записи пересчитывают хранимые счетчики патентов затронутой персоны в той же транзакции.
+    """
     def __init__(self):
         super().__init__(Ownership)
 
+    async def get_cache_keys(self, session: AsyncSession, db_obj) -> List[str]:
+        return [
+            patent_cache_key(db_obj.patent_kind, db_obj.patent_reg_number),
+            person_cache_key(db_obj.person_tax_number),
+        ]
+
+    async def create_object(self, obj_in, session: AsyncSession):
+        db_obj = self.model(**obj_in.dict())
+        session.add(db_obj)
+        await session.flush()
+        await person_crud.refresh_patent_counts(session, [db_obj.person_tax_number])
+        await bump_generations(session, "ownership", "person")
+        await invalidate_entities(session, *await self.get_cache_keys(session, db_obj))
+        await session.commit()
+        await session.refresh(db_obj)
+        return db_obj
+
+    async def delete_object(self, db_obj, session: AsyncSession):
+        await session.delete(db_obj)
+        await session.flush()
+        await person_crud.refresh_patent_counts(session, [db_obj.person_tax_number])
+        await bump_generations(session, "ownership", "person")
+        await invalidate_entities(session, *await self.get_cache_keys(session, db_obj))
+        await session.commit()
+        return db_obj
+
 
 ownership_crud = CRUDOwnership()
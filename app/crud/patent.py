@@ -1,15 +1,18 @@
-import time
-from typing import Dict, Sequence, Any, Optional
+from datetime import date
+from typing import Dict, List, Sequence, Any, Optional, Tuple
 
 from aiocache import cached
-from sqlalchemy import case, select, func
+from sqlalchemy import case, select, func, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 
+from app.crud.analytics import analytics_engine
 from app.crud.crud_base import CRUDBase
-from app.models import Ownership, Person
-from app.models.filter import FilterTaxNumber
+from app.crud.dataset import bump_generations, invalidate_entities, patent_cache_key, person_cache_key
+from app.crud.filter import patent_in_filter
+from app.crud.person import person_crud
+from app.models import Ownership
 from app.models.patent import Patent
 from app.schemas.patent import PatentsStats
 
@@ -18,44 +21,105 @@ class CRUDPatent(CRUDBase):
     def __init__(self):
         super().__init__(Patent)
 
+    def get_filter_conditions(
+            self,
+            kind: Optional[int] = None,
+            actual: Optional[bool] = None,
+            filter_id: Optional[int] = None,
+            reg_date_from: Optional[date] = None,
+            reg_date_to: Optional[date] = None,
+            appl_date_from: Optional[date] = None,
+            appl_date_to: Optional[date] = None,
+            region: Optional[str] = None,
+            city: Optional[str] = None,
+            country_code: Optional[str] = None,
+            mpk: Optional[str] = None,
+            min_authors: Optional[int] = None,
+            max_authors: Optional[int] = None,
+    ) -> list:
+        """
+        Собирает условия отбора патентов для WHERE.
+
+        Каждое условие опирается на свой индекс (BRIN по датам, btree по региону, городу, стране
+        и числу авторов, GIN по mpk), поэтому условия можно свободно комбинировать.
+
+        Args:
+            kind (Optional[int]): Вид патента.
+            actual (Optional[bool]): Актуальность патента.
+            filter_id (Optional[int]): Идентификатор фильтра по списку ИНН правообладателей.
+            reg_date_from (Optional[date]): Дата регистрации не раньше.
+            reg_date_to (Optional[date]): Дата регистрации не позже.
+            appl_date_from (Optional[date]): Дата подачи заявки не раньше.
+            appl_date_to (Optional[date]): Дата подачи заявки не позже.
+            region (Optional[str]): Регион правообладателя.
+            city (Optional[str]): Город правообладателя.
+            country_code (Optional[str]): Код страны правообладателя, например RU.
+            mpk (Optional[str]): Раздел, класс или подкласс МПК, например G, G06 или G06F.
+            min_authors (Optional[int]): Минимальное число авторов.
+            max_authors (Optional[int]): Максимальное число авторов.
+
+        Returns:
+            list: Список условий SQLAlchemy.
+        """
+        conditions = []
+        if kind is not None:
+            conditions.append(Patent.kind == kind)
+        if actual is not None:
+            conditions.append(Patent.actual == actual)
+        if filter_id is not None:
+            conditions.append(patent_in_filter(filter_id))
+        if reg_date_from is not None:
+            conditions.append(Patent.reg_date >= reg_date_from)
+        if reg_date_to is not None:
+            conditions.append(Patent.reg_date <= reg_date_to)
+        if appl_date_from is not None:
+            conditions.append(Patent.appl_date >= appl_date_from)
+        if appl_date_to is not None:
+            conditions.append(Patent.appl_date <= appl_date_to)
+        if region is not None:
+            conditions.append(Patent.region == region)
+        if city is not None:
+            conditions.append(Patent.city == city)
+        if country_code is not None:
+            conditions.append(Patent.country_code == country_code.upper())
+        if mpk is not None:
+            conditions.append(Patent.mpk.contains([mpk.replace(" ", "").upper()]))
+        if min_authors is not None:
+            conditions.append(Patent.author_count >= min_authors)
+        if max_authors is not None:
+            conditions.append(Patent.author_count <= max_authors)
+        return conditions
+
     async def get_patents_list(
             self,
             session: AsyncSession,
             page: int,
             pagesize: int,
-            kind: Optional[int] = None,
-            actual: Optional[bool] = None
+            **filters
     ) -> Dict[str, int | list[dict[str, list | int | Any]]]:
         """
-        Получает список патентов, упорядоченных по названию.
+        Получает список патентов, упорядоченных по актуальности.
 
         Args:
             session (AsyncSession): Асинхронная сессия базы данных.
             page (int): Номер страницы для пагинации.
             pagesize (int): Количество элементов на странице.
+            **filters: Критерии отбора, см. get_filter_conditions; общее количество считается по ним же.
 
         Returns:
             Dict[str, int | list[dict[str, list | int | Any]]]: Список патентов с дополнительной информацией.
         """
-        print(f"Executing get_patents_list at {time.time()}")
         skip = (page - 1) * pagesize
+        conditions = self.get_filter_conditions(**filters)
         stmt = (
             select(Patent)
-            .outerjoin(Ownership,
-                       (Ownership.patent_kind == Patent.kind) & (Ownership.patent_reg_number == Patent.reg_number))
-            .outerjoin(Person, Person.tax_number == Ownership.person_tax_number)
             .options(selectinload(Patent.ownerships).selectinload(Ownership.person))
-            .group_by(Patent.kind, Patent.reg_number)
+            .where(*conditions)
             .order_by(Patent.actual.desc())
             .offset(skip)
             .limit(pagesize)
         )
 
-        if kind is not None:
-            stmt = stmt.where(Patent.kind == kind)
-        if actual is not None:
-            stmt = stmt.where(Patent.actual == actual)
-
         result = await session.execute(stmt)
         patents = result.all()
 
@@ -75,57 +139,79 @@ class CRUDPatent(CRUDBase):
             })
 
         total = await session.execute(
-            select(func.count()).select_from(Patent))
+            select(func.count()).select_from(Patent).where(*conditions))
 
         return {
             "total": total.scalar(),
             "items": patents_list,
         }
 
-    async def get_patent(self, session: AsyncSession, patent_kind: int, patent_reg_number: int) -> dict[str, Any]:
+    async def get_patents(
+            self, session: AsyncSession, keys: Sequence[Tuple[int, int]]
+    ) -> Dict[Tuple[int, int], Dict[str, Any]]:
         """
-        Получает патент по идентификатору с дополнительной информацией.
+        Получает патенты по списку идентификаторов одним запросом с дополнительной информацией.
 
         Args:
             session (AsyncSession): Асинхронная сессия базы данных.
-            patent_kind (int): Тип патента.
-            patent_reg_number (int): Регистрационный номер патента.
+            keys (Sequence[Tuple[int, int]]): Пары (вид, регистрационный номер).
 
         Returns:
-            Dict[str, Any]: Словарь с информацией о патенте, включая список идентификаторов владельцев,
-                            количество владельцев и количество авторов.
+            Dict[Tuple[int, int], Dict[str, Any]]: Найденные патенты по идентификатору, включая
+                правообладателей, их сокращенные наименования (owner_raw) и количество авторов.
         """
+        if not keys:
+            return {}
+
         stmt = (
             select(
                 Patent,
-                func.string_agg(Person.short_name, ', ').label("owner_raw"),
-                func.coalesce(func.array_length(func.string_to_array(Patent.author_raw, ', '), 1).label('author_count'),
-                              0)
+                func.coalesce(func.array_length(func.string_to_array(Patent.author_raw, ', '), 1), 0)
+                .label('author_count')
             )
-            .outerjoin(Ownership,
-                       (Ownership.patent_kind == Patent.kind) & (Ownership.patent_reg_number == Patent.reg_number))
-            .outerjoin(Person, Person.tax_number == Ownership.person_tax_number)
             .options(selectinload(Patent.ownerships).selectinload(Ownership.person))
-            .group_by(Patent.kind, Patent.reg_number)
-            .where((Patent.kind == patent_kind) & (Patent.reg_number == patent_reg_number))
+            .where(tuple_(Patent.kind, Patent.reg_number).in_(list(keys)))
         )
         result = await session.execute(stmt)
-        patent, owner_raw, author_count = result.one()
 
-        patent_holders = [
-            {
-                "tax_number": ownership.person.tax_number,
-                "full_name": ownership.person.full_name,
+        patents = {}
+        for patent, author_count in result.all():
+            holders = [ownership.person for ownership in patent.ownerships if ownership.person is not None]
+            short_names = [holder.short_name for holder in holders if holder.short_name]
+            patents[(patent.kind, patent.reg_number)] = {
+                **patent.__dict__,
+                "owner_raw": ", ".join(short_names) if short_names else None,
+                "patent_holders": [
+                    {"tax_number": holder.tax_number, "full_name": holder.full_name} for holder in holders
+                ],
+                "author_count": author_count
             }
-            for ownership in patent.ownerships
-        ]
+        return patents
 
-        return {
-            **patent.__dict__,
-            "owner_raw": owner_raw,
-            "patent_holders": patent_holders,
-            "author_count": author_count
-        }
+    async def get_cache_keys(self, session: AsyncSession, db_obj) -> List[str]:
+        return [patent_cache_key(db_obj.kind, db_obj.reg_number)]
+
+    async def delete_object(self, db_obj, session: AsyncSession):
+        """
+        Удаляет патент и пересчитывает счетчики патентов его правообладателей в той же транзакции.
+        """
+        holders = await session.execute(
+            select(Ownership.person_tax_number)
+            .where((Ownership.patent_kind == db_obj.kind) & (Ownership.patent_reg_number == db_obj.reg_number))
+        )
+        tax_numbers = holders.scalars().all()
+
+        await session.delete(db_obj)
+        await session.flush()
+        await person_crud.refresh_patent_counts(session, tax_numbers)
+        await bump_generations(session, "patent", "ownership", "person")
+        await invalidate_entities(
+            session,
+            patent_cache_key(db_obj.kind, db_obj.reg_number),
+            *(person_cache_key(tax_number) for tax_number in tax_numbers)
+        )
+        await session.commit()
+        return db_obj
 
     async def get_stats(
             self, session: AsyncSession, filter_id: Optional[int] = None
@@ -133,6 +219,9 @@ class CRUDPatent(CRUDBase):
         """
         Статистика по патентам.
 
+        Если включен снимок analytics_snapshot и он построен для текущей версии данных,
+        статистика считается в памяти без запросов к таблицам.
+
         Args:
         session (AsyncSession): асинхронная сессия базы данных.
         filter_id (Optional[int]): опциональный идентификатор загруженного фильтра по списку ИНН.
@@ -140,6 +229,10 @@ class CRUDPatent(CRUDBase):
         Returns:
             dict: словарь со статистикой.
         """
+        snapshot = await analytics_engine.get_snapshot(session)
+        if snapshot is not None:
+            return await snapshot.get_patents_stats(session, filter_id)
+
         stats = {}
 
         total_patents_stmt = (
@@ -148,12 +241,7 @@ class CRUDPatent(CRUDBase):
         if filter_id is not None:
             total_patents_stmt = (
                 total_patents_stmt
-                .join(Ownership)
-                .join(
-                    FilterTaxNumber,
-                    Ownership.person_tax_number == FilterTaxNumber.tax_number
-                )
-                .filter_by(filter_id=filter_id)
+                .where(patent_in_filter(filter_id))
             )
         total_patents_res = await session.execute(total_patents_stmt)
         stats["total_patents"] = total_patents_res.scalar()
@@ -164,12 +252,7 @@ class CRUDPatent(CRUDBase):
         if filter_id is not None:
             total_patents_ru_stmt = (
                 total_patents_ru_stmt
-                .join(Ownership)
-                .join(
-                    FilterTaxNumber,
-                    Ownership.person_tax_number == FilterTaxNumber.tax_number
-                )
-                .filter_by(filter_id=filter_id)
+                .where(patent_in_filter(filter_id))
             )
         total_patents_ru_res = await session.execute(total_patents_ru_stmt)
         stats["total_ru_patents"] = total_patents_ru_res.scalar()
@@ -182,11 +265,7 @@ class CRUDPatent(CRUDBase):
         if filter_id is not None:
             total_with_holders_stmt = (
                 total_with_holders_stmt
-                .join(
-                    FilterTaxNumber,
-                    Ownership.person_tax_number == FilterTaxNumber.tax_number
-                )
-                .filter_by(filter_id=filter_id)
+                .where(patent_in_filter(filter_id))
             )
         total_with_holders_res = await session.execute(total_with_holders_stmt)
         stats["total_with_holders"] = total_with_holders_res.scalar()
@@ -200,11 +279,7 @@ class CRUDPatent(CRUDBase):
         if filter_id is not None:
             total_ru_with_holders_stmt = (
                 total_ru_with_holders_stmt
-                .join(
-                    FilterTaxNumber,
-                    Ownership.person_tax_number == FilterTaxNumber.tax_number
-                )
-                .filter_by(filter_id=filter_id)
+                .where(patent_in_filter(filter_id))
             )
         total_ru_with_holders_res = await session.execute(total_ru_with_holders_stmt)
         stats["total_ru_with_holders"] = total_ru_with_holders_res.scalar()
@@ -230,12 +305,7 @@ class CRUDPatent(CRUDBase):
         if filter_id is not None:
             by_author_count_stmt = (
                 by_author_count_stmt
-                .join(Ownership)
-                .join(
-                    FilterTaxNumber,
-                    Ownership.person_tax_number == FilterTaxNumber.tax_number
-                )
-                .filter_by(filter_id=filter_id)
+                .where(patent_in_filter(filter_id))
             )
         by_author_count_res = await session.execute(by_author_count_stmt)
         stats["by_author_count"] = {
@@ -251,12 +321,7 @@ class CRUDPatent(CRUDBase):
         if filter_id is not None:
             by_patent_kind_stmt = (
                 by_patent_kind_stmt
-                .join(Ownership)
-                .join(
-                    FilterTaxNumber,
-                    Ownership.person_tax_number == FilterTaxNumber.tax_number
-                )
-                .filter_by(filter_id=filter_id)
+                .where(patent_in_filter(filter_id))
             )
         by_patent_kind_res = await session.execute(by_patent_kind_stmt)
         stats["by_patent_kind"] = {
@@ -266,53 +331,5 @@ class CRUDPatent(CRUDBase):
 
         return stats
 
-    async def get_patents_list_with_filter(self, session: AsyncSession, page: int, pagesize: int, filter_id: int) -> \
-            list[dict[str, int | list[dict[str, Any]] | Any]]:
-        skip = (page - 1) * pagesize
-        tax_numbers_stmt = select(FilterTaxNumber.tax_number).where(FilterTaxNumber.filter_id == filter_id)
-        tax_numbers_result = await session.execute(tax_numbers_stmt)
-        tax_numbers = [row[0] for row in tax_numbers_result.all()]
-
-        stmt = (
-            select(Patent)
-            .outerjoin(Ownership,
-                       (Ownership.patent_kind == Patent.kind) & (Ownership.patent_reg_number == Patent.reg_number))
-            .outerjoin(Person, Person.tax_number == Ownership.person_tax_number)
-            .where(Person.tax_number.in_(tax_numbers))
-            .options(selectinload(Patent.ownerships).selectinload(Ownership.person))
-            .group_by(Patent.kind, Patent.reg_number)
-            .offset(skip)
-            .limit(pagesize)
-        )
-
-        result = await session.execute(stmt)
-        patents = result.all()
-
-        patents_list = []
-        for patent in patents:
-            patent_holders = [
-                {
-                    "tax_number": ownership.person.tax_number,
-                    "full_name": ownership.person.full_name,
-                }
-                for ownership in patent[0].ownerships
-            ]
-
-            patents_list.append({
-                **patent[0].__dict__,
-                "patent_holders": patent_holders,
-            })
-
-        total = await session.execute(
-            select(func.count())
-            .select_from(Patent)
-            .outerjoin(Ownership)
-            .where(Ownership.person_tax_number.in_(tax_numbers)))
-
-        return {
-            "total": total.scalar(),
-            "items": patents_list,
-        }
-
 
 patent_crud = CRUDPatent()
@@ -1,57 +1,77 @@
-from io import BytesIO
-from tempfile import NamedTemporaryFile
-from typing import Optional
-
-import aiofiles
+import asyncio
+from typing import AsyncIterator, Callable, Optional
 
+import pyarrow as pa
+import pyarrow.parquet as pq
 from fastapi import HTTPException
-from openpyxl.workbook import Workbook
-
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy import select, func, case, literal_column, and_
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
 
 from fastapi.responses import StreamingResponse
 
+from app.core.db import AsyncSessionLocal, engine
+from app.crud.filter import tax_number_in_filter
+from app.crud.xlsx_stream import ChunkSink, XLSXStreamWriter
 from app.models import Patent, Person, Ownership
-from app.models.filter import FilterTaxNumber
-
-
-async def get_export_patent_file(
-        session: AsyncSession,
-        filter_id: Optional[int] = None,
-        actual: Optional[str] = None,
-        kind: Optional[int] = None,
+from app.schemas.patent import ExportFormat
 
-):
-    """
-    Получает данные о патентах и экспортирует их в файл XLSX.
+EXPORT_BATCH_SIZE = 5000
+PARQUET_ROW_GROUP_SIZE = 100000
 
-    Args:
-        session (AsyncSession): Сессия для взаимодействия с базой данных.
+EXPORT_HEADERS = [
+    "ИНН", "Вид", "Категория", "Полное наименование", "Регистрационный номер патента",
+    "Вид патента", "Дата регистрации", "Название", "Актуальность патента",
+    "Индекс класса по МПК", "Индекс подкласса по МПК", "Регион правообладателя",
+    "Город правообладателя", "Число авторов"
+]
 
-        filter_id (Optional[int], optional): Идентификатор фильтра. Если указан, будут экспортированы только
-            патенты, связанные с этим фильтром. Если не указан, будут экспортированы первые 10000 патентов.
+PARQUET_SCHEMA = pa.schema([
+    (EXPORT_HEADERS[0], pa.string()),
+    (EXPORT_HEADERS[1], pa.string()),
+    (EXPORT_HEADERS[2], pa.string()),
+    (EXPORT_HEADERS[3], pa.string()),
+    (EXPORT_HEADERS[4], pa.int64()),
+    (EXPORT_HEADERS[5], pa.string()),
+    (EXPORT_HEADERS[6], pa.date32()),
+    (EXPORT_HEADERS[7], pa.string()),
+    (EXPORT_HEADERS[8], pa.bool_()),
+    (EXPORT_HEADERS[9], pa.string()),
+    (EXPORT_HEADERS[10], pa.string()),
+    (EXPORT_HEADERS[11], pa.string()),
+    (EXPORT_HEADERS[12], pa.string()),
+    (EXPORT_HEADERS[13], pa.int64()),
+])
 
-        actual (Optional[str], optional): Фильтр по актуальности патента. Если "Актуально", будут экспортированы
-            только актуальные патенты. Если "Неактуально", будут экспортированы только неактуальные патенты.
-            Если не указан, актуальность не будет учитываться.
+EXPORT_MEDIA_TYPES = {
+    ExportFormat.XLSX: "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    ExportFormat.CSV: "text/csv; charset=utf-8",
+    ExportFormat.PARQUET: "application/vnd.apache.parquet",
+}
 
-        kind (Optional[int], optional): Фильтр по виду патента. Если указан, будут экспортированы только патенты
-            указанного вида (1 - изобретение, 2 - полезная модель, 3 - промышленный образец).
 
-    Returns:
-        StreamingResponse: Поток данных с XLSX-файлом, содержащим информацию о патентах.
-        """
-    author_count_subquery = (
-        select(
-            Patent.reg_number.label('patent_reg_number'),
-            Patent.kind.label('patent_kind'),
-            func.coalesce(func.array_length(func.string_to_array(Patent.author_raw, ','), 1), 0).label('author_count')
-        ).subquery()
-    )
+def build_export_query(
+        filter_id: Optional[int] = None,
+        actual: Optional[str] = None,
+        kind: Optional[int] = None,
+) -> Select:
+    """
+    Строит запрос выгрузки патентов: одна строка на пару патент-правообладатель,
+    колонки идут в порядке EXPORT_HEADERS.
 
+    Raises:
+        HTTPException(400): Если значение actual некорректно.
+    """
     stmt = (
         select(
+            Person.tax_number,
+            case(
+                (Person.kind == 1, literal_column("'Юрлицо'")),
+                (Person.kind == 2, literal_column("'Физлицо/ИП'")),
+                else_=literal_column("'неизвестно'")
+            ).label('person_kind'),
+            Person.category.label("person_category"),
+            Person.full_name,
             Patent.reg_number,
             case(
                 (Patent.kind == 1, literal_column("'изобретение'")),
@@ -66,30 +86,18 @@ async def get_export_patent_file(
             Patent.subcategory,
             Patent.region,
             Patent.city,
-            author_count_subquery.c.author_count,
-            Person.tax_number,
-            case(
-                (Person.kind == 1, literal_column("'Юрлицо'")),
-                (Person.kind == 2, literal_column("'Физлицо/ИП'")),
-                else_=literal_column("'неизвестно'")
-            ).label('person_kind'),
-            Person.category.label("person_category"),
-            Person.full_name,
+            func.coalesce(
+                func.array_length(func.string_to_array(Patent.author_raw, ','), 1), 0
+            ).label('author_count'),
         )
         .select_from(Patent)
         .join(Ownership, and_(Ownership.patent_kind == Patent.kind, Ownership.patent_reg_number == Patent.reg_number))
         .join(Person, Person.tax_number == Ownership.person_tax_number)
-        .join(author_count_subquery, and_(
-            author_count_subquery.c.patent_reg_number == Patent.reg_number,
-            author_count_subquery.c.patent_kind == Patent.kind
-        ))
         .order_by(Patent.reg_number)
-        .limit(10000)
     )
 
     if filter_id:
-        stmt = stmt.join(FilterTaxNumber, Person.tax_number == FilterTaxNumber.tax_number)
-        stmt = stmt.where(FilterTaxNumber.filter_id == filter_id)
+        stmt = stmt.where(tax_number_in_filter(Person.tax_number, filter_id))
 
     if actual:
         actual_casefold = actual.casefold()
@@ -106,45 +114,160 @@ async def get_export_patent_file(
     if kind:
         stmt = stmt.where(Patent.kind == kind)
 
-    headers = [
-        "ИНН", "Вид", "Категория", "Полное наименование", "Регистрационный номер патента",
-        "Вид патента", "Дата регистрации", "Название", "Актуальность патента",
-        "Индекс класса по МПК", "Индекс подкласса по МПК", "Регион правообладателя",
-        "Город правообладателя", "Число авторов"
-    ]
-
-    with NamedTemporaryFile(delete=False) as temp_file:
-        wb = Workbook(write_only=True)
-        ws = wb.create_sheet(title="Patents")
-        ws.append(headers)
-
-        result = await session.execute(stmt)
-        for row in result:
-            row_data = [
-                row.tax_number,
-                row.person_kind,
-                row.person_category,
-                row.full_name,
-                row.reg_number,
-                row.patent_kind,
-                row.reg_date,
-                row.name,
-                row.actual,
-                row.category,
-                row.subcategory,
-                row.region,
-                row.city,
-                row.author_count
-            ]
-            ws.append(row_data)
-
-        wb.save(temp_file.name)
-
-        async with aiofiles.open(temp_file.name, mode="rb") as f:
-            content = await f.read()
+    return stmt
+
+
+async def iter_export_xlsx(stmt: Select, on_rows: Optional[Callable[[int], None]] = None) -> AsyncIterator[bytes]:
+    """
+    Отдает XLSX-файл порциями: строки читаются серверным курсором партиями по EXPORT_BATCH_SIZE
+    и сразу дописываются в архив.
+
+    В цикле событий выполняется только чтение из БД; кодирование партии в XML и ее сжатие
+    выполняются в пуле потоков, чтобы не задерживать другие запросы воркера.
+
+    Сессия открывается внутри генератора, так как тело ответа отдается уже после
+    завершения зависимостей эндпоинта. Если передан on_rows, он вызывается с числом
+    записанных строк после каждой партии.
+    """
+    writer = XLSXStreamWriter(sheet_title="Patents")
+    writer.append(EXPORT_HEADERS)
+    yield writer.read()
+
+    async with AsyncSessionLocal() as session:
+        result = await session.stream(stmt.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        async for partition in result.partitions():
+            chunk = await run_in_threadpool(writer.append_rows, partition)
+            if on_rows is not None:
+                on_rows(len(partition))
+            yield chunk
+
+    yield await run_in_threadpool(writer.close)
+
+
+def _rows_to_table(rows: list) -> pa.Table:
+    columns = list(zip(*rows))
+    return pa.Table.from_arrays(
+        [pa.array(column, type=field.type) for column, field in zip(columns, PARQUET_SCHEMA)],
+        schema=PARQUET_SCHEMA
+    )
+
+
+async def iter_export_parquet(stmt: Select, on_rows: Optional[Callable[[int], None]] = None) -> AsyncIterator[bytes]:
+    """
+    Отдает Parquet-файл порциями: строки читаются серверным курсором и записываются
+    группами строк по PARQUET_ROW_GROUP_SIZE.
+    """
+    sink = ChunkSink()
+    writer = pq.ParquetWriter(pa.PythonFile(sink, mode="w"), PARQUET_SCHEMA)
+
+    async with AsyncSessionLocal() as session:
+        result = await session.stream(stmt.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        rows = []
+        async for partition in result.partitions():
+            rows.extend(partition)
+            if on_rows is not None:
+                on_rows(len(partition))
+            if len(rows) >= PARQUET_ROW_GROUP_SIZE:
+                writer.write_table(_rows_to_table(rows))
+                rows = []
+                yield sink.drain()
+        if rows:
+            writer.write_table(_rows_to_table(rows))
+
+    writer.close()
+    yield sink.drain()
+
+
+def compile_copy_query(stmt: Select) -> str:
+    """
+    Компилирует запрос выгрузки для COPY: колонки получают имена из EXPORT_HEADERS,
+    параметры подставляются литералами (COPY не принимает связанные параметры).
+    """
+    labeled = stmt.with_only_columns(
+        *[column.label(header) for column, header in zip(stmt.selected_columns, EXPORT_HEADERS)]
+    )
+    return str(labeled.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True}))
+
+
+async def iter_export_csv(stmt: Select, on_rows: Optional[Callable[[int], None]] = None) -> AsyncIterator[bytes]:
+    """
+    Отдает CSV, сформированный самим PostgreSQL командой COPY (query) TO STDOUT.
+
+    Порции данных от asyncpg передаются клиенту через ограниченную очередь, поэтому
+    медленный клиент притормаживает COPY, а не накапливает данные в памяти.
+    Число строк для on_rows оценивается по переводам строк в порции.
+    """
+    query = compile_copy_query(stmt)
+    chunks: asyncio.Queue = asyncio.Queue(maxsize=16)
+    done = object()
+
+    async def copy_to_queue():
+        try:
+            async with AsyncSessionLocal() as session:
+                connection = await session.connection()
+                raw_connection = await connection.get_raw_connection()
+                await raw_connection.driver_connection.copy_from_query(
+                    query, output=chunks.put, format="csv", header=True
+                )
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            await chunks.put(done)
+            raise
+        await chunks.put(done)
+
+    task = asyncio.create_task(copy_to_queue())
+    try:
+        while True:
+            chunk = await chunks.get()
+            if chunk is done:
+                break
+            if on_rows is not None:
+                on_rows(chunk.count(b"\n"))
+            yield chunk
+        await task
+    finally:
+        if not task.done():
+            task.cancel()
+
+
+EXPORT_ITERATORS = {
+    ExportFormat.XLSX: iter_export_xlsx,
+    ExportFormat.CSV: iter_export_csv,
+    ExportFormat.PARQUET: iter_export_parquet,
+}
+
+
+async def get_export_patent_file(
+        filter_id: Optional[int] = None,
+        actual: Optional[str] = None,
+        kind: Optional[int] = None,
+        export_format: ExportFormat = ExportFormat.XLSX,
+):
+    """
+    Получает данные о патентах и экспортирует их в файл XLSX, CSV или Parquet.
+
+    Args:
+        filter_id (Optional[int], optional): Идентификатор фильтра. Если указан, будут экспортированы только
+            патенты, связанные с этим фильтром. Если не указан, будут экспортированы все патенты.
+
+        actual (Optional[str], optional): Фильтр по актуальности патента. Если "Актуально", будут экспортированы
+            только актуальные патенты. Если "Неактуально", будут экспортированы только неактуальные патенты.
+            Если не указан, актуальность не будет учитываться.
+
+        kind (Optional[int], optional): Фильтр по виду патента. Если указан, будут экспортированы только патенты
+            указанного вида (1 - изобретение, 2 - полезная модель, 3 - промышленный образец).
+
+        export_format (ExportFormat, optional): Формат файла: xlsx (по умолчанию), csv (COPY TO STDOUT)
+            или parquet.
+
+    Returns:
+        StreamingResponse: Поток данных с файлом, содержащим информацию о патентах.
+        """
+    stmt = build_export_query(filter_id, actual, kind)
 
     return StreamingResponse(
-        BytesIO(content),
-        media_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-        headers={"Content-Disposition": "attachment; filename=patents_export.xlsx"}
+        EXPORT_ITERATORS[export_format](stmt),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f"attachment; filename=patents_export.{export_format.value}"}
     )
@@ -1,12 +1,15 @@
-from typing import Any, Dict, Optional
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Sequence
 
-from sqlalchemy import select, func
+from sqlalchemy import select, func, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
+from app.crud.analytics import analytics_engine
 from app.crud.crud_base import CRUDBase
-from app.models import Ownership
-from app.models.filter import FilterTaxNumber
+from app.crud.dataset import patent_cache_key, person_cache_key
+from app.crud.filter import tax_number_in_filter
+from app.models import Ownership, Patent
 from app.models.person import Person
 
 
@@ -22,42 +25,186 @@ class CRUDPerson(CRUDBase):
         5: "Прочие организации",
     }
 
+    NAME_TRANSLATION = str.maketrans({"ё": "е", "«": None, "»": None, '"': None})
+    SUGGEST_MIN_NAME_LENGTH = 3
+
+    def get_filter_conditions(
+            self,
+            kind: Optional[int] = None,
+            active: Optional[bool] = None,
+            category: Optional[int] = None,
+            min_patents: Optional[int] = None,
+            max_patents: Optional[int] = None,
+            region: Optional[str] = None,
+            filter_id: Optional[int] = None,
+            reg_date_from: Optional[date] = None,
+            reg_date_to: Optional[date] = None,
+    ) -> list:
+        """
+        Собирает условия отбора персон для WHERE.
+
+        Условия по патентам и фильтру применяются полусоединениями (EXISTS) по индексам
+        ownership(person_tax_number) и filtertaxnumber(filter_id, tax_number).
+
+        Args:
+            kind (Optional[int]): Вид лица.
+            active (Optional[bool]): Флаг активности.
+            category (Optional[int]): Категория из CATEGORY_MAPPING.
+            min_patents (Optional[int]): Минимальное количество патентов.
+            max_patents (Optional[int]): Максимальное количество патентов.
+            region (Optional[str]): Регион хотя бы одного из патентов персоны.
+            filter_id (Optional[int]): Идентификатор фильтра по списку ИНН.
+            reg_date_from (Optional[date]): Дата регистрации лица не раньше.
+            reg_date_to (Optional[date]): Дата регистрации лица не позже.
+
+        Returns:
+            list: Список условий SQLAlchemy.
+        """
+        conditions = []
+        if kind is not None:
+            conditions.append(Person.kind == kind)
+        if active is not None:
+            conditions.append(Person.active == active)
+        if category is not None:
+            conditions.append(Person.category == self.CATEGORY_MAPPING.get(category))
+        if min_patents is not None:
+            conditions.append(Person.patent_count >= min_patents)
+        if max_patents is not None:
+            conditions.append(Person.patent_count <= max_patents)
+        if region is not None:
+            conditions.append(self.get_holder_condition([Patent.region == region]))
+        if filter_id is not None:
+            conditions.append(tax_number_in_filter(Person.tax_number, filter_id))
+        if reg_date_from is not None:
+            conditions.append(Person.reg_date >= reg_date_from)
+        if reg_date_to is not None:
+            conditions.append(Person.reg_date <= reg_date_to)
+        return conditions
+
+    def get_holder_condition(self, patent_conditions: list):
+        """
+        Условие EXISTS: персона владеет хотя бы одним патентом, удовлетворяющим условиям.
+
+        Args:
+            patent_conditions (list): Условия отбора патентов (см. CRUDPatent.get_filter_conditions).
+        """
+        return (
+            select(Ownership.patent_reg_number)
+            .join(Patent, (Ownership.patent_kind == Patent.kind) & (Ownership.patent_reg_number == Patent.reg_number))
+            .where(Ownership.person_tax_number == Person.tax_number, *patent_conditions)
+            .correlate(Person)
+            .exists()
+        )
+
+    def get_tax_numbers_query(self, person_conditions: list, patent_conditions: Optional[list] = None):
+        """
+        Запрос ИНН персон, удовлетворяющих условиям; используется для создания фильтров на стороне БД.
+
+        Args:
+            person_conditions (list): Условия отбора персон.
+            patent_conditions (Optional[list]): Если задано, персона должна владеть патентом,
+                удовлетворяющим этим условиям.
+        """
+        stmt = select(Person.tax_number).where(*person_conditions)
+        if patent_conditions is not None:
+            stmt = stmt.where(self.get_holder_condition(patent_conditions))
+        return stmt
+
+    def get_patent_counts_updates(self, tax_numbers: Optional[Iterable[str]] = None) -> list:
+        """
+        Запросы пересчета хранимых счетчиков патентов персон по таблице ownership.
+
+        Первый запрос записывает счетчики персонам, у которых есть патенты, второй обнуляет
+        счетчики персон, у которых патентов не осталось.
+
+        Args:
+            tax_numbers (Optional[Iterable[str]]): ИНН персон для пересчета; если не указаны, пересчитываются все.
+
+        Returns:
+            list: Список UPDATE-запросов, выполняемых по порядку в одной транзакции.
+        """
+        counts = (
+            select(
+                Ownership.person_tax_number.label("tax_number"),
+                func.count().label("patent_count"),
+                func.count().filter(Ownership.patent_kind == 1).label("invention_count"),
+                func.count().filter(Ownership.patent_kind == 2).label("utility_model_count"),
+                func.count().filter(Ownership.patent_kind == 3).label("industrial_design_count"),
+            )
+            .group_by(Ownership.person_tax_number)
+        )
+        reset = update(Person).where(
+            Person.patent_count != 0,
+            ~select(Ownership.person_tax_number)
+            .where(Ownership.person_tax_number == Person.tax_number)
+            .correlate(Person)
+            .exists()
+        )
+        if tax_numbers is not None:
+            tax_numbers = list(tax_numbers)
+            counts = counts.where(Ownership.person_tax_number.in_(tax_numbers))
+            reset = reset.where(Person.tax_number.in_(tax_numbers))
+        counts = counts.subquery()
+
+        return [
+            update(Person)
+            .where(Person.tax_number == counts.c.tax_number)
+            .values(
+                patent_count=counts.c.patent_count,
+                invention_count=counts.c.invention_count,
+                utility_model_count=counts.c.utility_model_count,
+                industrial_design_count=counts.c.industrial_design_count,
+            ),
+            reset.values(
+                patent_count=0,
+                invention_count=0,
+                utility_model_count=0,
+                industrial_design_count=0,
+            ),
+        ]
+
+    async def refresh_patent_counts(self, session: AsyncSession, tax_numbers: Optional[Iterable[str]] = None):
+        """
+        Пересчитывает счетчики патентов персон в текущей транзакции сессии (без commit).
+
+        Args:
+            session (AsyncSession): Асинхронная сессия базы данных.
+            tax_numbers (Optional[Iterable[str]]): ИНН персон для пересчета; если не указаны, пересчитываются все.
+        """
+        for stmt in self.get_patent_counts_updates(tax_numbers):
+            await session.execute(stmt, execution_options={"synchronize_session": False})
+
     async def get_persons_list(
             self, session: AsyncSession,
             page: int,
             pagesize: int,
-            kind: Optional[int] = None,
-            active: Optional[bool] = None,
-            category: Optional[int] = None
+            **filters
     ) -> Dict[str, int | list[dict[str, list | int | Any]]]:
         """
         Получает список персон, упорядоченных по убыванию количества принадлежащих им патентов.
 
+        Сортировка идет по хранимому счетчику patent_count с индексом, без агрегации таблицы ownership.
+
         Args:
             session (AsyncSession): Асинхронная сессия базы данных.
             page (int): Номер страницы для пагинации.
             pagesize (int): Количество элементов на странице.
+            **filters: Критерии отбора, см. get_filter_conditions; общее количество считается по ним же.
 
         Returns:
             Dict[str, int | list[dict[str, list | int | Any]]]: Список персон с дополнительной информацией.
         """
         skip = (page - 1) * pagesize
+        conditions = self.get_filter_conditions(**filters)
 
         stmt = (
             select(Person)
-            .outerjoin(Ownership, Ownership.person_tax_number == Person.tax_number)
-            .options(selectinload(Person.ownerships).selectinload(Ownership.patent))
-            .group_by(Person.tax_number)
-            .order_by(func.count(Ownership.patent_reg_number).desc())
+            .options(selectinload(Person.ownerships))
+            .where(*conditions)
+            .order_by(Person.patent_count.desc(), Person.tax_number)
             .offset(skip)
             .limit(pagesize)
         )
-        if kind is not None:
-            stmt = stmt.where(Person.kind == kind)
-        if active is not None:
-            stmt = stmt.where(Person.active == active)
-        if category is not None:
-            stmt = stmt.where(Person.category == self.CATEGORY_MAPPING.get(category))
 
         result = await session.execute(stmt)
         persons = result.scalars().all()
@@ -75,11 +222,10 @@ class CRUDPerson(CRUDBase):
                 **person.__dict__,
                 "category": person.category,
                 "patents": patents,
-                "patent_count": len(patents)
             })
 
         total = await session.execute(
-            select(func.count()).select_from(Person))
+            select(func.count()).select_from(Person).where(*conditions))
 
         return {
             "total": total.scalar(),
@@ -92,6 +238,9 @@ class CRUDPerson(CRUDBase):
         """
         Статистика по персонам.
 
+        Если включен снимок analytics_snapshot и он построен для текущей версии данных,
+        статистика считается в памяти без запросов к таблицам.
+
         Args:
         session (AsyncSession): асинхронная сессия базы данных.
         filter_id (Optional[int]): опциональный идентификатор загруженного фильтра по списку ИНН.
@@ -99,6 +248,10 @@ class CRUDPerson(CRUDBase):
         Returns:
             dict: словарь со статистикой.
         """
+        snapshot = await analytics_engine.get_snapshot(session)
+        if snapshot is not None:
+            return await snapshot.get_persons_stats(session, filter_id)
+
         stats = {}
 
         total_persons_stmt = (
@@ -107,11 +260,7 @@ class CRUDPerson(CRUDBase):
         if filter_id is not None:
             total_persons_stmt = (
                 total_persons_stmt
-                .join(
-                    FilterTaxNumber,
-                    Person.tax_number == FilterTaxNumber.tax_number
-                )
-                .filter_by(filter_id=filter_id)
+                .where(tax_number_in_filter(Person.tax_number, filter_id))
             )
         total_persons_res = await session.execute(total_persons_stmt)
         stats["total_persons"] = total_persons_res.scalar()
@@ -124,11 +273,7 @@ class CRUDPerson(CRUDBase):
         if filter_id is not None:
             by_kind_stmt = (
                 by_kind_stmt
-                .join(
-                    FilterTaxNumber,
-                    Person.tax_number == FilterTaxNumber.tax_number
-                )
-                .filter_by(filter_id=filter_id)
+                .where(tax_number_in_filter(Person.tax_number, filter_id))
             )
         by_kind_res = await session.execute(by_kind_stmt)
         stats["by_kind"] = {
@@ -144,11 +289,7 @@ class CRUDPerson(CRUDBase):
         if filter_id is not None:
             by_category_stmt = (
                 by_category_stmt
-                .join(
-                    FilterTaxNumber,
-                    Person.tax_number == FilterTaxNumber.tax_number
-                )
-                .filter_by(filter_id=filter_id)
+                .where(tax_number_in_filter(Person.tax_number, filter_id))
             )
         by_category_res = await session.execute(by_category_stmt)
         stats["by_category"] = {
@@ -159,41 +300,87 @@ class CRUDPerson(CRUDBase):
         return stats
 
 
-    async def get_person(self, session: AsyncSession, person_tax_number: str) -> dict[str, Any]:
+    async def get_persons(self, session: AsyncSession, tax_numbers: Sequence[str]) -> Dict[str, Dict[str, Any]]:
         """
-        Получает персону по идентификатору с дополнительной информацией.
+        Получает персоны по списку идентификаторов одним запросом с дополнительной информацией.
 
         Args:
             session (AsyncSession): Асинхронная сессия базы данных.
-            person_tax_number (str): Идентификатор персоны.
+            tax_numbers (Sequence[str]): Идентификаторы персон.
 
         Returns:
-            Dict[str, Any]: Словарь с информацией о персоне, включая список патентов и количество патентов.
+            Dict[str, Dict[str, Any]]: Найденные персоны по идентификатору, включая список патентов.
         """
+        if not tax_numbers:
+            return {}
+
         stmt = (
-            select(Person, func.count(Ownership.patent_reg_number).label("patent_count"))
-            .outerjoin(Ownership, Ownership.person_tax_number == Person.tax_number)
-            .options(selectinload(Person.ownerships).selectinload(Ownership.patent))
-            .group_by(Person.tax_number)
-            .where(Person.tax_number == person_tax_number)
+            select(Person)
+            .options(selectinload(Person.ownerships))
+            .where(Person.tax_number.in_(list(tax_numbers)))
         )
         result = await session.execute(stmt)
-        person, patent_count = result.unique().one_or_none()
-
-        patents = [
-            {
-                "kind": ownership.patent_kind,
-                "reg_number": ownership.patent_reg_number
-            }
-            for ownership in person.ownerships
-        ]
 
         return {
-            **person.__dict__,
-            "category": person.category,
-            "patents": patents,
-            "patent_count": len(patents),
+            person.tax_number: {
+                **person.__dict__,
+                "category": person.category,
+                "patents": [
+                    {
+                        "kind": ownership.patent_kind,
+                        "reg_number": ownership.patent_reg_number
+                    }
+                    for ownership in person.ownerships
+                ],
+            }
+            for person in result.scalars().all()
         }
 
+    async def get_cache_keys(self, session: AsyncSession, db_obj) -> List[str]:
+        """
+        Карточка персоны и карточки ее патентов, в которых показаны наименования правообладателей.
+        """
+        held = await session.execute(
+            select(Ownership.patent_kind, Ownership.patent_reg_number)
+            .where(Ownership.person_tax_number == db_obj.tax_number)
+        )
+        return [person_cache_key(db_obj.tax_number), *(patent_cache_key(*key) for key in held.all())]
+
+    @classmethod
+    def normalize_name(cls, value: str) -> str:
+        """Нормализует строку так же, как вычисляемая колонка Person.name_normalized."""
+        return value.lower().translate(cls.NAME_TRANSLATION).strip()
+
+    async def suggest(self, session: AsyncSession, q: str, limit: int = 10) -> list:
+        """
+        Подсказки для автодополнения по началу ИНН или фрагменту наименования.
+
+        Запрос из цифр ищется по префиксу ИНН (индекс text_pattern_ops), остальные - как подстрока
+        нормализованного наименования (триграммный GIN-индекс, нужно не меньше
+        SUGGEST_MIN_NAME_LENGTH символов). Результаты упорядочены по числу патентов.
+
+        Args:
+            session (AsyncSession): Асинхронная сессия базы данных.
+            q (str): Начало ИНН или фрагмент наименования.
+            limit (int): Количество подсказок.
+
+        Returns:
+            list: Список словарей с ИНН, наименованиями и числом патентов.
+        """
+        q = q.strip()
+        stmt = select(Person.tax_number, Person.full_name, Person.short_name, Person.patent_count)
+        if q.isdigit():
+            stmt = stmt.where(Person.tax_number.like(f"{q}%"))
+        else:
+            name = self.normalize_name(q)
+            if len(name) < self.SUGGEST_MIN_NAME_LENGTH:
+                return []
+            escaped = name.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            stmt = stmt.where(Person.name_normalized.like(f"%{escaped}%", escape="\\"))
+
+        stmt = stmt.order_by(Person.patent_count.desc(), Person.tax_number).limit(limit)
+        result = await session.execute(stmt)
+        return [dict(row) for row in result.mappings()]
+
 
 person_crud = CRUDPerson()
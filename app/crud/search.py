@@ -0,0 +1,168 @@
+from typing import Optional
+
+from sqlalchemy import func, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.filter import tax_number_in_filter
+from app.crud.patent import patent_crud
+from app.crud.person import person_crud
+from app.models import Patent, Person
+
+SEARCH_CONFIG = "russian"
+# Ранжируются только SEARCH_CANDIDATE_LIMIT совпадений, отобранных в стабильном порядке (самые новые патенты,
+# правообладатели с наибольшим числом патентов), чтобы запросы по частым словам не считали ts_rank
+# для сотен тысяч строк; для узких запросов это точное ранжирование.
+SEARCH_CANDIDATE_LIMIT = 2000
+HEADLINE_OPTIONS = "StartSel=<b>, StopSel=</b>, MaxWords=35, MinWords=15, MaxFragments=2"
+# Порядок результатов с равным рангом: (колонка, по убыванию).
+PATENT_TIEBREAK = (("kind", False), ("reg_number", False))
+PERSON_TIEBREAK = (("patent_count", True), ("tax_number", False))
+
+
+class CRUDSearch():
+    """
+    Полнотекстовый поиск по патентам и правообладателям через tsvector-колонки search_vector
+    и их GIN-индексы.
+    """
+
+    @staticmethod
+    def _order(subquery, tiebreak: tuple) -> list:
+        return [
+            subquery.c[name].desc() if descending else subquery.c[name]
+            for name, descending in tiebreak
+        ]
+
+    def _ranked(self, stmt, rank, candidate_order: tuple, tiebreak: tuple, limit: int):
+        """
+        Отбирает SEARCH_CANDIDATE_LIMIT кандидатов в порядке candidate_order (он должен быть однозначным)
+        и оставляет limit лучших по рангу; равные ранги упорядочиваются по колонкам tiebreak.
+        """
+        candidates = (
+            stmt.add_columns(rank.label("rank"))
+            .order_by(*candidate_order)
+            .limit(SEARCH_CANDIDATE_LIMIT)
+            .subquery()
+        )
+        return (
+            select(candidates)
+            .order_by(candidates.c.rank.desc(), *self._order(candidates, tiebreak))
+            .limit(limit)
+            .subquery()
+        )
+
+    async def search_patents(
+            self,
+            session: AsyncSession,
+            q: str,
+            limit: int,
+            kind: Optional[int] = None,
+            actual: Optional[bool] = None,
+            filter_id: Optional[int] = None
+    ) -> list:
+        """
+        Ищет патенты по названию, правообладателям и авторам.
+
+        Args:
+            session (AsyncSession): Асинхронная сессия базы данных.
+            q (str): Поисковый запрос в синтаксисе websearch_to_tsquery.
+            limit (int): Количество результатов.
+            kind (Optional[int]): Вид патента.
+            actual (Optional[bool]): Актуальность патента.
+            filter_id (Optional[int]): Идентификатор фильтра по списку ИНН правообладателей.
+
+        Returns:
+            list: Патенты по убыванию релевантности с подсвеченным названием.
+        """
+        query = func.websearch_to_tsquery(SEARCH_CONFIG, q)
+        ranked = self._ranked(
+            select(Patent.kind, Patent.reg_number, Patent.name, Patent.actual)
+            .where(Patent.search_vector.op("@@")(query), *patent_crud.get_filter_conditions(kind, actual, filter_id)),
+            func.ts_rank(Patent.search_vector, query),
+            (Patent.reg_date.desc().nullslast(), Patent.kind, Patent.reg_number),
+            PATENT_TIEBREAK,
+            limit
+        )
+        stmt = (
+            select(
+                ranked,
+                func.ts_headline(SEARCH_CONFIG, ranked.c.name, query, literal(HEADLINE_OPTIONS)).label("headline")
+            )
+            .order_by(ranked.c.rank.desc(), *self._order(ranked, PATENT_TIEBREAK))
+        )
+        result = await session.execute(stmt)
+        return [dict(row) for row in result.mappings()]
+
+    async def search_persons(
+            self,
+            session: AsyncSession,
+            q: str,
+            limit: int,
+            kind: Optional[int] = None,
+            actual: Optional[bool] = None,
+            filter_id: Optional[int] = None
+    ) -> list:
+        """
+        Ищет правообладателей по полному и сокращенному наименованию.
+
+        Ограничения kind и actual относятся к патентам: персона попадает в выдачу,
+        если владеет хотя бы одним подходящим патентом.
+
+        Args:
+            session (AsyncSession): Асинхронная сессия базы данных.
+            q (str): Поисковый запрос в синтаксисе websearch_to_tsquery.
+            limit (int): Количество результатов.
+            kind (Optional[int]): Вид патента.
+            actual (Optional[bool]): Актуальность патента.
+            filter_id (Optional[int]): Идентификатор фильтра по списку ИНН.
+
+        Returns:
+            list: Персоны по убыванию релевантности с подсвеченным наименованием.
+        """
+        query = func.websearch_to_tsquery(SEARCH_CONFIG, q)
+        conditions = [Person.search_vector.op("@@")(query)]
+        if filter_id is not None:
+            conditions.append(tax_number_in_filter(Person.tax_number, filter_id))
+        patent_conditions = patent_crud.get_filter_conditions(kind, actual)
+        if patent_conditions:
+            conditions.append(person_crud.get_holder_condition(patent_conditions))
+
+        ranked = self._ranked(
+            select(Person.tax_number, Person.full_name, Person.patent_count).where(*conditions),
+            func.ts_rank(Person.search_vector, query),
+            (Person.patent_count.desc(), Person.tax_number),
+            PERSON_TIEBREAK,
+            limit
+        )
+        stmt = (
+            select(
+                ranked,
+                func.ts_headline(SEARCH_CONFIG, ranked.c.full_name, query, literal(HEADLINE_OPTIONS)).label("headline")
+            )
+            .order_by(ranked.c.rank.desc(), *self._order(ranked, PERSON_TIEBREAK))
+        )
+        result = await session.execute(stmt)
+        return [dict(row) for row in result.mappings()]
+
+    async def search(
+            self,
+            session: AsyncSession,
+            q: str,
+            limit: int = 20,
+            kind: Optional[int] = None,
+            actual: Optional[bool] = None,
+            filter_id: Optional[int] = None
+    ) -> dict:
+        """
+        Ищет одновременно патенты и правообладателей.
+
+        Returns:
+            dict: Запрос и списки найденных патентов и персон.
+        """
+        return {
+            "query": q,
+            "patents": await self.search_patents(session, q, limit, kind, actual, filter_id),
+            "persons": await self.search_persons(session, q, limit, kind, actual, filter_id),
+        }
+
+
+search_crud = CRUDSearch()
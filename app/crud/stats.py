@@ -0,0 +1,120 @@
+from typing import List
+
+from sqlalchemy import delete, extract, func, insert, select, true, Integer
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.crud_base import CRUDBase
+from app.models import Ownership, Patent, Person
+from app.models.stats import StatsCube
+from app.schemas.stats import CubeDimension, StatsCubeQuery
+
+CUBE_DIMENSIONS = [dimension.value for dimension in CubeDimension]
+
+
+class CRUDStatsCube(CRUDBase):
+    def __init__(self):
+        super().__init__(StatsCube)
+
+    def get_refresh_statements(self) -> list:
+        """
+        Команды полной пересборки куба: одна строка на комбинацию измерений. Патент разворачивается
+        по различным категориям правообладателей; строка с наименьшей категорией отмечается is_primary.
+        """
+        categories = (
+            select(Ownership.patent_kind, Ownership.patent_reg_number, Person.category)
+            .join(Person, Person.tax_number == Ownership.person_tax_number)
+            .distinct()
+            .subquery()
+        )
+        holders = select(
+            categories,
+            (
+                func.row_number().over(
+                    partition_by=(categories.c.patent_kind, categories.c.patent_reg_number),
+                    order_by=categories.c.category.asc().nulls_last()
+                ) == 1
+            ).label("is_primary")
+        ).subquery()
+        dimensions = [
+            Patent.kind,
+            Patent.actual,
+            Patent.country_code,
+            Patent.region,
+            extract("year", Patent.reg_date).cast(Integer).label("reg_year"),
+            func.nullif(func.trim(func.split_part(Patent.category, ",", 1)), "").label("mpk_class"),
+            holders.c.category.label("holder_category"),
+            func.coalesce(holders.c.is_primary, true()).label("is_primary"),
+        ]
+        return [
+            delete(StatsCube),
+            insert(StatsCube).from_select(
+                CUBE_DIMENSIONS + ["is_primary", "patent_count"],
+                select(*dimensions, func.count())
+                .select_from(Patent)
+                .outerjoin(
+                    holders,
+                    (holders.c.patent_kind == Patent.kind) & (holders.c.patent_reg_number == Patent.reg_number)
+                )
+                .group_by(*dimensions)
+            ),
+        ]
+
+    def get_filter_conditions(self, query: StatsCubeQuery) -> list:
+        conditions = []
+        for dimension in (
+                CubeDimension.KIND, CubeDimension.ACTUAL, CubeDimension.COUNTRY_CODE, CubeDimension.REGION,
+                CubeDimension.MPK_CLASS, CubeDimension.HOLDER_CATEGORY
+        ):
+            value = getattr(query, dimension.value)
+            if value is not None:
+                conditions.append(getattr(StatsCube, dimension.value) == value)
+        if query.reg_year_from is not None:
+            conditions.append(StatsCube.reg_year >= query.reg_year_from)
+        if query.reg_year_to is not None:
+            conditions.append(StatsCube.reg_year <= query.reg_year_to)
+        return conditions
+
+    async def get_cube(self, session: AsyncSession, group_by: List[CubeDimension], query: StatsCubeQuery) -> dict:
+        """
+        Срез куба: количество патентов по выбранным измерениям с учетом условий.
+
+        Без holder_category в измерениях и условиях каждый патент учитывается один раз (строки is_primary),
+        иначе - в каждой категории своих правообладателей.
+
+        Args:
+            session (AsyncSession): Асинхронная сессия базы данных.
+            group_by (List[CubeDimension]): Измерения группировки (в порядке перечисления).
+            query (StatsCubeQuery): Условия по измерениям.
+
+        Returns:
+            dict: Измерения, общее количество и ячейки среза по убыванию количества.
+        """
+        group_by = list(dict.fromkeys(group_by))
+        columns = [getattr(StatsCube, dimension.value) for dimension in group_by]
+        conditions = self.get_filter_conditions(query)
+        if CubeDimension.HOLDER_CATEGORY not in group_by and query.holder_category is None:
+            conditions.append(StatsCube.is_primary)
+        patent_count = func.sum(StatsCube.patent_count).label("patent_count")
+        stmt = (
+            select(*columns, patent_count)
+            .where(*conditions)
+            .group_by(*columns)
+            .order_by(patent_count.desc(), *columns)
+        )
+        result = await session.execute(stmt)
+
+        items = [
+            {
+                "key": {dimension.value: row[index] for index, dimension in enumerate(group_by)},
+                "patent_count": row[-1] or 0,
+            }
+            for row in result.all()
+        ]
+        return {
+            "group_by": group_by,
+            "total": sum(item["patent_count"] for item in items),
+            "items": items,
+        }
+
+
+stats_cube_crud = CRUDStatsCube()
@@ -0,0 +1,186 @@
+import datetime
+import io
+import zipfile
+from decimal import Decimal
+from typing import Iterable, List
+from xml.sax.saxutils import escape, quoteattr
+
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+from openpyxl.utils import get_column_letter
+
+EXCEL_EPOCH = datetime.date(1899, 12, 30)
+
+CONTENT_TYPES_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '<Override PartName="/xl/styles.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    '</Types>'
+)
+
+ROOT_RELS_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+
+WORKBOOK_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name={title} sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+
+WORKBOOK_RELS_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '<Relationship Id="rId2" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+    'Target="styles.xml"/>'
+    '</Relationships>'
+)
+
+# Стили ячеек: 0 - общий, 1 - дата (numFmtId 14), 2 - дата и время (numFmtId 22).
+STYLES_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<fonts count="1"><font><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="3">'
+    '<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="14" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="22" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '</cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>'
+)
+
+SHEET_HEADER_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+
+SHEET_FOOTER_XML = '</sheetData></worksheet>'
+
+
+class ChunkSink(io.RawIOBase):
+    """
+    Несмещаемый (non-seekable) приемник байтов для потоковых писателей (zipfile, pyarrow):
+    записанное забирается порциями через drain().
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class XLSXStreamWriter:
+    """
+    Потоковая запись XLSX-файла с одним листом.
+
+    Строки кодируются в XML сразу при добавлении и сжимаются в zip-архив без временных файлов;
+    готовые байты архива забираются методом read() по мере записи, поэтому объем памяти
+    не зависит от числа строк.
+
+    Args:
+        sheet_title (str): Название листа.
+    """
+
+    def __init__(self, sheet_title: str = "Sheet1"):
+        self._sink = ChunkSink()
+        self._zip = zipfile.ZipFile(self._sink, mode="w", compression=zipfile.ZIP_DEFLATED)
+        self._zip.writestr("[Content_Types].xml", CONTENT_TYPES_XML)
+        self._zip.writestr("_rels/.rels", ROOT_RELS_XML)
+        self._zip.writestr("xl/workbook.xml", WORKBOOK_XML.format(title=quoteattr(sheet_title)))
+        self._zip.writestr("xl/_rels/workbook.xml.rels", WORKBOOK_RELS_XML)
+        self._zip.writestr("xl/styles.xml", STYLES_XML)
+        self._sheet = self._zip.open("xl/worksheets/sheet1.xml", mode="w", force_zip64=True)
+        self._sheet.write(SHEET_HEADER_XML.encode())
+        self._row_number = 0
+        self._columns: List[str] = []
+
+    def _column(self, index: int) -> str:
+        while len(self._columns) <= index:
+            self._columns.append(get_column_letter(len(self._columns) + 1))
+        return self._columns[index]
+
+    def _cell(self, ref: str, value) -> str:
+        if value is None:
+            return ""
+        if isinstance(value, bool):
+            return f'<c r="{ref}" t="b"><v>{int(value)}</v></c>'
+        if isinstance(value, (int, float, Decimal)):
+            return f'<c r="{ref}"><v>{value}</v></c>'
+        if isinstance(value, datetime.datetime):
+            delta = value - datetime.datetime.combine(EXCEL_EPOCH, datetime.time())
+            return f'<c r="{ref}" s="2"><v>{delta.total_seconds() / 86400}</v></c>'
+        if isinstance(value, datetime.date):
+            return f'<c r="{ref}" s="1"><v>{(value - EXCEL_EPOCH).days}</v></c>'
+
+        text = ILLEGAL_CHARACTERS_RE.sub("", str(value))
+        return f'<c r="{ref}" t="inlineStr"><is><t xml:space="preserve">{escape(text)}</t></is></c>'
+
+    def append(self, values: Iterable):
+        """Добавляет строку значений на лист."""
+        self._row_number += 1
+        row = self._row_number
+        cells = "".join(
+            self._cell(f"{self._column(index)}{row}", value)
+            for index, value in enumerate(values)
+        )
+        self._sheet.write(f'<row r="{row}">{cells}</row>'.encode())
+
+    def append_rows(self, rows: Iterable[Iterable]) -> bytes:
+        """
+        Добавляет партию строк и возвращает байты архива, записанные с предыдущего вызова read().
+
+        Кодирование и сжатие партии занимают процессор, поэтому метод рассчитан на вызов
+        в пуле потоков (run_in_threadpool).
+        """
+        for values in rows:
+            self.append(values)
+        return self.read()
+
+    def read(self) -> bytes:
+        """Возвращает байты архива, записанные с предыдущего вызова."""
+        return self._sink.drain()
+
+    def close(self) -> bytes:
+        """Завершает лист и архив и возвращает оставшиеся байты."""
+        self._sheet.write(SHEET_FOOTER_XML.encode())
+        self._sheet.close()
+        self._zip.close()
+        return self._sink.drain()
@@ -1,3 +1,5 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import os
@@ -8,8 +10,20 @@ sys.path.append(BASE_DIR)
 
 from app.core.config import settings
 from app.api.routers import main_router
+from app.core.warmup import cache_warmer
+from app.crud.dataset import generation_tracker
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    generation_tracker.start()
+    cache_warmer.start(app)
+    yield
+    await cache_warmer.stop()
+    await generation_tracker.stop()
+
 
-app = FastAPI(title=settings.app_title)
+app = FastAPI(title=settings.app_title, lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index, Text
 from sqlalchemy.orm import relationship
 
 from app.core.db import Base
@@ -42,9 +42,17 @@ class FilterTaxNumber(Base):
 
     Связи:
         filter (relationship): Связь "многие-к-одному" с моделью Filter.
+
+    Ограничения:
+        __table_args__: составной индекс (filter_id, tax_number) для проверки вхождения ИНН в фильтр.
     """
     id = Column(Integer, primary_key=True, index=True)
     filter_id = Column(Integer, ForeignKey('filter.id'), nullable=False)
     tax_number = Column(Text, nullable=False)
 
-    filter = relationship('Filter', back_populates='tax_numbers')
\ No newline at end of file
+    filter = relationship('Filter', back_populates='tax_numbers')
+
+    __table_args__ = (
+        Index('ix_filtertaxnumber_filter_id_tax_number', 'filter_id', 'tax_number'),
+        {},
+    )
@@ -0,0 +1,18 @@
+from sqlalchemy import BigInteger, Column, String
+
+from app.core.db import Base
+
+
+class DatasetGeneration(Base):
+    """
+    Счетчик поколений данных сущности.
+
+    Увеличивается в той же транзакции, что и запись в таблицы сущности (CRUD, фильтры, загрузчики CLI),
+    и рассылается воркерам через NOTIFY; входит в ключи кеша ответов.
+
+    Атрибуты:
+        entity (str): Имя сущности: patent, person, ownership, filter. Первичный ключ.
+        generation (int): Номер поколения, только растет.
+    """
+    entity = Column(String, primary_key=True)
+    generation = Column(BigInteger, nullable=False, default=0)
@@ -0,0 +1,24 @@
+from sqlalchemy import Column, Integer, String
+
+from app.core.db import Base
+
+
+class IpcNode(Base):
+    """
+    Узел иерархии МПК с предрассчитанным числом патентов.
+
+    Таблица пересобирается из Patent.mpk командой refresh-ipc-tree и после загрузки патентов.
+
+    Атрибуты:
+        code (str): Код узла: раздел (G), класс (G06), подкласс (G06F), основная группа (G06F16/00)
+            или подгруппа (G06F16/245). Первичный ключ.
+        parent (str): Код родительского узла, пусто у разделов. Индексируемый столбец.
+        level (int): Уровень иерархии от 1 (раздел) до 5 (подгруппа).
+        patent_count (int): Количество патентов с индексом, относящимся к узлу.
+        children_count (int): Количество дочерних узлов.
+    """
+    code = Column(String, primary_key=True)
+    parent = Column(String, index=True)
+    level = Column(Integer, nullable=False)
+    patent_count = Column(Integer, nullable=False, default=0)
+    children_count = Column(Integer, nullable=False, default=0)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, String, ForeignKeyConstraint
+from sqlalchemy import Column, Integer, ForeignKey, String, ForeignKeyConstraint, Index
 from sqlalchemy.orm import relationship
 
 from app.core.db import Base
@@ -17,7 +17,8 @@ class Ownership(Base):
 
     Ограничения:
        __table_args__: ForeignKeyConstraint, который связывает поля patent_kind и patent_reg_number
-                       с соответствующими полями в таблице 'patent'.
+                       с соответствующими полями в таблице 'patent'; индекс по person_tax_number
+                       для выборки патентов лица.
     """
     patent_kind = Column(Integer, primary_key=True)
     patent_reg_number = Column(Integer, primary_key=True)
@@ -30,5 +31,6 @@ class Ownership(Base):
             ['patent_kind', 'patent_reg_number'],
             ['patent.kind', 'patent.reg_number']
         ),
+        Index('ix_ownership_person_tax_number', 'person_tax_number'),
         {},
     )
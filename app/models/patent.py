@@ -1,5 +1,6 @@
-from sqlalchemy import Column, Integer, Date, String, Boolean, PrimaryKeyConstraint
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Computed, Integer, Date, String, Boolean, Index, PrimaryKeyConstraint
+from sqlalchemy.dialects.postgresql import ARRAY, TSVECTOR
+from sqlalchemy.orm import deferred, relationship
 
 from app.core.db import Base
 
@@ -19,15 +20,21 @@ class Patent(Base):
        actual (bool): Флаг актуальности патента, по умолчанию True.
        category (str): Категория патента.
        subcategory (str): Подкатегория патента.
+       mpk (list[str]): Уровни иерархии МПК всех индексов патента (раздел, класс, подкласс),
+           для отбора по префиксу МПК через GIN-индекс.
        kind (int): Тип патента. Не может быть пустым.
        country_code (str): Страна правообладателя (двухбуквенный код, например RU).
        region (str): Регион, связанный с патентом.
        city (str): Город, связанный с патентом.
        author_count (int): Количество авторов патента.
+       search_vector (tsvector): Вычисляемый вектор полнотекстового поиска (russian) по названию (вес A),
+           правообладателям (B) и авторам (C). Не загружается по умолчанию.
        ownerships (list[Ownership]): Связь с моделью Ownership, с каскадным удалением.
 
     Ограничения:
-       __table_args__: PrimaryKeyConstraint, который связывает поля kind и reg_number.
+       __table_args__: PrimaryKeyConstraint, который связывает поля kind и reg_number;
+           GIN-индексы по search_vector и mpk; BRIN-индексы по reg_date и appl_date;
+           индексы по region, city, country_code и author_count.
     """
     reg_number = Column(Integer, nullable=False, index=True)
     reg_date = Column(Date)
@@ -39,16 +46,34 @@ class Patent(Base):
     actual = Column(Boolean, default=True)
     category = Column(String)
     subcategory = Column(String)
+    mpk = Column(ARRAY(String))
     kind = Column(Integer, nullable=False)
     country_code = Column(String(length=10))
     region = Column(String)
     city = Column(String)
     author_count = Column(Integer)
+    search_vector = deferred(Column(
+        TSVECTOR,
+        Computed(
+            "setweight(to_tsvector('russian', coalesce(name, '')), 'A') || "
+            "setweight(to_tsvector('russian', coalesce(owner_raw, '')), 'B') || "
+            "setweight(to_tsvector('russian', coalesce(author_raw, '')), 'C')",
+            persisted=True
+        )
+    ))
 
     ownerships = relationship('Ownership', back_populates='patent', cascade="all, delete-orphan")
 
     __table_args__ = (
         PrimaryKeyConstraint('kind', 'reg_number'),
+        Index('ix_patent_search_vector', 'search_vector', postgresql_using='gin'),
+        Index('ix_patent_mpk', 'mpk', postgresql_using='gin'),
+        Index('ix_patent_reg_date_brin', 'reg_date', postgresql_using='brin'),
+        Index('ix_patent_appl_date_brin', 'appl_date', postgresql_using='brin'),
+        Index('ix_patent_region', 'region'),
+        Index('ix_patent_city', 'city'),
+        Index('ix_patent_country_code', 'country_code'),
+        Index('ix_patent_author_count', 'author_count'),
         {},
     )
 
@@ -1,8 +1,14 @@
-from sqlalchemy import Column, Integer, Date, String, Boolean
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Computed, Integer, Date, String, Boolean, Index
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import deferred, relationship
 
 from app.core.db import Base
 
+# Выражение должно совпадать с CRUDPerson.normalize_name, которым нормализуется строка запроса.
+NAME_NORMALIZED_SQL = (
+    "translate(lower(coalesce(short_name, '') || ' ' || coalesce(full_name, '')), 'ё«»\"', 'е')"
+)
+
 
 class Person(Base):
     """
@@ -18,7 +24,20 @@ class Person(Base):
        reg_date (Date): Дата регистрации лица.
        active (bool): Флаг активности лица, по умолчанию True.
        category (str): Категория лица.
+       patent_count (int): Количество патентов лица, поддерживается загрузчиками и операциями записи владения.
+       invention_count (int): Количество изобретений.
+       utility_model_count (int): Количество полезных моделей.
+       industrial_design_count (int): Количество промышленных образцов.
+       search_vector (tsvector): Вычисляемый вектор полнотекстового поиска (russian) по полному (вес A)
+           и сокращенному (B) наименованию. Не загружается по умолчанию.
+       name_normalized (str): Вычисляемое наименование для автодополнения: сокращенное и полное
+           наименования в нижнем регистре, "ё" заменена на "е", кавычки убраны. Не загружается по умолчанию.
        ownerships (list[Ownership]): Связь с моделью Ownership, с каскадным удалением.
+
+    Ограничения:
+       __table_args__: индекс (patent_count DESC, tax_number) для рейтинга правообладателей;
+           GIN-индекс по search_vector; триграммный GIN-индекс по name_normalized;
+           индекс text_pattern_ops по tax_number для поиска по префиксу ИНН; индекс по reg_date.
     """
     kind = Column(Integer, nullable=False)
     tax_number = Column(String, unique=True, index=True, primary_key=True)
@@ -29,4 +48,31 @@ class Person(Base):
     reg_date = Column(Date)
     active = Column(Boolean, default=True)
     category = Column(String)
-    ownerships = relationship('Ownership', back_populates='person', cascade="all, delete-orphan")
\ No newline at end of file
+    patent_count = Column(Integer, nullable=False, default=0, server_default='0')
+    invention_count = Column(Integer, nullable=False, default=0, server_default='0')
+    utility_model_count = Column(Integer, nullable=False, default=0, server_default='0')
+    industrial_design_count = Column(Integer, nullable=False, default=0, server_default='0')
+    search_vector = deferred(Column(
+        TSVECTOR,
+        Computed(
+            "setweight(to_tsvector('russian', coalesce(full_name, '')), 'A') || "
+            "setweight(to_tsvector('russian', coalesce(short_name, '')), 'B')",
+            persisted=True
+        )
+    ))
+    name_normalized = deferred(Column(String, Computed(NAME_NORMALIZED_SQL, persisted=True)))
+    ownerships = relationship('Ownership', back_populates='person', cascade="all, delete-orphan")
+
+    __table_args__ = (
+        Index('ix_person_patent_count', patent_count.desc(), tax_number),
+        Index('ix_person_search_vector', 'search_vector', postgresql_using='gin'),
+        Index(
+            'ix_person_name_normalized_trgm',
+            'name_normalized',
+            postgresql_using='gin',
+            postgresql_ops={'name_normalized': 'gin_trgm_ops'}
+        ),
+        Index('ix_person_tax_number_pattern', 'tax_number', postgresql_ops={'tax_number': 'text_pattern_ops'}),
+        Index('ix_person_reg_date', 'reg_date'),
+        {},
+    )
@@ -0,0 +1,37 @@
+from sqlalchemy import Boolean, Column, Integer, String, true
+
+from app.core.db import Base
+
+
+class StatsCube(Base):
+    """
+    Предагрегированный куб статистики патентов: количество патентов на каждую комбинацию измерений.
+
+    Патент попадает в одну строку на каждую различную категорию своих правообладателей, и ровно одна
+    из этих строк отмечена is_primary. Срезы без holder_category считаются суммированием строк is_primary;
+    в срезах по holder_category патент учитывается в каждой своей категории, поэтому сумма по категориям
+    может превышать число патентов. Таблица пересобирается после загрузок и командой refresh-stats-cube.
+
+    Атрибуты:
+        id (int): Уникальный идентификатор строки.
+        kind (int): Вид патента.
+        actual (bool): Актуальность патента.
+        country_code (str): Страна правообладателя.
+        region (str): Регион правообладателя.
+        reg_year (int): Год регистрации патента.
+        mpk_class (str): Основной (первый указанный) класс МПК.
+        holder_category (str): Категория правообладателя; пусто, если правообладатель не найден
+            или категория не указана.
+        is_primary (bool): Строка учитывается в срезах без holder_category (одна на патент).
+        patent_count (int): Количество патентов.
+    """
+    id = Column(Integer, primary_key=True)
+    kind = Column(Integer)
+    actual = Column(Boolean)
+    country_code = Column(String(length=10))
+    region = Column(String)
+    reg_year = Column(Integer)
+    mpk_class = Column(String)
+    holder_category = Column(String)
+    is_primary = Column(Boolean, nullable=False, default=True, server_default=true())
+    patent_count = Column(Integer, nullable=False)
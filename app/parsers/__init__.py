@@ -1,3 +1,4 @@
+from .filter import FilterParser
 from .ownership import OwnershipParser
 from .patent import PatentParser
 from .person import PersonParser
@@ -1,5 +1,7 @@
 import re
-from typing import Optional
+from typing import List, Optional
+
+MPK_CODE_RE = re.compile(r"([A-H])(\d{2})([A-Z])?(?:\s*(\d{1,4})\s*/\s*(\d{2,6}))?")
 
 
 def format_tax_number(tax_number: str) -> Optional[str]:
@@ -14,6 +16,22 @@ def format_tax_number(tax_number: str) -> Optional[str]:
     return tax_number
 
 
+def normalize_tax_number(value) -> Optional[str]:
+    if value is None:
+        return None
+
+    if isinstance(value, float):
+        if not value.is_integer():
+            return None
+        value = int(value)
+
+    tax_number = str(value).strip().strip('"\'')
+    if not tax_number.isdigit():
+        return None
+
+    return format_tax_number(tax_number)
+
+
 def reg_number_to_int(reg_number: Optional[str]) -> Optional[int]:
     if reg_number is None:
         return None
@@ -27,3 +45,31 @@ def reg_number_to_int(reg_number: Optional[str]) -> Optional[int]:
             return None
 
     return reg_number
+
+
+def parse_mpk_codes(mpk_raw: Optional[str]) -> Optional[List[str]]:
+    """
+    Разбирает строку индексов МПК вида "G06F 16/245(2019.01):H04L 9/00" в отсортированный
+    список уровней иерархии всех индексов: раздел (G), класс (G06), подкласс (G06F),
+    основная группа (G06F16/00) и подгруппа (G06F16/245).
+    """
+    if not mpk_raw:
+        return None
+
+    codes = set()
+    for code in mpk_raw.split(":"):
+        match = MPK_CODE_RE.match(code.strip().upper())
+        if match is None:
+            continue
+        section, class_number, subclass, group, subgroup = match.groups()
+        codes.update((section, f"{section}{class_number}"))
+        if not subclass:
+            continue
+        subclass = f"{section}{class_number}{subclass}"
+        codes.add(subclass)
+        if group:
+            codes.add(f"{subclass}{int(group)}/00")
+            if subgroup.strip("0"):
+                codes.add(f"{subclass}{int(group)}/{subgroup}")
+
+    return sorted(codes) or None
@@ -0,0 +1,69 @@
+import pathlib
+import re
+import tempfile
+from typing import IO, Iterator, List, Optional
+
+import openpyxl
+
+from app.parsers.common import normalize_tax_number
+
+
+class FilterParser():
+    """
+    Потоковый парсер файла со списком ИНН для фильтра.
+
+    Поддерживаются xlsx (первая колонка активного листа), csv и txt (первое поле каждой строки).
+    Строки без корректного ИНН (в том числе заголовок) пропускаются.
+    """
+    XLSX_CONTENT_TYPES = ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",)
+    TEXT_CONTENT_TYPES = ("text/csv", "text/plain", "application/csv", "application/vnd.ms-excel")
+    SUFFIXES = (".xlsx", ".csv", ".txt")
+    FIELD_SEPARATORS = re.compile(r"[,;\t]")
+
+    def __init__(self, file: IO[bytes], filename: Optional[str] = None, content_type: Optional[str] = None):
+        # SpooledTemporaryFile из UploadFile.file в Python 3.10 не реализует readable/seekable,
+        # которые нужны zipfile (openpyxl); читаем файл, в который он пишет. Ссылка на сам
+        # SpooledTemporaryFile сохраняется: при сборке мусора он закрывает этот файл.
+        self._source = file
+        self._file = file._file if isinstance(file, tempfile.SpooledTemporaryFile) else file
+        self._suffix = pathlib.Path(filename or "").suffix.lower()
+        self._content_type = content_type
+
+    @classmethod
+    def is_supported(cls, filename: Optional[str], content_type: Optional[str]) -> bool:
+        suffix = pathlib.Path(filename or "").suffix.lower()
+        if suffix:
+            return suffix in cls.SUFFIXES
+        return content_type in cls.XLSX_CONTENT_TYPES + cls.TEXT_CONTENT_TYPES
+
+    def _is_xlsx(self) -> bool:
+        if self._suffix:
+            return self._suffix == ".xlsx"
+        return self._content_type in self.XLSX_CONTENT_TYPES
+
+    def _iter_xlsx_values(self) -> Iterator:
+        workbook = openpyxl.load_workbook(self._file, read_only=True, data_only=True)
+        try:
+            for row in workbook.active.iter_rows(max_col=1, values_only=True):
+                if row:
+                    yield row[0]
+        finally:
+            workbook.close()
+
+    def _iter_text_values(self) -> Iterator[str]:
+        for raw in self._file:
+            line = raw.decode("utf-8-sig", errors="replace")
+            yield self.FIELD_SEPARATORS.split(line, 1)[0]
+
+    def parse(self) -> Iterator[str]:
+        self._file.seek(0)
+        values = self._iter_xlsx_values() if self._is_xlsx() else self._iter_text_values()
+
+        for value in values:
+            tax_number = normalize_tax_number(value)
+            if tax_number is not None:
+                yield tax_number
+
+    def read_tax_numbers(self) -> List[str]:
+        """Возвращает уникальные нормализованные ИНН в порядке их появления в файле."""
+        return list(dict.fromkeys(self.parse()))
@@ -6,7 +6,7 @@ from typing import Optional, Tuple
 
 import pandas as pd
 
-from app.parsers.common import reg_number_to_int
+from app.parsers.common import parse_mpk_codes, reg_number_to_int
 
 
 class PatentParser:
@@ -68,12 +68,13 @@ class PatentParser:
 
         kind = self._kind
 
-        category, subcategory = None, None
+        category, subcategory, mpk = None, None, None
         if kind in (1, 2):
             class_code = row.get("mpk")
             if class_code:
                 category = ", ".join([c.strip()[:3] for c in class_code.split(":")])
                 subcategory = ", ".join([c.strip()[:4] for c in class_code.split(":")])
+                mpk = parse_mpk_codes(class_code)
 
         country_code_regex = re.compile("\((?a:\w{2})\)")
         country_codes = Counter(country_code_regex.findall(owner_raw))
@@ -107,6 +108,7 @@ class PatentParser:
             actual=actual,
             category=category,
             subcategory=subcategory,
+            mpk=mpk,
             kind=kind,
             country_code=country_code,
             region=region,
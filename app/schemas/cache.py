@@ -0,0 +1,21 @@
+from typing import List
+
+from pydantic import BaseModel
+
+
+class EndpointCacheMetrics(BaseModel):
+    endpoint: str
+    hits: int
+    misses: int
+    evictions: int
+    coalesced: int
+    stale: int
+    not_modified: int
+
+
+class CacheMetrics(BaseModel):
+    backend: str
+    max_bytes: int
+    used_bytes: int
+    entries: int
+    endpoints: List[EndpointCacheMetrics]
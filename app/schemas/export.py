@@ -0,0 +1,38 @@
+from datetime import datetime
+from enum import Enum
+from typing import Optional
+
+from pydantic import BaseModel
+
+from app.schemas.patent import ExportFormat
+
+
+class ExportJobStatus(str, Enum):
+    """
+    Состояния задачи выгрузки.
+    """
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+
+class ExportJobCreate(BaseModel):
+    format: ExportFormat = ExportFormat.XLSX
+    filter_id: Optional[int] = None
+    actual: Optional[str] = None
+    kind: Optional[int] = None
+
+
+class ExportJobDB(BaseModel):
+    id: str
+    status: ExportJobStatus
+    params: ExportJobCreate
+    dataset_version: str
+    rows_total: Optional[int] = None
+    rows_written: int = 0
+    progress: int = 0
+    size: Optional[int] = None
+    error: Optional[str] = None
+    created: datetime
+    updated: datetime
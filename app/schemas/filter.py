@@ -1,6 +1,8 @@
-from datetime import datetime
+from datetime import date, datetime
+from enum import Enum
+from typing import List, Optional, Union
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, model_validator
 
 
 class FilterBase(BaseModel):
@@ -19,3 +21,101 @@ class FilterDB(FilterBase):
 
     class Config:
         orm_mode = True
+
+
+class FilterSetOperation(str, Enum):
+    """
+    Операции над множествами ИНН фильтров:
+    union - объединение,
+    intersection - пересечение,
+    difference - разность (из первого операнда вычитаются все остальные).
+    """
+    UNION = "union"
+    INTERSECTION = "intersection"
+    DIFFERENCE = "difference"
+
+
+FILTER_EXPRESSION_MAX_OPERANDS = 50
+FILTER_EXPRESSION_MAX_DEPTH = 5
+
+
+class FilterExpression(BaseModel):
+    operation: FilterSetOperation
+    operands: List[Union[int, "FilterExpression"]] = Field(min_length=2)
+
+    @model_validator(mode="after")
+    def check_size(self):
+        if self.depth() > FILTER_EXPRESSION_MAX_DEPTH:
+            raise ValueError(f"Вложенность выражения не должна превышать {FILTER_EXPRESSION_MAX_DEPTH}")
+        if self.operand_count() > FILTER_EXPRESSION_MAX_OPERANDS:
+            raise ValueError(f"Выражение не должно содержать более {FILTER_EXPRESSION_MAX_OPERANDS} операндов")
+        return self
+
+    def depth(self) -> int:
+        return 1 + max((operand.depth() for operand in self.operands if not isinstance(operand, int)), default=0)
+
+    def operand_count(self) -> int:
+        """Число операндов на всех уровнях выражения."""
+        return sum(1 if isinstance(operand, int) else 1 + operand.operand_count() for operand in self.operands)
+
+    def filter_ids(self) -> set[int]:
+        ids = set()
+        for operand in self.operands:
+            if isinstance(operand, int):
+                ids.add(operand)
+            else:
+                ids |= operand.filter_ids()
+        return ids
+
+    def __str__(self) -> str:
+        return f"{self.operation.value}({', '.join(str(operand) for operand in self.operands)})"
+
+
+class FilterCombine(BaseModel):
+    name: str
+    expression: FilterExpression
+
+
+class PersonsQuery(BaseModel):
+    """Критерии отбора персон, как у /persons."""
+    kind: Optional[int] = None
+    active: Optional[bool] = None
+    category: Optional[int] = None
+    min_patents: Optional[int] = None
+    max_patents: Optional[int] = None
+    region: Optional[str] = None
+    filter_id: Optional[int] = None
+    reg_date_from: Optional[date] = None
+    reg_date_to: Optional[date] = None
+
+
+class PatentsQuery(BaseModel):
+    """Критерии отбора патентов, как у /patents; в фильтр попадают их правообладатели."""
+    kind: Optional[int] = None
+    actual: Optional[bool] = None
+    filter_id: Optional[int] = None
+    reg_date_from: Optional[date] = None
+    reg_date_to: Optional[date] = None
+    appl_date_from: Optional[date] = None
+    appl_date_to: Optional[date] = None
+    region: Optional[str] = None
+    city: Optional[str] = None
+    country_code: Optional[str] = None
+    mpk: Optional[str] = None
+    min_authors: Optional[int] = None
+    max_authors: Optional[int] = None
+
+
+class FilterFromQuery(BaseModel):
+    name: str
+    persons: Optional[PersonsQuery] = None
+    patents: Optional[PatentsQuery] = None
+
+    @model_validator(mode="after")
+    def check_criteria(self):
+        if self.persons is None and self.patents is None:
+            raise ValueError("Нужно указать критерии persons и/или patents")
+        return self
+
+    def describe(self) -> str:
+        return self.json(exclude={"name"}, exclude_none=True)
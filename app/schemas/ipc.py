@@ -0,0 +1,19 @@
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+
+class IpcNodeDB(BaseModel):
+    code: str
+    parent: Optional[str] = None
+    level: int
+    patent_count: int
+    children_count: int
+
+    class Config:
+        orm_mode = True
+
+
+class IpcTree(BaseModel):
+    parent: Optional[str] = None
+    items: List[IpcNodeDB]
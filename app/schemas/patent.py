@@ -1,5 +1,5 @@
 from datetime import date
-from enum import IntEnum
+from enum import Enum, IntEnum
 from typing import Dict, List, Optional
 
 from pydantic import BaseModel
@@ -17,6 +17,20 @@ class KindEnum(IntEnum):
     INDUSTRIAL_DESIGN = 3
 
 
+class ExportFormat(str, Enum):
+    """
+    Форматы выгрузки патентов.
+    """
+    XLSX = "xlsx"
+    CSV = "csv"
+    PARQUET = "parquet"
+
+
+class PatentKey(BaseModel):
+    kind: int
+    reg_number: int
+
+
 class PatentHolder(BaseModel):
     full_name: str
     tax_number: str
@@ -33,6 +47,7 @@ class PatentBase(BaseModel):
     actual: bool | str
     category: Optional[str] = None
     subcategory: Optional[str] = None
+    mpk: Optional[List[str]] = None
     kind: int
     author_count: int
     country_code: Optional[str] = None
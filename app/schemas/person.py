@@ -52,6 +52,9 @@ class PersonAdditionalFields(PersonBase):
     category: str
     patents: list[PersonPatents] = []
     patent_count: int = 0
+    invention_count: int = 0
+    utility_model_count: int = 0
+    industrial_design_count: int = 0
 
     class Config:
         orm_mode = True
@@ -66,6 +69,13 @@ class PersonsList(BaseModel):
     total: int
     items: List[PersonAdditionalFields]
 
+class PersonSuggestion(BaseModel):
+    tax_number: str
+    full_name: Optional[str] = None
+    short_name: Optional[str] = None
+    patent_count: int = 0
+
+
 class PersonsStats(BaseModel):
     total_persons: int
     by_kind: Dict[int, int]
@@ -0,0 +1,26 @@
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+
+class PatentSearchItem(BaseModel):
+    kind: int
+    reg_number: int
+    name: Optional[str] = None
+    actual: Optional[bool] = None
+    rank: float
+    headline: Optional[str] = None
+
+
+class PersonSearchItem(BaseModel):
+    tax_number: str
+    full_name: Optional[str] = None
+    patent_count: int = 0
+    rank: float
+    headline: Optional[str] = None
+
+
+class SearchResults(BaseModel):
+    query: str
+    patents: List[PatentSearchItem]
+    persons: List[PersonSearchItem]
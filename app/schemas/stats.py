@@ -0,0 +1,40 @@
+from enum import Enum
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel
+
+
+class CubeDimension(str, Enum):
+    """
+    Измерения куба статистики патентов.
+    """
+    KIND = "kind"
+    ACTUAL = "actual"
+    COUNTRY_CODE = "country_code"
+    REGION = "region"
+    REG_YEAR = "reg_year"
+    MPK_CLASS = "mpk_class"
+    HOLDER_CATEGORY = "holder_category"
+
+
+class StatsCubeQuery(BaseModel):
+    """Условия среза куба; пустое значение означает отсутствие условия."""
+    kind: Optional[int] = None
+    actual: Optional[bool] = None
+    country_code: Optional[str] = None
+    region: Optional[str] = None
+    reg_year_from: Optional[int] = None
+    reg_year_to: Optional[int] = None
+    mpk_class: Optional[str] = None
+    holder_category: Optional[str] = None
+
+
+class StatsCubeCell(BaseModel):
+    key: Dict[str, Any]
+    patent_count: int
+
+
+class StatsCube(BaseModel):
+    group_by: List[CubeDimension]
+    total: int
+    items: List[StatsCubeCell]
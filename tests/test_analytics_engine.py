@@ -0,0 +1,73 @@
+import asyncio
+from types import SimpleNamespace
+
+import pandas as pd
+
+from app.crud.analytics import AnalyticsEngine, AnalyticsSnapshot
+from app.crud.dataset import PATENT_DATA_ENTITIES, generation_tracker
+
+
+class FilterSession():
+    """Сессия, отдающая состав фильтра и считающая запросы."""
+
+    def __init__(self, tax_numbers):
+        self.tax_numbers = tax_numbers
+        self.calls = 0
+
+    async def execute(self, statement):
+        self.calls += 1
+        return SimpleNamespace(scalars=lambda: SimpleNamespace(all=lambda: self.tax_numbers))
+
+
+def make_snapshot(version: str) -> AnalyticsSnapshot:
+    patents = pd.DataFrame({
+        "kind": [1, 1], "reg_number": [10, 20], "actual": [True, False], "country_code": ["RU", "RU"],
+        "region": ["Москва", None], "author_count": [1, 3], "reg_date": ["2020-01-01", None],
+    })
+    persons = pd.DataFrame({"tax_number": ["1111", "2222"], "kind": [1, 2], "category": ["Вуз", None]})
+    ownerships = pd.DataFrame({
+        "patent_kind": [1, 1], "patent_reg_number": [10, 20], "person_tax_number": ["1111", "2222"]
+    })
+    return AnalyticsSnapshot(version, patents, persons, ownerships)
+
+
+def make_engine(monkeypatch) -> AnalyticsEngine:
+    engine = AnalyticsEngine(enabled=True, check_interval=60)
+    engine._snapshot = make_snapshot(generation_tracker.key(PATENT_DATA_ENTITIES))
+
+    async def load(version):
+        pass
+
+    monkeypatch.setattr(engine, "_load", load)
+    return engine
+
+
+def test_filter_change_keeps_snapshot_and_resets_masks(generations, monkeypatch):
+    engine = make_engine(monkeypatch)
+    session = FilterSession(["1111"])
+
+    async def scenario():
+        snapshot = await engine.get_snapshot(None)
+        assert snapshot is engine._snapshot
+        assert list(await snapshot.get_filter_mask(session, 1)) == [True, False]
+        await snapshot.get_filter_mask(session, 1)
+        assert session.calls == 1
+
+        generations["filter"] += 1
+        session.tax_numbers = []
+        assert await engine.get_snapshot(None) is snapshot
+        assert list(await snapshot.get_filter_mask(session, 1)) == [False, False]
+        assert session.calls == 2
+
+    asyncio.run(scenario())
+
+
+def test_data_change_rebuilds_snapshot(generations, monkeypatch):
+    engine = make_engine(monkeypatch)
+
+    async def scenario():
+        assert await engine.get_snapshot(None) is not None
+        generations["ownership"] += 1
+        assert await engine.get_snapshot(None) is None
+
+    asyncio.run(scenario())
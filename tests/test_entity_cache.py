@@ -0,0 +1,114 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from pydantic import BaseModel
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.core.cache import EntityCache
+from app.crud.dataset import generation_tracker, invalidate_entities
+
+
+class Card(BaseModel):
+    name: str
+
+
+@pytest.fixture
+def rows():
+    return {1: {"name": "first"}, 2: {"name": "second"}}
+
+
+@pytest.fixture
+def loads(rows):
+    calls = []
+
+    async def load(ids):
+        calls.append(list(ids))
+        return {entity_id: rows[entity_id] for entity_id in ids if entity_id in rows}
+
+    load.calls = calls
+    return load
+
+
+@pytest.fixture
+def entity_cache(generations):
+    return EntityCache("card", Card, lambda entity_id: f"card:{entity_id}")
+
+
+async def write(rows, entity_id, name, commit=True):
+    """Изменение строки с инвалидацией карточки в транзакции синхронной сессии."""
+    with Session(create_engine("sqlite://")) as session:
+        session.begin()
+        await invalidate_entities(SimpleNamespace(info=session.info, execute=_execute), f"card:{entity_id}")
+        if commit:
+            rows[entity_id] = {"name": name}
+            session.commit()
+        else:
+            session.rollback()
+
+
+async def _execute(statement):
+    pass
+
+
+def test_misses_are_loaded_once_and_absent_entities_cached(entity_cache, loads):
+    async def scenario():
+        first = await entity_cache.get_many([1, 3], loads)
+        second = await entity_cache.get_many([1, 3], loads)
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first == second == {1: b'{"name":"first"}', 3: None}
+    assert loads.calls == [[1, 3]]
+
+
+def test_read_right_after_commit_sees_new_card(entity_cache, loads, rows):
+    async def scenario():
+        await entity_cache.get_many([1], loads)
+        await write(rows, 1, "renamed")
+        # Удаление записи из кеша еще не выполнено: ключ должен читаться как промах.
+        return await entity_cache.get_many([1, 2], loads)
+
+    assert asyncio.run(scenario()) == {1: b'{"name":"renamed"}', 2: b'{"name":"second"}'}
+
+
+def test_rolled_back_write_does_not_invalidate(entity_cache, loads, rows):
+    async def scenario():
+        await entity_cache.get_many([1], loads)
+        await write(rows, 1, "renamed", commit=False)
+        await asyncio.sleep(0)
+        return await entity_cache.get_many([1], loads)
+
+    assert asyncio.run(scenario()) == {1: b'{"name":"first"}'}
+    assert loads.calls == [[1]]
+
+
+def test_load_overlapping_invalidation_is_not_stored(entity_cache, rows):
+    async def load(ids):
+        result = {entity_id: dict(rows[entity_id]) for entity_id in ids}
+        await write(rows, 1, "renamed")
+        # Инвалидация обработана и запись удалена до того, как загрузка вернула прочитанные данные.
+        await asyncio.sleep(0.01)
+        return result
+
+    async def scenario():
+        stale = await entity_cache.get_many([1], load)
+        await asyncio.sleep(0)
+        return stale, await entity_cache.cache.get("card:1")
+
+    stale, stored = asyncio.run(scenario())
+    assert stale == {1: b'{"name":"first"}'}
+    assert stored is None
+
+
+def test_cache_is_bypassed_until_generations_are_loaded(entity_cache, loads):
+    generation_tracker.loaded.clear()
+
+    async def scenario():
+        await entity_cache.get_many([1], loads)
+        await entity_cache.get_many([1], loads)
+        return await entity_cache.cache.get("card:1")
+
+    assert asyncio.run(scenario()) is None
+    assert loads.calls == [[1], [1]]
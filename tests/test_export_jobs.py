@@ -0,0 +1,109 @@
+import asyncio
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from app.crud.export_jobs import export_jobs
+from app.schemas.export import ExportJobCreate, ExportJobDB, ExportJobStatus
+
+ARTIFACT = bytes(range(256)) * 4
+
+
+class VersionSession():
+    """Сессия с поколениями сущностей и строками фильтров."""
+
+    def __init__(self):
+        self.generations = {"patent": 1, "person": 1, "ownership": 1, "filter": 1}
+        self.filters = {7: SimpleNamespace(created=datetime(2024, 5, 1, 12), tax_numbers_count=10)}
+
+    async def execute(self, statement, params=None):
+        if params is not None:
+            return SimpleNamespace(all=lambda: list(self.generations.items()))
+        filter_id = statement.whereclause.right.value
+        return SimpleNamespace(first=lambda: self.filters.get(filter_id))
+
+
+def get_version(session, **params) -> str:
+    return asyncio.run(export_jobs.get_dataset_version(session, ExportJobCreate(**params)))
+
+
+def test_dataset_version_ignores_other_filters():
+    session = VersionSession()
+    without_filter, with_filter = get_version(session), get_version(session, filter_id=7)
+
+    session.generations["filter"] += 1
+    session.filters[8] = SimpleNamespace(created=datetime(2024, 5, 2), tax_numbers_count=1)
+    assert get_version(session) == without_filter
+    assert get_version(session, filter_id=7) == with_filter
+
+    del session.filters[7]
+    assert get_version(session, filter_id=7) != with_filter
+
+    session.generations["ownership"] += 1
+    assert get_version(session) != without_filter
+
+
+@pytest.fixture
+def done_job(tmp_path, monkeypatch):
+    monkeypatch.setattr(export_jobs, "jobs_dir", tmp_path / "jobs")
+    monkeypatch.setattr(export_jobs, "artifacts_dir", tmp_path / "artifacts")
+    export_jobs.jobs_dir.mkdir()
+    export_jobs.artifacts_dir.mkdir()
+    now = datetime.now(timezone.utc)
+    job = ExportJobDB(
+        id="a" * 64, status=ExportJobStatus.DONE, params=ExportJobCreate(format="csv"),
+        dataset_version="1.1.1", created=now, updated=now
+    )
+    export_jobs._save(job)
+    export_jobs.get_artifact_path(job).write_bytes(ARTIFACT)
+    return job
+
+
+def download(client, job, range_header=None):
+    headers = {"Range": range_header} if range_header else {}
+    return client.get(f"/exports/{job.id}/download", headers=headers)
+
+
+def test_download_whole_file(client, done_job):
+    response = download(client, done_job)
+    assert response.status_code == 200
+    assert response.content == ARTIFACT
+    assert response.headers["accept-ranges"] == "bytes"
+    assert response.headers["content-length"] == str(len(ARTIFACT))
+
+
+@pytest.mark.parametrize("range_header, start, end", [
+    ("bytes=0-99", 0, 99),
+    ("bytes=1000-", 1000, 1023),
+    ("bytes=-24", 1000, 1023),
+    ("bytes=1000-5000", 1000, 1023),
+])
+def test_download_range(client, done_job, range_header, start, end):
+    response = download(client, done_job, range_header)
+    assert response.status_code == 206
+    assert response.content == ARTIFACT[start:end + 1]
+    assert response.headers["content-range"] == f"bytes {start}-{end}/{len(ARTIFACT)}"
+
+
+def test_download_unsatisfiable_range(client, done_job):
+    response = download(client, done_job, "bytes=2000-")
+    assert response.status_code == 416
+    assert response.headers["content-range"] == f"bytes */{len(ARTIFACT)}"
+
+
+def test_download_unparsed_range_returns_whole_file(client, done_job):
+    response = download(client, done_job, "bytes=0-1,5-6")
+    assert response.status_code == 200
+    assert response.content == ARTIFACT
+
+
+def test_download_not_ready(client, done_job):
+    done_job.status = ExportJobStatus.RUNNING
+    export_jobs._save(done_job)
+    assert download(client, done_job).status_code == 409
+
+
+def test_download_evicted_artifact(client, done_job):
+    export_jobs.get_artifact_path(done_job).unlink()
+    assert download(client, done_job).status_code == 404
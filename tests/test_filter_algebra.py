@@ -0,0 +1,86 @@
+import pytest
+from pydantic import ValidationError
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+
+from app.crud.filter import filter_crud
+from app.models.filter import Filter, FilterTaxNumber
+from app.schemas.filter import FILTER_EXPRESSION_MAX_DEPTH, FILTER_EXPRESSION_MAX_OPERANDS, FilterExpression
+
+FILTERS = {
+    1: {"1", "2", "3"},
+    2: {"2", "3", "4"},
+    3: {"3", "5"},
+}
+
+
+@pytest.fixture(scope="module")
+def session():
+    engine = create_engine("sqlite://")
+    Filter.metadata.create_all(engine, tables=[Filter.__table__, FilterTaxNumber.__table__])
+    with Session(engine) as session:
+        for filter_id, tax_numbers in FILTERS.items():
+            session.execute(insert(Filter).values(id=filter_id, name=f"f{filter_id}", filename="", tax_numbers_count=0))
+            session.execute(insert(FilterTaxNumber), [
+                {"filter_id": filter_id, "tax_number": tax_number} for tax_number in tax_numbers
+            ])
+        yield session
+
+
+def evaluate(session, expression: dict) -> set:
+    stmt = filter_crud._expression_select(FilterExpression.model_validate(expression))
+    return set(session.execute(stmt).scalars().all())
+
+
+@pytest.mark.parametrize("expression, expected", [
+    ({"operation": "union", "operands": [1, 2]}, FILTERS[1] | FILTERS[2]),
+    ({"operation": "intersection", "operands": [1, 2, 3]}, FILTERS[1] & FILTERS[2] & FILTERS[3]),
+    ({"operation": "difference", "operands": [1, 2, 3]}, FILTERS[1] - FILTERS[2] - FILTERS[3]),
+    (
+        {"operation": "difference", "operands": [{"operation": "union", "operands": [1, 3]}, 2]},
+        (FILTERS[1] | FILTERS[3]) - FILTERS[2]
+    ),
+    (
+        {"operation": "intersection", "operands": [
+            {"operation": "union", "operands": [1, 3]},
+            {"operation": "difference", "operands": [2, 1]},
+        ]},
+        (FILTERS[1] | FILTERS[3]) & (FILTERS[2] - FILTERS[1])
+    ),
+])
+def test_expression_select(session, expression, expected):
+    assert evaluate(session, expression) == expected
+
+
+def test_expression_helpers():
+    expression = FilterExpression.model_validate(
+        {"operation": "difference", "operands": [{"operation": "union", "operands": [1, 3]}, 2]}
+    )
+    assert expression.filter_ids() == {1, 2, 3}
+    assert expression.depth() == 2
+    assert expression.operand_count() == 4
+    assert str(expression) == "difference(union(1, 3), 2)"
+
+
+def test_expression_needs_two_operands():
+    with pytest.raises(ValidationError):
+        FilterExpression.model_validate({"operation": "union", "operands": [1]})
+
+
+def test_expression_depth_limit():
+    expression = {"operation": "union", "operands": [1, 2]}
+    for _ in range(FILTER_EXPRESSION_MAX_DEPTH - 1):
+        expression = {"operation": "union", "operands": [expression, 1]}
+    FilterExpression.model_validate(expression)
+
+    with pytest.raises(ValidationError, match="Вложенность"):
+        FilterExpression.model_validate({"operation": "union", "operands": [expression, 1]})
+
+
+def test_expression_operand_limit():
+    FilterExpression.model_validate({"operation": "union", "operands": list(range(FILTER_EXPRESSION_MAX_OPERANDS))})
+
+    with pytest.raises(ValidationError, match="операндов"):
+        FilterExpression.model_validate(
+            {"operation": "union", "operands": list(range(FILTER_EXPRESSION_MAX_OPERANDS + 1))}
+        )
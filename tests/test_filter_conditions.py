@@ -0,0 +1,47 @@
+from sqlalchemy import Column, MetaData, Table, Text, create_engine, insert, select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+
+from app.crud.filter import patent_in_filter, tax_number_in_filter
+from app.models import Ownership, Patent
+from app.models.filter import Filter, FilterTaxNumber
+
+holders = Table("holder", MetaData(), Column("tax_number", Text))
+
+
+def compile_sql(stmt) -> str:
+    sql = str(stmt.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+    return " ".join(sql.split())
+
+
+def test_tax_number_in_filter_selects_members():
+    engine = create_engine("sqlite://")
+    Filter.metadata.create_all(engine, tables=[Filter.__table__, FilterTaxNumber.__table__])
+    holders.create(engine)
+    with Session(engine) as session:
+        session.execute(insert(Filter).values(id=1, name="f", filename="", tax_numbers_count=2))
+        session.execute(insert(FilterTaxNumber), [{"filter_id": 1, "tax_number": "1"}, {"filter_id": 1, "tax_number": "3"}])
+        session.execute(insert(holders), [{"tax_number": str(number)} for number in range(5)])
+
+        stmt = select(holders.c.tax_number).where(tax_number_in_filter(holders.c.tax_number, 1))
+        assert sorted(session.execute(stmt).scalars()) == ["1", "3"]
+        stmt = select(holders.c.tax_number).where(~tax_number_in_filter(holders.c.tax_number, 1))
+        assert sorted(session.execute(stmt).scalars()) == ["0", "2", "4"]
+
+
+def test_patent_in_filter_correlates_to_outer_patent():
+    # Внешний запрос сам соединяет ownership: условие должно использовать свой псевдоним владения
+    # и ссылаться на патент внешнего запроса.
+    stmt = (
+        select(Patent.reg_number)
+        .join(Ownership, Ownership.patent_reg_number == Patent.reg_number)
+        .where(patent_in_filter(5))
+    )
+    sql = compile_sql(stmt)
+
+    exists = sql[sql.index("EXISTS"):]
+    assert "FROM ownership AS ownership_1" in exists
+    assert "ownership_1.patent_kind = patent.kind" in exists
+    assert "filtertaxnumber.filter_id = 5" in exists
+    assert "filtertaxnumber.tax_number = ownership_1.person_tax_number" in exists
+    assert " IN (" not in sql
@@ -0,0 +1,65 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.crud.filter import filter_crud
+
+
+@pytest.fixture
+def created(monkeypatch):
+    """Подменяет создание фильтра: сохраняет описание и SQL запроса ИНН."""
+    calls = []
+
+    async def create_filter_from_select(session, filter_data, tax_numbers_stmt):
+        sql = str(tax_numbers_stmt.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+        calls.append((filter_data, " ".join(sql.split())))
+        return {
+            "id": 1, "name": filter_data.name, "filename": filter_data.filename,
+            "created": datetime(2024, 1, 1), "tax_numbers_count": 0
+        }
+
+    monkeypatch.setattr(filter_crud, "create_filter_from_select", create_filter_from_select)
+    return calls
+
+
+def test_filter_from_person_criteria(client, created):
+    response = client.post("/filters/from-query", json={"name": "вузы", "persons": {"kind": 1, "min_patents": 5}})
+
+    assert response.status_code == 201
+    filter_data, sql = created[0]
+    assert filter_data.name == "вузы"
+    assert filter_data.filename == '{"persons":{"kind":1,"min_patents":5}}'
+    assert sql.startswith("SELECT person.tax_number FROM person WHERE")
+    assert "person.kind = 1" in sql
+    assert "person.patent_count >= 5" in sql
+    assert "ownership" not in sql
+
+
+def test_filter_from_patent_criteria_selects_holders(client, created):
+    response = client.post("/filters/from-query", json={"name": "изобретения", "patents": {"kind": 1, "filter_id": 7}})
+
+    assert response.status_code == 201
+    _, sql = created[0]
+    assert sql.startswith("SELECT person.tax_number FROM person WHERE EXISTS (SELECT ownership.patent_reg_number")
+    assert "ownership.person_tax_number = person.tax_number" in sql
+    assert "patent.kind = 1" in sql
+    assert "filtertaxnumber.filter_id = 7" in sql
+
+
+def test_filter_from_both_criteria(client, created):
+    response = client.post("/filters/from-query", json={
+        "name": "оба", "persons": {"category": 1}, "patents": {"region": "Москва"}
+    })
+
+    assert response.status_code == 201
+    _, sql = created[0]
+    assert "person.category = 'ВУЗ'" in sql
+    assert "patent.region = 'Москва'" in sql
+
+
+def test_filter_from_query_requires_criteria(client, created):
+    response = client.post("/filters/from-query", json={"name": "пусто"})
+
+    assert response.status_code == 422
+    assert created == []
@@ -0,0 +1,88 @@
+import io
+import tempfile
+
+import openpyxl
+import pytest
+
+from app.parsers.filter import FilterParser
+
+
+def spooled(data: bytes) -> tempfile.SpooledTemporaryFile:
+    """Файл в том виде, в каком его отдает UploadFile.file."""
+    file = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+    file.write(data)
+    file.seek(0)
+    return file
+
+
+def xlsx_bytes(rows) -> bytes:
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    for row in rows:
+        sheet.append(row)
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+CSV_DATA = (
+    "﻿ИНН;Наименование\r\n"
+    "7707083893;ПАО Сбербанк\r\n"
+    "\"500100732259\",ИП Иванов\r\n"
+    "770708389\tдополняется нулем\r\n"
+    "не ИНН;строка с ошибкой\r\n"
+    "12345;слишком короткий\r\n"
+    "\r\n"
+    "7707083893;повтор\r\n"
+).encode("utf-8")
+
+EXPECTED = ["7707083893", "500100732259", "0770708389"]
+
+
+@pytest.mark.parametrize("filename", ["filter.csv", "filter.txt"])
+def test_text_file_skips_header_bad_rows_and_duplicates(filename):
+    parser = FilterParser(io.BytesIO(CSV_DATA), filename)
+    assert parser.read_tax_numbers() == EXPECTED
+
+
+@pytest.mark.parametrize("filename", ["filter.csv", "filter.txt"])
+def test_text_file_from_upload_spooled_file(filename):
+    assert FilterParser(spooled(CSV_DATA), filename).read_tax_numbers() == EXPECTED
+
+
+def test_text_file_with_invalid_utf8_is_not_fatal():
+    data = b"\xff\xfe\xfa;bad\n7707083893\n"
+    assert FilterParser(spooled(data), "filter.txt").read_tax_numbers() == ["7707083893"]
+
+
+def test_xlsx_reads_first_column():
+    data = xlsx_bytes([
+        ["ИНН", "Наименование"],
+        [7707083893, "число"],
+        [500100732259.0, "число с плавающей точкой"],
+        ["770708389", "строка"],
+        [1.5, "дробное число"],
+        ["не ИНН", "ошибка"],
+        [None, "пусто"],
+        ["7707083893", "повтор"],
+    ])
+    assert FilterParser(spooled(data), "filter.xlsx").read_tax_numbers() == EXPECTED
+
+
+def test_format_detected_by_content_type_without_suffix():
+    data = xlsx_bytes([[7707083893]])
+    parser = FilterParser(spooled(data), None, FilterParser.XLSX_CONTENT_TYPES[0])
+    assert parser.read_tax_numbers() == ["7707083893"]
+    assert FilterParser(io.BytesIO(b"7707083893\n"), None, "text/csv").read_tax_numbers() == ["7707083893"]
+
+
+@pytest.mark.parametrize("filename, content_type, supported", [
+    ("filter.xlsx", None, True),
+    ("FILTER.CSV", None, True),
+    ("filter.txt", "application/octet-stream", True),
+    ("filter.pdf", "text/csv", False),
+    (None, "text/plain", True),
+    (None, "application/pdf", False),
+])
+def test_is_supported(filename, content_type, supported):
+    assert FilterParser.is_supported(filename, content_type) is supported
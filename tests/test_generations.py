@@ -0,0 +1,79 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.crud.dataset import (
+    GENERATION_CHANNEL,
+    bump_generations,
+    bump_generations_statement,
+    generation_tracker,
+    get_dataset_version,
+)
+
+
+class BumpSession():
+    """Асинхронная сессия поверх синхронной: bump_generations получает строки как из BUMP_GENERATIONS_SQL."""
+
+    def __init__(self, session: Session, generations: dict):
+        self.info = session.info
+        self.generations = generations
+
+    async def execute(self, statement, params=None):
+        entities = statement.compile().params["entities"]
+        return SimpleNamespace(all=lambda: [(entity, self.generations[entity] + 1, "") for entity in entities])
+
+
+def write(generations, *entities, commit=True):
+    with Session(create_engine("sqlite://")) as session:
+        session.begin()
+        asyncio.run(bump_generations(BumpSession(session, generations), *entities))
+        assert generation_tracker.key() == "1.1.1.1"
+        if commit:
+            session.commit()
+        else:
+            session.rollback()
+
+
+def test_bump_generations_statement_notifies():
+    statement = bump_generations_statement("patent", "ownership")
+    assert statement.compile().params == {"entities": ["patent", "ownership"]}
+    assert f"pg_notify('{GENERATION_CHANNEL}'" in str(statement)
+
+
+def test_bump_applies_generations_after_commit(generations):
+    write(generations, "patent", "ownership")
+    assert generation_tracker.key() == "2.1.2.1"
+
+
+def test_bump_discards_generations_on_rollback(generations):
+    write(generations, "person", commit=False)
+    assert generation_tracker.key() == "1.1.1.1"
+
+    write(generations, "filter")
+    assert generation_tracker.key() == "1.1.1.2"
+
+
+def test_notifications_only_advance_generations(generations):
+    generation_tracker._on_notify(None, 0, GENERATION_CHANNEL, "patent:5")
+    generation_tracker._on_notify(None, 0, GENERATION_CHANNEL, "patent:3")
+    generation_tracker._on_notify(None, 0, GENERATION_CHANNEL, "person:oops")
+
+    assert generation_tracker.key(("patent", "person")) == "5.1"
+
+
+def test_key_orders_entities_and_defaults_to_zero(generations):
+    generations["person"] = 7
+    assert generation_tracker.key(("person", "patent", "unknown")) == "7.1.0"
+
+
+@pytest.mark.parametrize("entities, expected", [(None, "3.1.0.2"), (("person", "patent"), "1.3")])
+def test_get_dataset_version(entities, expected):
+    class Session():
+        async def execute(self, statement, params):
+            return SimpleNamespace(all=lambda: [("patent", 3), ("person", 1), ("filter", 2)])
+
+    args = () if entities is None else (entities,)
+    assert asyncio.run(get_dataset_version(Session(), *args)) == expected
@@ -0,0 +1,164 @@
+import asyncio
+import datetime
+import io
+import threading
+from contextlib import asynccontextmanager
+from decimal import Decimal
+
+import openpyxl
+import pyarrow.parquet as pq
+import pytest
+
+from app.crud import patents_export
+from app.crud.patents_export import (
+    EXPORT_HEADERS,
+    build_export_query,
+    compile_copy_query,
+    iter_export_csv,
+    iter_export_parquet,
+    iter_export_xlsx,
+)
+from app.crud.xlsx_stream import XLSXStreamWriter
+
+ROWS = [
+    ("7701", "Юрлицо", "Вуз", "ООО «Ромашка» & Co", 100 + number, "изобретение",
+     datetime.date(2020, 1, 1 + number), "Способ\x01 <№1>", number % 2 == 0, "A01", "A01B",
+     "Москва", None, number)
+    for number in range(7)
+]
+
+
+class StreamResult():
+    def __init__(self, rows, size):
+        self.rows = rows
+        self.size = size
+
+    async def partitions(self):
+        for start in range(0, len(self.rows), self.size):
+            await asyncio.sleep(0)
+            yield self.rows[start:start + self.size]
+
+
+CSV_CHUNKS = [b"header\nrow 1\n", b"row 2\nrow 3\n", b"row 4\n"]
+
+
+class CopyConnection():
+    def __init__(self):
+        self.driver_connection = self
+        self.queries = []
+
+    async def copy_from_query(self, query, output, format, header):
+        self.queries.append(query)
+        for chunk in CSV_CHUNKS:
+            await output(chunk)
+
+
+@pytest.fixture
+def export_rows(monkeypatch):
+    """
+    Подменяет сессию выгрузки: запрос отдает ROWS партиями по 3 строки,
+    COPY - порции CSV_CHUNKS.
+    """
+    copy_connection = CopyConnection()
+
+    class Session():
+        async def stream(self, stmt):
+            return StreamResult(ROWS, 3)
+
+        async def connection(self):
+            return self
+
+        async def get_raw_connection(self):
+            return copy_connection
+
+    @asynccontextmanager
+    async def session_local():
+        yield Session()
+
+    monkeypatch.setattr(patents_export, "AsyncSessionLocal", session_local)
+    return ROWS
+
+
+async def collect(iterator) -> bytes:
+    return b"".join([chunk async for chunk in iterator])
+
+
+def read_xlsx(data: bytes) -> list:
+    sheet = openpyxl.load_workbook(io.BytesIO(data), read_only=True).active
+    return [list(row) for row in sheet.iter_rows(values_only=True)]
+
+
+def test_xlsx_writer_cell_types():
+    writer = XLSXStreamWriter(sheet_title="Лист <1>")
+    writer.append(["текст", 1, 2.5, Decimal("3.25"), True, None, "x"])
+    writer.append([datetime.date(2024, 2, 29), datetime.datetime(2024, 2, 29, 12, 30)])
+    data = writer.read() + writer.close()
+
+    workbook = openpyxl.load_workbook(io.BytesIO(data))
+    assert workbook.sheetnames == ["Лист <1>"]
+    rows = [list(row) for row in workbook.active.iter_rows(values_only=True)]
+    assert rows[0] == ["текст", 1, 2.5, 3.25, True, None, "x"]
+    assert rows[1][:2] == [datetime.datetime(2024, 2, 29), datetime.datetime(2024, 2, 29, 12, 30)]
+
+
+def test_iter_export_xlsx_writes_all_batches(export_rows):
+    counts = []
+    data = asyncio.run(collect(iter_export_xlsx(build_export_query(), on_rows=counts.append)))
+
+    rows = read_xlsx(data)
+    assert rows[0] == EXPORT_HEADERS
+    assert len(rows) == len(export_rows) + 1
+    assert rows[1][3] == "ООО «Ромашка» & Co"
+    assert rows[1][6] == datetime.datetime(2020, 1, 1)
+    assert rows[1][7] == "Способ <№1>"
+    assert [row[4] for row in rows[1:]] == [row[4] for row in export_rows]
+    assert counts == [3, 3, 1]
+
+
+def test_iter_export_xlsx_builds_batches_off_the_event_loop(export_rows, monkeypatch):
+    threads = []
+    append_rows = XLSXStreamWriter.append_rows
+
+    def recording_append_rows(self, rows):
+        threads.append(threading.get_ident())
+        return append_rows(self, rows)
+
+    monkeypatch.setattr(XLSXStreamWriter, "append_rows", recording_append_rows)
+
+    async def scenario():
+        await collect(iter_export_xlsx(build_export_query()))
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(scenario())
+    assert len(threads) == 3
+    assert loop_thread not in threads
+
+
+def test_iter_export_parquet(export_rows, monkeypatch):
+    monkeypatch.setattr(patents_export, "PARQUET_ROW_GROUP_SIZE", 5)
+    counts = []
+    data = asyncio.run(collect(iter_export_parquet(build_export_query(), on_rows=counts.append)))
+
+    parquet_file = pq.ParquetFile(io.BytesIO(data))
+    assert parquet_file.schema_arrow.names == EXPORT_HEADERS
+    assert parquet_file.num_row_groups == 2
+    assert [tuple(row.values()) for row in parquet_file.read().to_pylist()] == export_rows
+    assert counts == [3, 3, 1]
+
+
+def test_compile_copy_query_uses_headers_and_literals():
+    query = compile_copy_query(build_export_query(filter_id=7, actual="Актуально", kind=2))
+
+    assert 'AS "ИНН"' in query
+    assert 'AS "Число авторов"' in query
+    assert "filtertaxnumber.filter_id = 7" in query
+    assert "patent.kind = 2" in query
+    assert "%(" not in query
+
+
+def test_iter_export_csv_passes_copy_chunks(export_rows):
+    counts = []
+    data = asyncio.run(collect(iter_export_csv(build_export_query(), on_rows=counts.append)))
+
+    assert data == b"".join(CSV_CHUNKS)
+    assert counts == [2, 2, 1]
@@ -0,0 +1,86 @@
+import pytest
+
+from app.crud.person import person_crud
+
+
+@pytest.fixture
+def persons_list(monkeypatch):
+    calls = []
+
+    async def get_persons_list(session, page, pagesize, **filters):
+        calls.append(filters)
+        return {"total": len(calls), "items": []}
+
+    monkeypatch.setattr(person_crud, "get_persons_list", get_persons_list)
+    return calls
+
+
+@pytest.mark.parametrize("entity", ["patent", "ownership"])
+def test_persons_by_region_follow_patent_and_ownership_writes(client, generations, persons_list, entity):
+    first = client.get("/persons", params={"region": "Москва"})
+    assert client.get("/persons", params={"region": "Москва"}).json() == first.json()
+    assert len(persons_list) == 1
+
+    generations[entity] += 1
+    response = client.get("/persons", params={"region": "Москва"}, headers={"If-None-Match": first.headers["etag"]})
+
+    assert response.status_code == 200
+    assert response.json()["total"] == 2
+
+
+def test_persons_without_region_ignore_patent_writes(client, generations, persons_list):
+    first = client.get("/persons", params={"kind": 1})
+    generations["patent"] += 1
+    generations["ownership"] += 1
+
+    response = client.get("/persons", params={"kind": 1}, headers={"If-None-Match": first.headers["etag"]})
+
+    assert response.status_code == 304
+    assert len(persons_list) == 1
+
+
+def test_persons_follow_person_and_filter_writes(client, generations, persons_list):
+    client.get("/persons", params={"filter_id": 5})
+    generations["filter"] += 1
+    client.get("/persons", params={"filter_id": 5})
+    generations["person"] += 1
+    client.get("/persons", params={"filter_id": 5})
+
+    assert len(persons_list) == 3
+
+
+@pytest.fixture
+def suggestions(monkeypatch):
+    calls = []
+
+    async def suggest(session, q, limit=10):
+        calls.append(q)
+        return [{"tax_number": "7701", "full_name": q, "short_name": None, "patent_count": 1}]
+
+    monkeypatch.setattr(person_crud, "suggest", suggest)
+    return calls
+
+
+def test_suggest_shares_cache_between_normalized_queries(client, generations, suggestions):
+    first = client.get("/persons/suggest", params={"q": "«Ёлка»"})
+    second = client.get("/persons/suggest", params={"q": "  ЕЛКА "})
+
+    assert first.status_code == second.status_code == 200
+    assert second.json() == first.json()
+    assert suggestions == ["елка"]
+
+
+@pytest.mark.parametrize("q", ["а", "  а ", "«а»", "", "а" * 101])
+def test_suggest_validates_normalized_query_on_miss_and_hit(client, generations, suggestions, q):
+    # Запрос с тем же ключом сначала вычисляется, затем отдается из кеша - ответ одинаковый.
+    assert client.get("/persons/suggest", params={"q": q}).status_code == 422
+    assert client.get("/persons/suggest", params={"q": q}).status_code == 422
+    assert client.get("/persons/suggest", params={"q": q.strip()}).status_code == 422
+    assert suggestions == []
+
+
+def test_suggest_accepts_padded_query_of_max_length(client, generations, suggestions):
+    q = "а" * 100
+    assert client.get("/persons/suggest", params={"q": f" {q} "}).status_code == 200
+    assert client.get("/persons/suggest", params={"q": q}).status_code == 200
+    assert suggestions == [q]
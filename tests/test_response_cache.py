@@ -0,0 +1,135 @@
+import asyncio
+from typing import List, Optional
+
+import httpx
+import pytest
+from fastapi import APIRouter, Depends, FastAPI, Query
+from fastapi.testclient import TestClient
+
+from app.core.cache import CachedRoute, cached
+
+state = {"calls": 0, "checks": 0, "delay": 0.0}
+
+
+def check():
+    state["checks"] += 1
+
+
+router = APIRouter(route_class=CachedRoute)
+
+
+@router.get("/items")
+@cached(depends_on=("patent",), normalize={"q": str.lower})
+async def cache_test_items(
+        q: Optional[str] = Query(None, min_length=1),
+        tag: List[str] = Query([]),
+        _: None = Depends(check),
+) -> dict:
+    state["calls"] += 1
+    await asyncio.sleep(state["delay"])
+    return {"calls": state["calls"], "q": q, "tag": tag}
+
+
+app = FastAPI()
+app.include_router(router)
+
+
+@pytest.fixture
+def client(generations):
+    state.update(calls=0, checks=0, delay=0.0)
+    return TestClient(app)
+
+
+def test_hit_is_served_before_dependencies(client):
+    assert client.get("/items", params={"q": "a"}).json()["calls"] == 1
+    assert client.get("/items", params={"q": "a"}).json()["calls"] == 1
+    assert state == {"calls": 1, "checks": 1, "delay": 0.0}
+
+
+def test_key_normalizes_values_and_sorts_params(client):
+    first = client.get("/items?q=Abc&tag=x&tag=y")
+    assert client.get("/items?tag=x&q=ABC&tag=y").json() == first.json()
+    assert client.get("/items?tag=y&tag=x&q=abc").json()["calls"] == 2
+
+
+def test_key_keeps_empty_values(client):
+    assert client.get("/items").status_code == 200
+    assert client.get("/items?q=").status_code == 422
+    assert client.get("/items?q=").status_code == 422
+    assert state["calls"] == 1
+
+
+def test_key_follows_depends_on_generations(client, generations):
+    client.get("/items")
+    generations["person"] += 1
+    assert client.get("/items").json()["calls"] == 1
+    generations["patent"] += 1
+    assert client.get("/items").json()["calls"] == 2
+
+
+def test_cache_is_bypassed_until_generations_are_loaded(client, generations):
+    from app.crud.dataset import generation_tracker
+
+    generation_tracker.loaded.clear()
+    client.get("/items")
+    response = client.get("/items")
+    assert response.json()["calls"] == 2
+    assert "etag" not in response.headers
+
+
+async def get_concurrently(count: int, url: str) -> list:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as async_client:
+        return await asyncio.gather(*(async_client.get(url) for _ in range(count)))
+
+
+def test_concurrent_misses_are_computed_once(client):
+    state["delay"] = 0.05
+    responses = asyncio.run(get_concurrently(5, "/items?q=a"))
+
+    assert {response.json()["calls"] for response in responses} == {1}
+    assert state["calls"] == 1
+
+
+def test_stale_entry_is_served_while_revalidating(client, monkeypatch):
+    from app.core.cache import response_encoder
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as async_client:
+            assert (await async_client.get("/items")).json()["calls"] == 1
+            monkeypatch.setattr(response_encoder, "is_fresh", lambda encoded: False)
+            state["delay"] = 0.05
+            stale = await async_client.get("/items")
+            revalidations = set(cache_test_items.response_cache._revalidations)
+            await asyncio.gather(*revalidations)
+            monkeypatch.undo()
+            fresh = await async_client.get("/items")
+            return stale, revalidations, fresh
+
+    stale, revalidations, fresh = asyncio.run(scenario())
+    assert stale.json()["calls"] == 1
+    assert len(revalidations) == 1
+    assert fresh.json()["calls"] == 2
+
+
+def test_matching_etag_gets_304_without_reading_cache(client):
+    first = client.get("/items", params={"q": "a"})
+    etag = first.headers["etag"]
+
+    response = client.get("/items", params={"q": "A"}, headers={"If-None-Match": f'"other", W/{etag}'})
+
+    assert response.status_code == 304
+    assert response.headers["etag"] == f"W/{etag}"
+    assert response.content == b""
+    assert state["calls"] == 1
+
+
+def test_etag_changes_with_params_and_generations(client, generations):
+    etag = client.get("/items").headers["etag"]
+    assert client.get("/items", params={"q": "a"}).headers["etag"] != etag
+
+    generations["patent"] += 1
+    response = client.get("/items", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag